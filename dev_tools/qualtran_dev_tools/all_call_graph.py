@@ -15,13 +15,18 @@
 """Generate the library-wide call graph from all bloq examples."""
 import logging
 import warnings
-from typing import Iterable
+from typing import Iterable, Iterator
 
 import networkx as nx
 
 from qualtran import Bloq, BloqExample, DecomposeNotImplementedError, DecomposeTypeError
 from qualtran.bloqs.basic_gates import Rx, Ry, Rz, TGate, Toffoli, XPowGate, YPowGate, ZPowGate
-from qualtran.resource_counting import SympySymbolAllocator
+from qualtran.resource_counting import (
+    CompactCallGraph,
+    GeneralizerT,
+    get_compact_call_graph,
+    SympySymbolAllocator,
+)
 from qualtran.resource_counting._call_graph import _build_call_graph
 from qualtran.resource_counting._generalization import _make_composite_generalizer
 from qualtran.resource_counting.generalizers import (
@@ -35,13 +40,8 @@ from qualtran.resource_counting.generalizers import (
 logger = logging.getLogger(__name__)
 
 
-def get_all_call_graph(bes: Iterable[BloqExample]):
-    """Create a call graph that is the union of all of the bloqs in the list of bloq examples.
-
-    This applies some standard generalizers, and will stop at a larger-than-default set
-    of leaf bloqs in accordance with https://github.com/quantumlib/Qualtran/issues/873
-    """
-    generalize = _make_composite_generalizer(
+def _all_call_graph_generalizer() -> GeneralizerT:
+    return _make_composite_generalizer(
         ignore_split_join,
         generalize_cvs,
         generalize_rotation_angle,
@@ -49,26 +49,35 @@ def get_all_call_graph(bes: Iterable[BloqExample]):
         ignore_cliffords,
     )
 
-    def keep(b: Bloq) -> bool:
-        if b == Toffoli():
-            return True
 
-        if b == TGate():
-            return True
+def _keep_all_call_graph_leaf(b: Bloq) -> bool:
+    if b == Toffoli():
+        return True
+
+    if b == TGate():
+        return True
+
+    if isinstance(b, (Rx, Ry, Rz, XPowGate, YPowGate, ZPowGate)):
+        return True
 
-        if isinstance(b, (Rx, Ry, Rz, XPowGate, YPowGate, ZPowGate)):
-            return True
+    try:
+        _ = b.build_call_graph(SympySymbolAllocator())
+    except DecomposeTypeError:
+        return True
+    except DecomposeNotImplementedError:
+        warnings.warn(f"{b} lacks a call graph.")
+        return True
 
-        try:
-            _ = b.build_call_graph(SympySymbolAllocator())
-        except DecomposeTypeError:
-            return True
-        except DecomposeNotImplementedError:
-            warnings.warn(f"{b} lacks a call graph.")
-            return True
+    return False
 
-        return False
 
+def get_all_call_graph(bes: Iterable[BloqExample]):
+    """Create a call graph that is the union of all of the bloqs in the list of bloq examples.
+
+    This applies some standard generalizers, and will stop at a larger-than-default set
+    of leaf bloqs in accordance with https://github.com/quantumlib/Qualtran/issues/873
+    """
+    generalize = _all_call_graph_generalizer()
     g = nx.DiGraph()
     ssa = SympySymbolAllocator()
 
@@ -76,7 +85,30 @@ def get_all_call_graph(bes: Iterable[BloqExample]):
         logger.info("Building call graph for: %s", be.name)
         bloq = be.make()
         _build_call_graph(
-            bloq=bloq, generalizer=generalize, ssa=ssa, keep=keep, max_depth=None, g=g, depth=0
+            bloq=bloq,
+            generalizer=generalize,
+            ssa=ssa,
+            keep=_keep_all_call_graph_leaf,
+            max_depth=None,
+            g=g,
+            depth=0,
         )
 
     return g
+
+
+def get_all_compact_call_graph(bes: Iterable[BloqExample]) -> CompactCallGraph:
+    """Like `get_all_call_graph`, but return the union call graph as a `CompactCallGraph`.
+
+    This uses much less memory than a `networkx.DiGraph` for the library-wide call graph.
+    Use `CompactCallGraph.to_networkx()` to convert it.
+    """
+
+    def _make_bloqs() -> Iterator[Bloq]:
+        for be in bes:
+            logger.info("Building call graph for: %s", be.name)
+            yield be.make()
+
+    return get_compact_call_graph(
+        _make_bloqs(), generalizer=_all_call_graph_generalizer(), keep=_keep_all_call_graph_leaf
+    )
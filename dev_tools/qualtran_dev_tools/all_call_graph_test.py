@@ -15,7 +15,7 @@
 import networkx as nx
 import pytest
 
-from .all_call_graph import get_all_call_graph
+from .all_call_graph import get_all_call_graph, get_all_compact_call_graph
 from .bloq_finder import get_bloq_examples
 
 
@@ -27,3 +27,12 @@ def test_get_all_call_graph():
     g = get_all_call_graph(bes)
     res = list(nx.simple_cycles(g))
     assert res == []
+
+
+def test_get_all_compact_call_graph():
+    bes = [be for be in get_bloq_examples() if be.name in ('thc_prep', 'modexp_small')]
+    assert len(bes) == 2
+    cg = get_all_compact_call_graph(bes)
+    g = get_all_call_graph(bes)
+    assert cg.bloqs == tuple(g.nodes)
+    assert nx.utils.edges_equal(cg.to_networkx().edges(data='n'), g.edges(data='n'))
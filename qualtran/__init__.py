@@ -99,4 +99,12 @@ from ._infra.controlled import (
 
 from ._infra.bloq_example import BloqExample, bloq_example, BloqDocSpec
 
+from ._infra.decomposition_cache import (
+    DecompositionCache,
+    DecompositionCacheInfo,
+    disable_decomposition_cache,
+    get_decomposition_cache,
+    memoize_decompositions,
+)
+
 # --------------------------------------------------------------------------------------------------
@@ -0,0 +1,305 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""A compact, array-backed graph of the bloq instances in a composite bloq."""
+import heapq
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+    Union,
+)
+
+import networkx as nx
+import numpy as np
+
+if TYPE_CHECKING:
+    from qualtran import BloqInstance, Connection, DanglingT
+
+BinstT = Union['BloqInstance', 'DanglingT']
+
+
+def _csr(rows: Sequence[Sequence[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack a list of lists of integers into compressed sparse rows `(indptr, indices)`."""
+    indptr = np.zeros(len(rows) + 1, dtype=np.intp)
+    np.cumsum([len(row) for row in rows], out=indptr[1:])
+    indices = np.fromiter((j for row in rows for j in row), dtype=np.intp, count=indptr[-1])
+    return indptr, indices
+
+
+class BinstGraph:
+    """The dataflow graph between the bloq instances of a composite bloq.
+
+    Each bloq instance (including the `LeftDangle` and `RightDangle` placeholders) is a node
+    which is referred to by its index in `binsts`. There is an edge from one node to another if
+    at least one `Connection` goes from the first to the second. The graph is stored as
+    compressed sparse rows of integer node ids and connection ids: the successors of node `i`
+    are `succ_nodes[succ_indptr[i]:succ_indptr[i+1]]` and its outgoing connections are
+    `connections[k]` for `k` in `succ_cxn_ids[succ_cxn_indptr[i]:succ_cxn_indptr[i+1]]`, and
+    likewise for predecessors. This avoids the per-node and per-edge dictionaries of a
+    `networkx.DiGraph`.
+
+    Edge `e` goes from node `edge_src[e]` to node `edge_dst[e]` and carries the connections
+    with ids `edge_cxn_ids[edge_cxn_indptr[e]:edge_cxn_indptr[e+1]]`.
+
+    The nodes, neighbors, and connections are ordered like the `networkx.DiGraph` from
+    `to_networkx`, so the traversals here give the same results as the corresponding
+    `networkx` algorithms.
+
+    Use `from_connections` to build one. `CompositeBloq` builds and caches one for its
+    connections.
+
+    Args:
+        binsts: The nodes. The index of a bloq instance in this sequence is its node id.
+        connections: The connections.
+        edges: A list of `(u, v, cxn_ids)` for each edge from node `u` to node `v` carrying the
+            connections with the given ids. The successors (predecessors) of each node are
+            ordered by the first edge from (to) the node in this list.
+    """
+
+    def __init__(
+        self,
+        binsts: Sequence[BinstT],
+        connections: Sequence['Connection'],
+        edges: Sequence[Tuple[int, int, Sequence[int]]],
+    ):
+        self.binsts: Tuple[BinstT, ...] = tuple(binsts)
+        self.connections: Tuple['Connection', ...] = tuple(connections)
+        self._ids: Dict[BinstT, int] = {binst: i for i, binst in enumerate(self.binsts)}
+        self._nx_graph: Optional[nx.DiGraph] = None
+
+        n = len(self.binsts)
+        succs: List[List[int]] = [[] for _ in range(n)]
+        succ_cxns: List[List[int]] = [[] for _ in range(n)]
+        preds: List[List[int]] = [[] for _ in range(n)]
+        pred_cxns: List[List[int]] = [[] for _ in range(n)]
+        for u, v, cxn_ids in edges:
+            succs[u].append(v)
+            succ_cxns[u].extend(cxn_ids)
+            preds[v].append(u)
+            pred_cxns[v].extend(cxn_ids)
+
+        self.succ_indptr, self.succ_nodes = _csr(succs)
+        self.pred_indptr, self.pred_nodes = _csr(preds)
+        self.succ_cxn_indptr, self.succ_cxn_ids = _csr(succ_cxns)
+        self.pred_cxn_indptr, self.pred_cxn_ids = _csr(pred_cxns)
+        self.edge_src = np.fromiter((u for u, _, _ in edges), dtype=np.intp, count=len(edges))
+        self.edge_dst = np.fromiter((v for _, v, _ in edges), dtype=np.intp, count=len(edges))
+        self.edge_cxn_indptr, self.edge_cxn_ids = _csr([cxn_ids for _, _, cxn_ids in edges])
+
+    @classmethod
+    def from_connections(
+        cls, cxns: Iterable['Connection'], nodes: Iterable[BinstT] = ()
+    ) -> 'BinstGraph':
+        """Build the graph of the bloq instances joined by `cxns`.
+
+        Args:
+            cxns: The connections.
+            nodes: Additional nodes, e.g. bloq instances without any connections.
+        """
+        ids: Dict[BinstT, int] = {}
+        binsts: List[BinstT] = []
+        connections: List['Connection'] = []
+        edge_ids: Dict[Tuple[int, int], int] = {}
+        edges: List[Tuple[int, int, List[int]]] = []
+
+        def _id(binst: BinstT) -> int:
+            i = ids.get(binst)
+            if i is None:
+                i = ids[binst] = len(binsts)
+                binsts.append(binst)
+            return i
+
+        for k, cxn in enumerate(cxns):
+            connections.append(cxn)
+            u, v = _id(cxn.left.binst), _id(cxn.right.binst)
+            e = edge_ids.get((u, v))
+            if e is None:
+                e = edge_ids[u, v] = len(edges)
+                edges.append((u, v, []))
+            edges[e][2].append(k)
+        for binst in nodes:
+            _id(binst)
+        return cls(binsts, connections, edges)
+
+    @classmethod
+    def from_networkx(cls, g: nx.DiGraph) -> 'BinstGraph':
+        """Build from a `networkx.DiGraph` with a list of connections on edge attribute 'cxns'."""
+        binsts = list(g.nodes)
+        ids = {binst: i for i, binst in enumerate(binsts)}
+        connections: List['Connection'] = []
+        edges = []
+        for u in binsts:
+            for v, data in g.succ[u].items():
+                cxn_ids = list(range(len(connections), len(connections) + len(data['cxns'])))
+                connections.extend(data['cxns'])
+                edges.append((ids[u], ids[v], cxn_ids))
+        return cls(binsts, connections, edges)
+
+    def __len__(self) -> int:
+        return len(self.binsts)
+
+    def __iter__(self) -> Iterator[BinstT]:
+        return iter(self.binsts)
+
+    def __contains__(self, binst: object) -> bool:
+        return binst in self._ids
+
+    def index(self, binst: BinstT) -> int:
+        """The node id of `binst`."""
+        return self._ids[binst]
+
+    def preds(self, binst: BinstT) -> List[BinstT]:
+        """The bloq instances with a connection into `binst`."""
+        i = self._ids[binst]
+        ids = self.pred_nodes[self.pred_indptr[i] : self.pred_indptr[i + 1]]
+        return [self.binsts[j] for j in ids.tolist()]
+
+    def succs(self, binst: BinstT) -> List[BinstT]:
+        """The bloq instances with a connection from `binst`."""
+        i = self._ids[binst]
+        ids = self.succ_nodes[self.succ_indptr[i] : self.succ_indptr[i + 1]]
+        return [self.binsts[j] for j in ids.tolist()]
+
+    def cxns(self, binst: BinstT) -> Tuple[List['Connection'], List['Connection']]:
+        """The predecessor and successor connections of `binst`."""
+        i = self._ids[binst]
+        pred_ids = self.pred_cxn_ids[self.pred_cxn_indptr[i] : self.pred_cxn_indptr[i + 1]]
+        succ_ids = self.succ_cxn_ids[self.succ_cxn_indptr[i] : self.succ_cxn_indptr[i + 1]]
+        cxns = self.connections
+        return [cxns[k] for k in pred_ids.tolist()], [cxns[k] for k in succ_ids.tolist()]
+
+    def topological_generations(self) -> Iterator[List[BinstT]]:
+        """Iterate over the topological generations, like `nx.topological_generations`."""
+        succ_indptr = self.succ_indptr.tolist()
+        succ_nodes = self.succ_nodes.tolist()
+        indegree = np.diff(self.pred_indptr).tolist()
+        generation = [i for i, d in enumerate(indegree) if d == 0]
+        n_done = 0
+        while generation:
+            n_done += len(generation)
+            next_generation = []
+            for i in generation:
+                for j in succ_nodes[succ_indptr[i] : succ_indptr[i + 1]]:
+                    indegree[j] -= 1
+                    if indegree[j] == 0:
+                        next_generation.append(j)
+            yield [self.binsts[i] for i in generation]
+            generation = next_generation
+        if n_done != len(self.binsts):
+            raise nx.NetworkXUnfeasible("Graph contains a cycle.")
+
+    def topological_sort(self) -> Iterator[BinstT]:
+        """Iterate over the bloq instances in topological order, like `nx.topological_sort`."""
+        for generation in self.topological_generations():
+            yield from generation
+
+    def lexicographical_topological_sort(self, key: Callable[[BinstT], Any]) -> Iterator[BinstT]:
+        """Iterate over the bloq instances in topological order, picking the smallest `key` first.
+
+        Ties are broken by node id. This is the order of
+        `nx.lexicographical_topological_sort(self.to_networkx(), key)`.
+        """
+        return self.priority_topological_sort([key(binst) for binst in self.binsts])
+
+    def priority_topological_sort(self, priorities: Sequence[Any]) -> Iterator[BinstT]:
+        """Iterate over the bloq instances in topological order, smallest priority first.
+
+        Args:
+            priorities: The priority of each node, indexed by node id. Ties are broken by
+                node id.
+        """
+        succ_indptr = self.succ_indptr.tolist()
+        succ_nodes = self.succ_nodes.tolist()
+        indegree = np.diff(self.pred_indptr).tolist()
+        heap = [(priorities[i], i) for i, d in enumerate(indegree) if d == 0]
+        heapq.heapify(heap)
+        n_done = 0
+        while heap:
+            _, i = heapq.heappop(heap)
+            for j in succ_nodes[succ_indptr[i] : succ_indptr[i + 1]]:
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    heapq.heappush(heap, (priorities[j], j))
+            n_done += 1
+            yield self.binsts[i]
+        if n_done != len(self.binsts):
+            raise nx.NetworkXUnfeasible("Graph contains a cycle.")
+
+    def weakly_connected_components(self) -> List[List[BinstT]]:
+        """The weakly connected components, in the order of `nx.weakly_connected_components`.
+
+        Each component is ordered by node id.
+        """
+        succ_indptr = self.succ_indptr.tolist()
+        succ_nodes = self.succ_nodes.tolist()
+        pred_indptr = self.pred_indptr.tolist()
+        pred_nodes = self.pred_nodes.tolist()
+        component = [-1] * len(self.binsts)
+        n_components = 0
+        for start in range(len(self.binsts)):
+            if component[start] != -1:
+                continue
+            component[start] = n_components
+            todo = [start]
+            while todo:
+                i = todo.pop()
+                for j in (
+                    succ_nodes[succ_indptr[i] : succ_indptr[i + 1]]
+                    + pred_nodes[pred_indptr[i] : pred_indptr[i + 1]]
+                ):
+                    if component[j] == -1:
+                        component[j] = n_components
+                        todo.append(j)
+            n_components += 1
+
+        components: List[List[BinstT]] = [[] for _ in range(n_components)]
+        for binst, c in zip(self.binsts, component):
+            components[c].append(binst)
+        return components
+
+    def to_networkx(self) -> nx.DiGraph:
+        """This graph as a `networkx.DiGraph` with a list of connections on edge attribute 'cxns'.
+
+        The graph is constructed on first use and cached. Don't mutate it.
+        """
+        if self._nx_graph is None:
+            g = nx.DiGraph()
+            g.add_nodes_from(self.binsts)
+            indptr = self.edge_cxn_indptr.tolist()
+            cxn_ids = self.edge_cxn_ids.tolist()
+            g.add_edges_from(
+                (
+                    self.binsts[u],
+                    self.binsts[v],
+                    {'cxns': [self.connections[k] for k in cxn_ids[indptr[e] : indptr[e + 1]]]},
+                )
+                for e, (u, v) in enumerate(zip(self.edge_src.tolist(), self.edge_dst.tolist()))
+            )
+            self._nx_graph = g
+        return self._nx_graph
+
+
+def as_binst_graph(binst_graph: Union[BinstGraph, nx.DiGraph]) -> BinstGraph:
+    """Get a `BinstGraph` from either a `BinstGraph` or a networkx binst graph."""
+    if isinstance(binst_graph, BinstGraph):
+        return binst_graph
+    return BinstGraph.from_networkx(binst_graph)
@@ -12,12 +12,15 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from typing import Iterator, TYPE_CHECKING
+from functools import lru_cache
+from typing import Iterator, List, Optional, Type, TYPE_CHECKING, Union
 
 import networkx as nx
 
+from .binst_graph import BinstGraph
+
 if TYPE_CHECKING:
-    from qualtran import BloqInstance
+    from qualtran import Bloq, BloqInstance, Signature
 
 _ALLOCATION_PRIORITY: int = int(1e16)
 """A large constant value to ensure that allocations are performed as late as possible
@@ -25,27 +28,41 @@ and de-allocations (with -_ALLOCATION_PRIORITY priority) are performed as early
 To determine ordering among allocations, we may add a priority to this base value."""
 
 
-def _priority(node: 'BloqInstance') -> int:
-    from qualtran._infra.gate_with_registers import total_bits
-    from qualtran._infra.quantum_graph import DanglingT
+@lru_cache(maxsize=None)
+def _bloq_type_priority(bloq_type: Type['Bloq']) -> Optional[int]:
+    """The priority of all bloqs of type `bloq_type`, if it doesn't depend on the signature."""
     from qualtran.bloqs.bookkeeping import Allocate, Free
 
-    if isinstance(node, DanglingT):
-        return 0
-
-    if node.bloq_is(Allocate):
+    if issubclass(bloq_type, Allocate):
         return _ALLOCATION_PRIORITY
-
-    if node.bloq_is(Free):
+    if issubclass(bloq_type, Free):
         return -_ALLOCATION_PRIORITY
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _signature_priority(signature: 'Signature') -> int:
+    """The change in the number of qubits from applying a bloq with this signature."""
+    from qualtran._infra.gate_with_registers import total_bits
 
-    signature = node.bloq.signature
     if any(reg.dtype.is_symbolic() for reg in signature):
         return 0
     return total_bits(signature.rights()) - total_bits(signature.lefts())
 
 
-def greedy_topological_sort(binst_graph: nx.DiGraph) -> Iterator['BloqInstance']:
+def _priority(node: 'BloqInstance') -> int:
+    from qualtran._infra.quantum_graph import DanglingT
+
+    if isinstance(node, DanglingT):
+        return 0
+
+    priority = _bloq_type_priority(type(node.bloq))
+    if priority is not None:
+        return priority
+    return _signature_priority(node.bloq.signature)
+
+
+def greedy_topological_sort(binst_graph: Union[BinstGraph, nx.DiGraph]) -> Iterator['BloqInstance']:
     """Stable greedy topological sorting for the bloq instance graph to minimize qubit counts.
 
     Topological sorting for the Bloq Instances graph which maintains a priority queue
@@ -63,16 +80,22 @@ def greedy_topological_sort(binst_graph: nx.DiGraph) -> Iterator['BloqInstance']
 
     The stability condition guarantees that two networkx graphs constructed with
     identical ordering of Graph.nodes and Graph.edges will have the same topological
-    sorting. The method delegates to `networkx.lexicographical_topological_sort` with
-    the `_priority` function used as a key.
+    sorting. The priority of each node is computed once (and cached for each bloq type and
+    signature), and the nodes are sorted with a heap of `(priority, node id)`. For a networkx
+    graph, the method delegates to `networkx.lexicographical_topological_sort` with the
+    `_priority` function used as a key.
 
     Args:
-        binst_graph: A networkx DiGraph with `BloqInstances` as nodes. Usually obtained
-        from `cbloq._binst_graph` where `cbloq` is a `CompositeBloq`.
+        binst_graph: A `BinstGraph` or networkx DiGraph with `BloqInstances` as nodes. Usually
+        obtained from `cbloq._compact_binst_graph` where `cbloq` is a `CompositeBloq`.
 
     Yields:
         Nodes from the input graph returned in a greedy topological sorted order with the
         goal to minimize qubit allocations and deallocations by pushing allocations to the
         right and de-allocations to the left.
     """
-    yield from nx.lexicographical_topological_sort(binst_graph, key=_priority)
+    if isinstance(binst_graph, BinstGraph):
+        priorities: List[int] = [_priority(binst) for binst in binst_graph]
+        yield from binst_graph.priority_topological_sort(priorities)
+    else:
+        yield from nx.lexicographical_topological_sort(binst_graph, key=_priority)
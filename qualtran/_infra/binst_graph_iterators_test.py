@@ -25,7 +25,11 @@ from qualtran import (
     Signature,
     SoquetT,
 )
-from qualtran._infra.binst_graph_iterators import greedy_topological_sort
+from qualtran._infra.binst_graph_iterators import (
+    _priority,
+    _signature_priority,
+    greedy_topological_sort,
+)
 from qualtran.bloqs.basic_gates import CNOT, IntState, Swap
 from qualtran.bloqs.bookkeeping import Allocate, Free
 
@@ -82,3 +86,25 @@ def test_topo_sort_with_symbolic_registers():
     cbloq = bb.finalize(x=x, y=y)
     res = list(greedy_topological_sort(cbloq._binst_graph))
     assert len(res) > 0
+
+
+def test_greedy_topological_sort_binst_graph():
+    cbloq = MultiAlloc(rounds=3).decompose_bloq()
+    expected = list(greedy_topological_sort(cbloq._binst_graph))
+    assert list(greedy_topological_sort(cbloq._compact_binst_graph)) == expected
+
+    order = cbloq._greedy_topological_order
+    assert list(order) == [binst for binst in expected if binst not in (LeftDangle, RightDangle)]
+    assert cbloq._greedy_topological_order is order
+    assert [binst for binst, _, _ in cbloq.iter_bloqnections()] == list(order)
+
+
+def test_priority_is_cached_per_signature():
+    _signature_priority.cache_clear()
+    cbloq = MultiAlloc(rounds=5).decompose_bloq()
+    _ = list(greedy_topological_sort(cbloq._compact_binst_graph))
+    # Only `CNOT` needs its signature inspected; `Allocate` and `Free` are handled by type.
+    assert _signature_priority.cache_info().currsize == 1
+    assert _priority(BloqInstance(Allocate(QAny(3)), i=0)) == _priority(
+        BloqInstance(Allocate(QBit()), i=1)
+    )
@@ -0,0 +1,100 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import networkx as nx
+import pytest
+
+from qualtran import BloqBuilder, CompositeBloq, LeftDangle, QUInt, RightDangle
+from qualtran._infra.binst_graph import as_binst_graph, BinstGraph
+from qualtran._infra.binst_graph_iterators import _priority
+from qualtran._infra.composite_bloq import _binst_to_cxns, _create_binst_graph
+from qualtran.bloqs.arithmetic import Add
+from qualtran.bloqs.basic_gates import CNOT, GlobalPhase, Hadamard
+from qualtran.bloqs.mcmt import MultiAnd
+
+
+def _make_disconnected_cbloq() -> CompositeBloq:
+    bb = BloqBuilder()
+    q = bb.add(Hadamard(), q=bb.add_register('q', 1))
+    bb.add(GlobalPhase(exponent=0.5))
+    return bb.finalize(q=q)
+
+
+def _make_cbloqs():
+    return [
+        Add(QUInt(4)).decompose_bloq(),
+        MultiAnd(cvs=(1, 0, 1, 1)).decompose_bloq(),
+        _make_disconnected_cbloq(),
+    ]
+
+
+@pytest.mark.parametrize('cbloq', _make_cbloqs())
+def test_binst_graph_matches_networkx(cbloq):
+    g = BinstGraph.from_connections(cbloq.connections, cbloq.bloq_instances)
+    nx_g = _create_binst_graph(cbloq.connections, cbloq.bloq_instances)
+
+    assert len(g) == len(nx_g)
+    assert list(g) == list(nx_g)
+    for binst in g:
+        assert binst in g
+        assert g.binsts[g.index(binst)] == binst
+        assert g.preds(binst) == list(nx_g.pred[binst])
+        assert g.succs(binst) == list(nx_g.succ[binst])
+        assert g.cxns(binst) == _binst_to_cxns(binst, binst_graph=nx_g)
+
+    assert list(g.topological_generations()) == list(nx.topological_generations(nx_g))
+    assert list(g.topological_sort()) == list(nx.topological_sort(nx_g))
+    assert list(g.lexicographical_topological_sort(key=_priority)) == list(
+        nx.lexicographical_topological_sort(nx_g, key=_priority)
+    )
+    assert [set(cc) for cc in g.weakly_connected_components()] == list(
+        nx.weakly_connected_components(nx_g)
+    )
+
+
+@pytest.mark.parametrize('cbloq', _make_cbloqs())
+def test_binst_graph_to_networkx(cbloq):
+    g = BinstGraph.from_connections(cbloq.connections, cbloq.bloq_instances)
+    nx_g = _create_binst_graph(cbloq.connections, cbloq.bloq_instances)
+    assert nx.utils.graphs_equal(g.to_networkx(), nx_g)
+    assert list(g.to_networkx().edges) == list(nx_g.edges)
+    assert g.to_networkx() is g.to_networkx()
+
+    g2 = as_binst_graph(nx_g)
+    assert list(g2) == list(g)
+    for binst in g:
+        assert g2.succs(binst) == g.succs(binst)
+        assert sorted(map(str, g2.cxns(binst)[0])) == sorted(map(str, g.cxns(binst)[0]))
+    assert as_binst_graph(g) is g
+
+
+def test_binst_graph_components():
+    cbloq = _make_disconnected_cbloq()
+    components = cbloq._compact_binst_graph.weakly_connected_components()
+    assert [len(cc) for cc in components] == [3, 1]
+    assert components[0][0] is LeftDangle
+    assert RightDangle in components[0]
+
+
+def test_cbloq_networkx_graph_is_lazy():
+    bb = BloqBuilder()
+    q0, q1 = bb.add_register('q0', 1), bb.add_register('q1', 1)
+    q0, q1 = bb.add(CNOT(), ctrl=q0, target=q1)
+    cbloq = bb.finalize(q0=q0, q1=q1)
+
+    assert len(list(cbloq.iter_bloqnections())) == 1
+    assert cbloq.final_soqs().keys() == {'q0', 'q1'}
+    assert cbloq.call_classically(q0=1, q1=0) == (1, 1)
+    assert cbloq._compact_binst_graph._nx_graph is None
+
+    assert cbloq._binst_graph is cbloq._compact_binst_graph.to_networkx()
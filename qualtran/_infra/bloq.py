@@ -29,6 +29,8 @@ from typing import (
     Union,
 )
 
+import attrs
+
 if TYPE_CHECKING:
     import cirq
     import networkx as nx
@@ -65,10 +67,25 @@ if TYPE_CHECKING:
 
 def _decompose_from_build_composite_bloq(bloq: 'Bloq') -> 'CompositeBloq':
     from qualtran import BloqBuilder
+    from qualtran._infra.decomposition_cache import get_active_decomposition_cache
+    from qualtran.resource_counting._profiling import get_active_cost_profile
+
+    def _build() -> 'CompositeBloq':
+        bb, initial_soqs = BloqBuilder.from_signature(bloq.signature, add_registers_allowed=False)
+        out_soqs = bloq.build_composite_bloq(bb=bb, **initial_soqs)
+        return bb.finalize(**out_soqs)
+
+    def _decompose() -> 'CompositeBloq':
+        profile = get_active_cost_profile()
+        if profile is None:
+            return _build()
+        with profile.time_decompose(bloq):
+            return _build()
 
-    bb, initial_soqs = BloqBuilder.from_signature(bloq.signature, add_registers_allowed=False)
-    out_soqs = bloq.build_composite_bloq(bb=bb, **initial_soqs)
-    return bb.finalize(**out_soqs)
+    cache = get_active_decomposition_cache()
+    if cache is None:
+        return _decompose()
+    return cache.decompose_bloq(bloq, _decompose)
 
 
 class DecomposeNotImplementedError(NotImplementedError):
@@ -89,6 +106,64 @@ class DecomposeTypeError(TypeError):
     """
 
 
+def _has_array_like_fields(cls: type) -> bool:
+    """Whether any attrs field of `cls` is compared via a custom `eq` key.
+
+    Bloqs use `attrs.field(eq=...)` to compare (large) array attributes by value, which is
+    expensive to hash.
+    """
+    return any(field.eq_key is not None for field in attrs.fields(cls))
+
+
+_CACHED_HASH_KEY = '_cached_structural_hash'
+
+
+def _cache_structural_hash(cls: type) -> None:
+    """Wrap the attrs-generated `__hash__` and `__eq__` of `cls` to cache the hash.
+
+    The hash is computed once per instance and stored in the instance `__dict__`. It is
+    not pickled, so it is re-computed in other processes. Equality checks between instances
+    of `cls` return early if the instances are identical or if both of their hashes have
+    already been computed and differ.
+    """
+    attrs_hash = cls.__dict__['__hash__']
+    attrs_eq = cls.__dict__['__eq__']
+    base_getstate = cls.__getstate__  # type: ignore[attr-defined]
+
+    def __hash__(self):
+        try:
+            return self.__dict__[_CACHED_HASH_KEY]
+        except KeyError:
+            h = attrs_hash(self)
+            object.__setattr__(self, _CACHED_HASH_KEY, h)
+            return h
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if other.__class__ is self.__class__:
+            # Only use hashes that are already cached: computing them may be expensive or
+            # raise a `TypeError` for unhashable attributes, which attrs equality supports.
+            self_hash = self.__dict__.get(_CACHED_HASH_KEY)
+            other_hash = other.__dict__.get(_CACHED_HASH_KEY)
+            if self_hash is not None and other_hash is not None and self_hash != other_hash:
+                return False
+        return attrs_eq(self, other)
+
+    def __getstate__(self):
+        state = base_getstate(self)
+        if isinstance(state, dict) and _CACHED_HASH_KEY in state:
+            state = {k: v for k, v in state.items() if k != _CACHED_HASH_KEY}
+        return state
+
+    __hash__.__qualname__ = attrs_hash.__qualname__
+    __eq__.__qualname__ = attrs_eq.__qualname__
+    __getstate__.__qualname__ = f'{cls.__qualname__}.__getstate__'
+    cls.__hash__ = __hash__  # type: ignore[method-assign]
+    cls.__eq__ = __eq__  # type: ignore[method-assign]
+    cls.__getstate__ = __getstate__  # type: ignore[attr-defined]
+
+
 class Bloq(metaclass=abc.ABCMeta):
     """Bloq is the primary abstract base class for all operations.
 
@@ -108,8 +183,24 @@ class Bloq(metaclass=abc.ABCMeta):
     There is only one mandatory method you must implement to have a well-formed `Bloq`,
     namely `Bloq.registers`. There are many other methods you can optionally implement to
     encode more information about the bloq.
+
+    Bloqs are immutable and are used extensively as dictionary keys. For attrs bloq classes
+    with attributes compared by value through a custom `eq` key (typically NumPy arrays of
+    classical data), the structural hash is computed once per instance and cached.
     """
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Slotted attrs classes (the default for `attrs.frozen`) are re-created with their
+        # generated methods, which calls this hook again.
+        if (
+            '__attrs_attrs__' in cls.__dict__
+            and cls.__dict__.get('__hash__') is not None
+            and '__eq__' in cls.__dict__
+            and _has_array_like_fields(cls)
+        ):
+            _cache_structural_hash(cls)
+
     @property
     @abc.abstractmethod
     def signature(self) -> 'Signature':
@@ -148,6 +239,10 @@ class Bloq(metaclass=abc.ABCMeta):
         trying to define a bloq's decomposition, consider overriding `build_composite_bloq`
         which provides helpful arguments for implementers.
 
+        Decompositions are memoized (see `qualtran.memoize_decompositions`), so repeated
+        calls on equal bloqs may return the same, shared `CompositeBloq` object. Use
+        `qualtran.disable_decomposition_cache` to always build a fresh one.
+
         Returns:
             A CompositeBloq containing the decomposition of this Bloq.
 
@@ -12,9 +12,16 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import pickle
+from functools import cached_property
+from typing import List
+
+import attrs
+import numpy as np
 import pytest
 
-from qualtran import CompositeBloq, DecomposeTypeError, Side
+from qualtran import Bloq, CompositeBloq, DecomposeTypeError, Side, Signature
+from qualtran.bloqs.data_loading.qrom import QROM
 from qualtran.bloqs.for_testing import TestAtom, TestTwoBitOp
 from qualtran.testing import execute_notebook
 
@@ -56,6 +63,50 @@ def test_as_composite_bloq():
     assert cb is cb2
 
 
+@attrs.frozen
+class _ListDataBloq(Bloq):
+    # The eq key is a tuple of lists, which can be compared but not hashed.
+    data: List[List[int]] = attrs.field(eq=tuple)
+
+    @cached_property
+    def signature(self) -> Signature:
+        return Signature.build(q=1)
+
+
+def test_cached_structural_hash():
+    data = np.arange(100)
+    qrom = QROM.build_from_data(data)
+    assert '_cached_structural_hash' not in qrom.__dict__
+    h = hash(qrom)
+    assert qrom.__dict__['_cached_structural_hash'] == h
+    assert hash(qrom) == h
+
+    qrom2 = QROM.build_from_data(data.copy())
+    assert qrom2 == qrom
+    assert hash(qrom2) == h
+    assert QROM.build_from_data(data + 1) != qrom
+    assert qrom != TestAtom()
+
+    # The cached hash is not pickled.
+    assert '_cached_structural_hash' not in qrom.__getstate__()
+    unpickled = pickle.loads(pickle.dumps(qrom))
+    assert '_cached_structural_hash' not in unpickled.__dict__
+    assert unpickled == qrom
+
+    # Bloqs without array-like attributes use the ordinary attrs hash.
+    atom = TestAtom()
+    hash(atom)
+    assert '_cached_structural_hash' not in atom.__dict__
+
+
+def test_cached_structural_hash_unhashable_fields():
+    bloq = _ListDataBloq([[1, 2], [3]])
+    assert bloq == _ListDataBloq([[1, 2], [3]])
+    assert bloq != _ListDataBloq([[1, 2]])
+    with pytest.raises(TypeError):
+        hash(bloq)
+
+
 @pytest.mark.notebook
 def test_notebook():
     execute_notebook('Bloqs-Tutorial')
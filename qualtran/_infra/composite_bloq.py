@@ -20,6 +20,7 @@ from typing import (
     cast,
     Dict,
     FrozenSet,
+    Generator,
     Iterable,
     Iterator,
     List,
@@ -40,6 +41,7 @@ import numpy as np
 import sympy
 from numpy.typing import NDArray
 
+from .binst_graph import BinstGraph
 from .binst_graph_iterators import greedy_topological_sort
 from .bloq import Bloq, DecomposeNotImplementedError, DecomposeTypeError
 from .data_types import check_dtypes_consistent, QAny, QBit, QCDType, QDType
@@ -126,6 +128,28 @@ class CompositeBloq(Bloq):
         soquets |= {cxn.right for cxn in self.connections}
         return frozenset(soquets)
 
+    @cached_property
+    def _compact_binst_graph(self) -> BinstGraph:
+        """Get a cached version of this composite bloq's BloqInstance graph in compact form.
+
+        This stores the same information as `_binst_graph` in arrays indexed by integer
+        node ids. It is cheaper to build and to traverse than the networkx graph, which is only
+        built if it is requested.
+        """
+        return BinstGraph.from_connections(self.connections, self.bloq_instances)
+
+    @cached_property
+    def _greedy_topological_order(self) -> Tuple[BloqInstance, ...]:
+        """The bloq instances in the order of `greedy_topological_sort`, without dangling nodes.
+
+        This is computed once and used by `iter_bloqnections`.
+        """
+        return tuple(
+            binst
+            for binst in greedy_topological_sort(self._compact_binst_graph)
+            if not isinstance(binst, DanglingT)
+        )
+
     @cached_property
     def _binst_graph(self) -> nx.DiGraph:
         """Get a cached version of this composite bloq's BloqInstance graph.
@@ -138,7 +162,7 @@ class CompositeBloq(Bloq):
         do not mutate the graph. It is cached for performance reasons. Use g.copy() to
         get a copy.
         """
-        return _create_binst_graph(self.connections, self.bloq_instances)
+        return self._compact_binst_graph.to_networkx()
 
     def as_cirq_op(
         self, qubit_manager: 'cirq.QubitManager', **cirq_quregs: 'CirqQuregT'
@@ -218,14 +242,14 @@ class CompositeBloq(Bloq):
         """Support classical data by recursing into the composite bloq."""
         from qualtran.simulation.classical_sim import call_cbloq_classically
 
-        out_vals, _ = call_cbloq_classically(self.signature, vals, self._binst_graph)
+        out_vals, _ = call_cbloq_classically(self.signature, vals, self._compact_binst_graph)
         return out_vals
 
     def call_classically(self, **vals: 'ClassicalValT') -> Tuple['ClassicalValT', ...]:
         """Support classical data by recursing into the composite bloq."""
         from qualtran.simulation.classical_sim import call_cbloq_classically
 
-        out_vals, _ = call_cbloq_classically(self.signature, vals, self._binst_graph)
+        out_vals, _ = call_cbloq_classically(self.signature, vals, self._compact_binst_graph)
         return tuple(out_vals[reg.name] for reg in self.signature.rights())
 
     def as_composite_bloq(self) -> 'CompositeBloq':
@@ -258,10 +282,8 @@ class CompositeBloq(Bloq):
             Every connection that does not involve a dangling node will appear twice: once as
             a predecessor and again as a successor.
         """
-        g = self._binst_graph
-        for binst in greedy_topological_sort(g):
-            if isinstance(binst, DanglingT):
-                continue
+        g = self._compact_binst_graph
+        for binst in self._greedy_topological_order:
             pred_cxns, succ_cxns = _binst_to_cxns(binst, binst_graph=g)
             yield binst, pred_cxns, succ_cxns
 
@@ -275,11 +297,11 @@ class CompositeBloq(Bloq):
         new bloq.
 
         >>> bb, _ = BloqBuilder.from_signature(self.signature)
-        >>> soq_map: List[Tuple[SoquetT, SoquetT]] = []
+        >>> soq_map: Dict[Soquet, Soquet] = {}
         >>> for binst, in_soqs, old_out_soqs in self.iter_bloqsoqs():
         >>>    in_soqs = bb.map_soqs(in_soqs, soq_map)
         >>>    new_out_soqs = bb.add_t(binst.bloq, **in_soqs)
-        >>>    soq_map.extend(zip(old_out_soqs, new_out_soqs))
+        >>>    bb.update_soq_map(soq_map, zip(old_out_soqs, new_out_soqs))
         >>> return bb.finalize(**bb.map_soqs(self.final_soqs(), soq_map))
 
         Yields:
@@ -305,9 +327,9 @@ class CompositeBloq(Bloq):
 
         This method is helpful for finalizing an "add from" operation, see `iter_bloqsoqs`.
         """
-        if RightDangle not in self._binst_graph:
+        if RightDangle not in self._compact_binst_graph:
             return {}
-        final_preds, _ = _binst_to_cxns(RightDangle, binst_graph=self._binst_graph)
+        final_preds, _ = _binst_to_cxns(RightDangle, binst_graph=self._compact_binst_graph)
         return _cxns_to_soq_dict(
             self.signature.rights(),
             final_preds,
@@ -318,11 +340,11 @@ class CompositeBloq(Bloq):
     def copy(self) -> 'CompositeBloq':
         """Create a copy of this composite bloq by re-building it."""
         bb, _ = BloqBuilder.from_signature(self.signature)
-        soq_map: List[Tuple[SoquetT, SoquetT]] = []
+        soq_map: Dict[Soquet, Soquet] = {}
         for binst, in_soqs, old_out_soqs in self.iter_bloqsoqs():
             in_soqs = _map_soqs(in_soqs, soq_map)
             new_out_soqs = bb.add_t(binst.bloq, **in_soqs)
-            soq_map.extend(zip(old_out_soqs, new_out_soqs))
+            _update_soq_map(soq_map, zip(old_out_soqs, new_out_soqs))
 
         fsoqs = _map_soqs(self.final_soqs(), soq_map)
         return bb.finalize(**fsoqs)
@@ -364,7 +386,7 @@ class CompositeBloq(Bloq):
         # pylint: disable=protected-access
         bb._i = max(binst.i for binst in self.bloq_instances) + 1
 
-        soq_map: List[Tuple[SoquetT, SoquetT]] = []
+        soq_map: Dict[Soquet, Soquet] = {}
         new_out_soqs: Tuple[SoquetT, ...]
         did_work = False
         for binst, in_soqs, old_out_soqs in self.iter_bloqsoqs():
@@ -383,7 +405,7 @@ class CompositeBloq(Bloq):
                 # pylint: disable=protected-access
                 new_out_soqs = tuple(soq for _, soq in bb._add_binst(binst, in_soqs=in_soqs))
 
-            soq_map.extend(zip(old_out_soqs, new_out_soqs))
+            _update_soq_map(soq_map, zip(old_out_soqs, new_out_soqs))
 
         if not did_work:
             raise DidNotFlattenAnythingError()
@@ -399,6 +421,11 @@ class CompositeBloq(Bloq):
         This will continue flattening the results of subbloq.decompose_bloq() until
         all bloqs which would satisfy `pred` have been flattened.
 
+        The decompositions are inlined depth-first into a single `BloqBuilder`, so each
+        bloq is decomposed at most once and the running time is proportional to the size of
+        the flattened composite bloq (rather than re-building it once per level like
+        repeated calls to `flatten_once`).
+
         Args:
             pred: A predicate that takes a bloq instance and returns True if it should
                 be decomposed and flattened or False if it should remain undecomposed.
@@ -408,18 +435,113 @@ class CompositeBloq(Bloq):
 
         Returns:
             A new composite bloq where all recursive subbloqs matching `pred` have been
-            decomposed and flattened.
+            decomposed and flattened. If nothing was flattened, this composite bloq is returned.
+
+        Raises:
+            ValueError: If bloqs are still being flattened after `max_depth` levels.
         """
-        cbloq = self
-        for _ in range(max_depth):
+        if len(self.bloq_instances) == 0:
+            return self
+
+        bb, initial_soqs = BloqBuilder.from_signature(self.signature)
+        # As in `flatten_once`, bloq instances that are not flattened keep their `binst.i`, and
+        # the bloq instances from decompositions get new, higher values.
+        # pylint: disable=protected-access
+        bb._i = max(binst.i for binst in self.bloq_instances) + 1
+
+        def _add_leaf(
+            binst: BloqInstance, in_soqs: Dict[str, SoquetT], top_level: bool
+        ) -> Tuple[Tuple[SoquetT, ...], None]:
+            if top_level:
+                # Since we took care to not re-use existing `binst.i` values for flattened
+                # bloqs, it is safe to call `bb._add_binst` with the old `binst`.
+                # pylint: disable=protected-access
+                return tuple(soq for _, soq in bb._add_binst(binst, in_soqs=in_soqs)), None
+            return bb.add_t(binst.bloq, **in_soqs), None
+
+        flattener = _iter_flattened(
+            self, initial_soqs, pred=pred, max_depth=max_depth, add_leaf=_add_leaf
+        )
+        while True:
             try:
-                cbloq = cbloq.flatten_once(pred)
-            except DidNotFlattenAnythingError:
+                next(flattener)
+            except StopIteration as stop:
+                fsoqs, did_work = stop.value
                 break
-        else:
-            raise ValueError("Max recursion depth exceeded in `flatten`.")
 
-        return cbloq
+        if not did_work:
+            return self
+        return bb.finalize(**fsoqs)
+
+    def iter_flat_bloqnections(
+        self, pred: Callable[[BloqInstance], bool] = lambda binst: True, max_depth: int = 1_000
+    ) -> Iterator[Tuple[Union[BloqInstance, DanglingT], List[Connection]]]:
+        """Iterate over the bloq instances of the flattened composite bloq, without building it.
+
+        This recursively decomposes subbloqs on the fly, like `flatten`, but yields each
+        of the resulting "leaf" bloq instances (and the connections into it) as soon as it is
+        reached instead of adding it to a new composite bloq. Only the decompositions along
+        the current path and the soquets that have been produced but not yet consumed are kept
+        in memory, so this can be used to visit the bloq instances of circuits whose
+        flattened composite bloq would be too large.
+
+        The bloq instances and connections are the same as those of `self.flatten(pred)`.
+
+        Args:
+            pred: A predicate that takes a bloq instance and returns True if it should
+                be decomposed and flattened or False if it should remain undecomposed.
+                If the bloq does not have a decomposition, it will remain undecomposed.
+                By default, flatten as much as possible.
+            max_depth: To avoid infinite recursion, give up after this many recursive steps.
+
+        Yields:
+            A bloq instance and its predecessor connections. The bloq instances are yielded in
+            a topologically-sorted order. The predecessor connections come from earlier bloq
+            instances or from `LeftDangle`. After all the bloq instances, we yield `RightDangle`
+            with the connections to the outputs of the composite bloq.
+
+        Raises:
+            ValueError: If bloqs are still being flattened after `max_depth` levels.
+        """
+        binst_i = max((binst.i for binst in self.bloq_instances), default=-1) + 1
+
+        def _add_leaf(
+            binst: BloqInstance, in_soqs: Dict[str, SoquetT], top_level: bool
+        ) -> Tuple[Tuple[SoquetT, ...], Tuple[BloqInstance, List[Connection]]]:
+            nonlocal binst_i
+            if not top_level:
+                # Number new bloq instances like `flatten`.
+                binst = BloqInstance(binst.bloq, binst_i)
+                binst_i += 1
+
+            pred_cxns: List[Connection] = []
+
+            def _add(idxed_soq: Soquet, reg: Register, idx: Tuple[int, ...]):
+                pred_cxns.append(Connection(idxed_soq, Soquet(binst, reg, idx)))
+
+            _process_soquets(
+                registers=binst.bloq.signature.lefts(),
+                in_soqs=in_soqs,
+                debug_str=str(binst.bloq),
+                func=_add,
+            )
+            out_soqs = tuple(_reg_to_soq(binst, reg) for reg in binst.bloq.signature.rights())
+            return out_soqs, (binst, pred_cxns)
+
+        initial_soqs = {reg.name: _reg_to_soq(LeftDangle, reg) for reg in self.signature.lefts()}
+        fsoqs, _ = yield from _iter_flattened(
+            self, initial_soqs, pred=pred, max_depth=max_depth, add_leaf=_add_leaf
+        )
+
+        final_cxns: List[Connection] = []
+
+        def _fin(idxed_soq: Soquet, reg: Register, idx: Tuple[int, ...]):
+            final_cxns.append(Connection(idxed_soq, Soquet(RightDangle, reg, idx)))
+
+        _process_soquets(
+            registers=self.signature.rights(), in_soqs=fsoqs, debug_str='Finalizing', func=_fin
+        )
+        yield RightDangle, final_cxns
 
     def adjoint(self) -> 'CompositeBloq':
         """Get a composite bloq which is the adjoint of this composite bloq.
@@ -432,7 +554,7 @@ class CompositeBloq(Bloq):
         return _adjoint_cbloq(self)
 
     @staticmethod
-    def _debug_binst(g: nx.DiGraph, binst: BloqInstance) -> List[str]:
+    def _debug_binst(g: Union[BinstGraph, nx.DiGraph], binst: BloqInstance) -> List[str]:
         """Helper method used in `debug_text`"""
         lines = [f'{binst}']
         pred_cxns, succ_cxns = _binst_to_cxns(binst, binst_graph=g)
@@ -455,9 +577,9 @@ class CompositeBloq(Bloq):
         connections are represented twice: once as the output of a binst and again as the input
         to a subsequent binst.
         """
-        g = self._binst_graph
+        g = self._compact_binst_graph
         gen_texts = []
-        for gen in nx.topological_generations(g):
+        for gen in g.topological_generations():
             gen_lines = []
             for binst in gen:
                 if isinstance(binst, DanglingT):
@@ -498,9 +620,12 @@ def _create_binst_graph(
 
 
 def _binst_to_cxns(
-    binst: Union[BloqInstance, DanglingT], binst_graph: nx.DiGraph
+    binst: Union[BloqInstance, DanglingT], binst_graph: Union[BinstGraph, nx.DiGraph]
 ) -> Tuple[List[Connection], List[Connection]]:
     """Helper method to extract all predecessor and successor Connections for a binst."""
+    if isinstance(binst_graph, BinstGraph):
+        return binst_graph.cxns(binst)
+
     pred_cxns: List[Connection] = []
     for pred in binst_graph.pred[binst]:
         pred_cxns.extend(binst_graph.edges[pred, binst]['cxns'])
@@ -746,7 +871,8 @@ def _process_soquets(
 
 
 def _map_soqs(
-    soqs: Dict[str, SoquetT], soq_map: Iterable[Tuple[SoquetT, SoquetT]]
+    soqs: Dict[str, SoquetT],
+    soq_map: Union[Dict[Soquet, Soquet], Iterable[Tuple[SoquetT, SoquetT]]],
 ) -> Dict[str, SoquetT]:
     """Map `soqs` according to `soq_map`.
 
@@ -756,44 +882,161 @@ def _map_soqs(
     Args:
         soqs: A soquet dictionary mapping register names to Soquets or arrays
             of Soquets. The values of this dictionary will be mapped.
-        soq_map: An iterable of (old_soq, new_soq) tuples that inform how to
-            perform the mapping. Note that this is a list of tuples (not a dictionary)
-            because `old_soq` may be an unhashable numpy array of Soquet.
+        soq_map: A dictionary from old to new individual soquets, which can be maintained
+            with `_update_soq_map`. Soquets that aren't in the dictionary are left as-is.
+            This can also be an iterable of (old_soq, new_soq) tuples where `old_soq` may be
+            an (unhashable) numpy array of Soquet. Such a list is flattened into a
+            dictionary on every call, so prefer the dictionary when mapping repeatedly.
 
     Returns:
         A mapped version of `soqs`.
     """
+    if not isinstance(soq_map, dict):
+        # First: flatten out any numpy arrays
+        flat_soq_map: Dict[Soquet, Soquet] = {}
+        _update_soq_map(flat_soq_map, soq_map)
+        soq_map = flat_soq_map
 
-    # First: flatten out any numpy arrays
-    flat_soq_map: Dict[Soquet, Soquet] = {}
-    for old_soqs, new_soqs in soq_map:
-        if isinstance(old_soqs, Soquet):
-            assert isinstance(new_soqs, Soquet), new_soqs
-            flat_soq_map[old_soqs] = new_soqs
-            continue
+    return _map_flat_soqs(soqs, soq_map)
 
-        assert isinstance(old_soqs, np.ndarray), old_soqs
-        assert isinstance(new_soqs, np.ndarray), new_soqs
-        assert old_soqs.shape == new_soqs.shape, (old_soqs.shape, new_soqs.shape)
-        for o, n in zip(old_soqs.reshape(-1), new_soqs.reshape(-1)):
-            flat_soq_map[o] = n
 
-    # Then use vectorize to use the flat mapping.
-    def _map_soq(soq: Soquet) -> Soquet:
-        # Helper function to map an individual soquet.
-        return flat_soq_map.get(soq, soq)
+def _update_soq_map(
+    soq_map: Dict[Soquet, Soquet], soq_pairs: Iterable[Tuple[SoquetT, SoquetT]]
+) -> None:
+    """Add (old_soq, new_soq) tuples to a dictionary from old to new individual soquets.
+
+    This is the dictionary counterpart of `soq_map.extend(soq_pairs)` for a list of
+    tuples, see `_map_soqs`.
+    """
+    for old_soqs, new_soqs in soq_pairs:
+        _update_flat_soq_map(soq_map, old_soqs, new_soqs)
+
+
+def _update_flat_soq_map(
+    flat_soq_map: Dict[Soquet, Soquet], old_soqs: SoquetT, new_soqs: SoquetT
+) -> None:
+    """Record that `old_soqs` map to `new_soqs`, element-wise for arrays of soquets."""
+    if isinstance(old_soqs, Soquet):
+        assert isinstance(new_soqs, Soquet), new_soqs
+        flat_soq_map[old_soqs] = new_soqs
+        return
 
-    # Use `vectorize` to call `_map_soq` on each element of the array.
-    vmap = np.vectorize(_map_soq, otypes=[object])
+    assert isinstance(old_soqs, np.ndarray), old_soqs
+    assert isinstance(new_soqs, np.ndarray), new_soqs
+    assert old_soqs.shape == new_soqs.shape, (old_soqs.shape, new_soqs.shape)
+    flat_soq_map.update(zip(old_soqs.reshape(-1).tolist(), new_soqs.reshape(-1).tolist()))
+
+
+def _map_flat_soqs(
+    soqs: Dict[str, SoquetT], flat_soq_map: Dict[Soquet, Soquet], consume: bool = False
+) -> Dict[str, SoquetT]:
+    """Map `soqs` according to a dictionary from old to new individual soquets.
+
+    If `consume` is set, the mapped soquets are removed from `flat_soq_map`.
+    """
+    lookup = flat_soq_map.pop if consume else flat_soq_map.get
 
     def _map_soqs(soqs: SoquetT) -> SoquetT:
         if isinstance(soqs, Soquet):
-            return _map_soq(soqs)
-        return vmap(soqs)
+            return lookup(soqs, soqs)
+
+        # Map all the soquets of an array in one pass over a flat list.
+        soqs = np.asarray(soqs)
+        mapped = np.empty(soqs.size, dtype=object)
+        mapped[:] = [lookup(soq, soq) for soq in soqs.reshape(-1).tolist()]
+        return mapped.reshape(soqs.shape)
 
     return {name: _map_soqs(soqs) for name, soqs in soqs.items()}
 
 
+_LeafT = TypeVar('_LeafT')
+
+
+def _iter_flattened(
+    cbloq: CompositeBloq,
+    in_soqs: Mapping[str, SoquetT],
+    pred: Callable[[BloqInstance], bool],
+    max_depth: int,
+    add_leaf: Callable[
+        [BloqInstance, Dict[str, SoquetT], bool], Tuple[Tuple[SoquetT, ...], _LeafT]
+    ],
+) -> Generator[_LeafT, None, Tuple[Dict[str, SoquetT], bool]]:
+    """Recursively inline the decomposition of the subbloqs of `cbloq`.
+
+    This is the implementation of `CompositeBloq.flatten` and
+    `CompositeBloq.iter_flat_bloqnections`. Subbloqs are visited in the order of
+    `cbloq.iter_bloqsoqs()`. When a bloq instance satisfies `pred` and has a decomposition,
+    the decomposition is visited in its place (and recursively flattened) before continuing.
+    Each level of nesting keeps a dictionary from its own soquets to the new soquets of the
+    flattened bloq instances. Since each soquet is used exactly once, entries are removed as
+    they are used. We use an explicit stack instead of recursion so deep decompositions don't
+    hit Python's recursion limit before `max_depth`.
+
+    Args:
+        cbloq: The composite bloq to flatten.
+        in_soqs: The new soquets to connect to the left-dangling soquets of `cbloq`.
+        pred: Only flatten bloq instances which satisfy this predicate.
+        max_depth: Raise an error if a bloq instance is flattened at this depth of nesting.
+        add_leaf: Called as `add_leaf(binst, in_soqs, top_level)` for each bloq instance that
+            is not flattened, in topological order. `in_soqs` are the new soquets connected
+            to its inputs and `top_level` is whether `binst` is a bloq instance of `cbloq`
+            itself. It must return the new output soquets of the bloq instance and a value
+            to yield.
+
+    Yields:
+        The values returned by `add_leaf`.
+
+    Returns:
+        The new soquets corresponding to the right-dangling soquets of `cbloq` and whether
+        any bloq instance was flattened.
+    """
+
+    def _enter(cbloq: CompositeBloq, in_soqs: Mapping[str, SoquetT], out_soqs: Tuple[SoquetT, ...]):
+        flat_soq_map: Dict[Soquet, Soquet] = {}
+        for reg in cbloq.signature.lefts():
+            in_soq = in_soqs[reg.name]
+            if not isinstance(in_soq, Soquet):
+                in_soq = np.asarray(in_soq)
+            _update_flat_soq_map(flat_soq_map, _reg_to_soq(LeftDangle, reg), in_soq)
+        return cbloq, cbloq.iter_bloqsoqs(), flat_soq_map, out_soqs
+
+    # Each frame is a composite bloq being flattened, the iterator over its contents, the
+    # mapping from its soquets to the new ones, and the output soquets of the bloq instance
+    # in the parent frame that it replaces.
+    stack = [_enter(cbloq, in_soqs, ())]
+    did_work = False
+    while True:
+        depth = len(stack) - 1
+        cbloq, bloqsoqs, flat_soq_map, binst_out_soqs = stack[-1]
+        for binst, binst_in_soqs, old_out_soqs in bloqsoqs:
+            binst_in_soqs = _map_flat_soqs(binst_in_soqs, flat_soq_map, consume=True)
+            if pred(binst):
+                try:
+                    sub_cbloq = binst.bloq.decompose_bloq()
+                except (DecomposeTypeError, DecomposeNotImplementedError):
+                    pass
+                else:
+                    if depth + 1 >= max_depth:
+                        raise ValueError("Max recursion depth exceeded in `flatten`.")
+                    did_work = True
+                    stack.append(_enter(sub_cbloq, binst_in_soqs, old_out_soqs))
+                    break
+
+            new_out_soqs, leaf = add_leaf(binst, binst_in_soqs, depth == 0)
+            for old_soqs, new_soqs in zip(old_out_soqs, new_out_soqs):
+                _update_flat_soq_map(flat_soq_map, old_soqs, new_soqs)
+            yield leaf
+        else:
+            # We've visited everything in `cbloq`.
+            stack.pop()
+            fsoqs = _map_flat_soqs(cbloq.final_soqs(), flat_soq_map, consume=True)
+            if not stack:
+                return fsoqs, did_work
+            parent_flat_soq_map = stack[-1][2]
+            for old_soqs, reg in zip(binst_out_soqs, cbloq.signature.rights()):
+                _update_flat_soq_map(parent_flat_soq_map, old_soqs, fsoqs[reg.name])
+
+
 class BloqBuilder:
     """A builder class for constructing a `CompositeBloq`.
 
@@ -951,7 +1194,8 @@ class BloqBuilder:
 
     @staticmethod
     def map_soqs(
-        soqs: Dict[str, SoquetT], soq_map: Iterable[Tuple[SoquetT, SoquetT]]
+        soqs: Dict[str, SoquetT],
+        soq_map: Union[Dict[Soquet, Soquet], Iterable[Tuple[SoquetT, SoquetT]]],
     ) -> Dict[str, SoquetT]:
         """Map `soqs` according to `soq_map`.
 
@@ -960,15 +1204,35 @@ class BloqBuilder:
         Args:
             soqs: A soquet dictionary mapping register names to Soquets or arrays
                 of Soquets. The values of this dictionary will be mapped.
-            soq_map: An iterable of (old_soq, new_soq) tuples that inform how to
-                perform the mapping. Note that this is a list of tuples (not a dictionary)
-                because `old_soq` may be an unhashable numpy array of Soquet.
+            soq_map: A dictionary from old to new individual soquets, which can be maintained
+                with `BloqBuilder.update_soq_map`. This can also be an iterable of
+                (old_soq, new_soq) tuples where `old_soq` may be an (unhashable) numpy array of
+                Soquet. Such a list is flattened into a dictionary on every call, so prefer
+                the dictionary when mapping repeatedly.
 
         Returns:
             A mapped version of `soqs`.
         """
         return _map_soqs(soqs=soqs, soq_map=soq_map)
 
+    @staticmethod
+    def update_soq_map(
+        soq_map: Dict[Soquet, Soquet], soq_pairs: Iterable[Tuple[SoquetT, SoquetT]]
+    ) -> None:
+        """Add (old_soq, new_soq) tuples to a dictionary for `map_soqs`.
+
+        Arrays of soquets are added element-wise, so `soq_map` maps individual soquets
+        and each lookup in `map_soqs` takes constant time.
+
+        See `CompositeBloq.iter_bloqsoqs` for example code.
+
+        Args:
+            soq_map: The dictionary from old to new individual soquets to update.
+            soq_pairs: An iterable of (old_soq, new_soq) tuples. Each `old_soq` and `new_soq`
+                is a Soquet or an array of Soquets with the same shape.
+        """
+        _update_soq_map(soq_map, soq_pairs)
+
     def _new_binst_i(self) -> int:
         i = self._i
         self._i += 1
@@ -1146,15 +1410,19 @@ class BloqBuilder:
                 in_soqs[k] = np.asarray(v)
 
         # Initial mapping of LeftDangle according to user-provided in_soqs.
-        soq_map: List[Tuple[SoquetT, SoquetT]] = [
-            (_reg_to_soq(LeftDangle, reg), cast(SoquetT, in_soqs[reg.name]))
-            for reg in cbloq.signature.lefts()
-        ]
+        soq_map: Dict[Soquet, Soquet] = {}
+        _update_soq_map(
+            soq_map,
+            (
+                (_reg_to_soq(LeftDangle, reg), cast(SoquetT, in_soqs[reg.name]))
+                for reg in cbloq.signature.lefts()
+            ),
+        )
 
         for binst, in_soqs, old_out_soqs in cbloq.iter_bloqsoqs():
             in_soqs = _map_soqs(in_soqs, soq_map)
             new_out_soqs = self.add_t(binst.bloq, **in_soqs)
-            soq_map.extend(zip(old_out_soqs, new_out_soqs))
+            _update_soq_map(soq_map, zip(old_out_soqs, new_out_soqs))
 
         fsoqs = _map_soqs(cbloq.final_soqs(), soq_map)
         return tuple(fsoqs[reg.name] for reg in cbloq.signature.rights())
@@ -39,12 +39,20 @@ from qualtran import (
     Soquet,
     SoquetT,
 )
-from qualtran._infra.composite_bloq import _create_binst_graph, _get_dangling_soquets
+from qualtran._infra.composite_bloq import (
+    _create_binst_graph,
+    _get_dangling_soquets,
+    DidNotFlattenAnythingError,
+)
 from qualtran._infra.data_types import BQUInt, QAny, QBit, QFxp, QUInt
 from qualtran.bloqs.basic_gates import CNOT, IntEffect, ZeroEffect
 from qualtran.bloqs.bookkeeping import Join
 from qualtran.bloqs.for_testing.atom import TestAtom, TestTwoBitOp
-from qualtran.bloqs.for_testing.many_registers import TestMultiTypedRegister, TestQFxp
+from qualtran.bloqs.for_testing.many_registers import (
+    TestMultiRegister,
+    TestMultiTypedRegister,
+    TestQFxp,
+)
 from qualtran.bloqs.for_testing.with_decomposition import TestParallelCombo, TestSerialCombo
 from qualtran.symbolics import SymbolicInt
 
@@ -163,6 +171,33 @@ def test_map_soqs():
     assert isinstance(cbloq, CompositeBloq)
 
 
+def test_map_soqs_dict():
+    cbloq = TestMultiRegister().decompose_bloq()
+    bb, _ = BloqBuilder.from_signature(cbloq.signature)
+    bb._i = 100  # pylint: disable=protected-access
+
+    soq_list: List[Tuple[SoquetT, SoquetT]] = []
+    soq_map: Dict[Soquet, Soquet] = {}
+    for binst, in_soqs, old_out_soqs in cbloq.iter_bloqsoqs():
+        mapped = bb.map_soqs(in_soqs, soq_map)
+        for name, soqs in bb.map_soqs(in_soqs, soq_list).items():
+            assert np.array_equal(mapped[name], soqs)
+            assert np.shape(mapped[name]) == np.shape(in_soqs[name])
+
+        new_out_soqs = bb.add_t(binst.bloq, **mapped)
+        soq_list.extend(zip(old_out_soqs, new_out_soqs))
+        bb.update_soq_map(soq_map, zip(old_out_soqs, new_out_soqs))
+
+    # Arrays of soquets are stored element-wise.
+    assert all(isinstance(soq, Soquet) for soq in soq_map)
+    assert len(soq_map) == sum(np.size(soqs) for soqs, _ in soq_list)
+
+    fsoqs = bb.map_soqs(cbloq.final_soqs(), soq_map)
+    assert fsoqs['yy'].shape == (2, 2)
+    assert all(soq.binst.i >= 100 for soq in fsoqs['yy'].reshape(-1))
+    assert bb.finalize(**fsoqs).bloq_instances.isdisjoint(cbloq.bloq_instances)
+
+
 def test_to_from_cirq_circuit():
     cirq = pytest.importorskip('cirq')
     cbloq_auto = TestTwoCNOT().decompose_bloq()
@@ -519,6 +554,94 @@ def test_flatten():
     assert len(cbloq5.bloq_instances) == 5 * 2
 
 
+def _flatten_with_flatten_once(cbloq: CompositeBloq, pred) -> CompositeBloq:
+    while True:
+        try:
+            cbloq = cbloq.flatten_once(pred)
+        except DidNotFlattenAnythingError:
+            return cbloq
+
+
+def _make_nested_cbloq() -> CompositeBloq:
+    bb = BloqBuilder()
+    stuff = bb.add_register('stuff', 3)
+    stuff = bb.add(TestParallelCombo(), reg=stuff)
+    xx, yy, zz = bb.add(
+        TestMultiRegister(),
+        xx=bb.add_register('xx', 1),
+        yy=bb.add_register(Register('yy', QAny(2), shape=(2, 2))),
+        zz=stuff,
+    )
+    xx = bb.add(TestSerialCombo(), reg=xx)
+    return bb.finalize(stuff=zz, xx=xx, yy=yy)
+
+
+@pytest.mark.parametrize(
+    'pred',
+    [lambda binst: True, lambda binst: not binst.bloq_is(TestMultiRegister), lambda binst: False],
+)
+def test_flatten_matches_flatten_once(pred):
+    cbloq = _make_nested_cbloq()
+    flat = cbloq.flatten(pred)
+    flat_ref = _flatten_with_flatten_once(cbloq, pred)
+
+    assert flat.signature == cbloq.signature
+    assert sorted(str(binst.bloq) for binst in flat.bloq_instances) == sorted(
+        str(binst.bloq) for binst in flat_ref.bloq_instances
+    )
+    assert len(flat.connections) == len(flat_ref.connections)
+    assert nx.is_isomorphic(flat._binst_graph, flat_ref._binst_graph)
+    if flat_ref is cbloq:
+        assert flat is cbloq
+
+    # Bloq instances that weren't flattened keep their index.
+    kept = cbloq.bloq_instances & flat.bloq_instances
+    assert len({binst.i for binst in flat.bloq_instances}) == len(flat.bloq_instances)
+    assert kept == {binst for binst in cbloq.bloq_instances if not pred(binst)}
+
+
+def test_flatten_max_depth():
+    bb = BloqBuilder()
+    reg = bb.add(TestSerialCombo(), reg=bb.add_register('reg', 1))
+    cbloq = bb.finalize(reg=reg)
+    assert len(cbloq.flatten(max_depth=2).bloq_instances) == 3
+    with pytest.raises(ValueError, match=r'Max recursion depth'):
+        cbloq.flatten(max_depth=1)
+
+
+@pytest.mark.parametrize(
+    'pred',
+    [lambda binst: True, lambda binst: not binst.bloq_is(TestMultiRegister), lambda binst: False],
+)
+def test_iter_flat_bloqnections(pred):
+    cbloq = _make_nested_cbloq()
+    flat = cbloq.flatten(pred)
+    bloqnections = list(cbloq.iter_flat_bloqnections(pred))
+
+    binst, final_cxns = bloqnections.pop()
+    assert binst is RightDangle
+    assert {binst for binst, _ in bloqnections} == flat.bloq_instances
+    cxns = [cxn for _, pred_cxns in bloqnections for cxn in pred_cxns] + final_cxns
+    assert sorted(map(str, cxns)) == sorted(map(str, flat.connections))
+    assert CompositeBloq(cxns, signature=cbloq.signature).bloq_instances == flat.bloq_instances
+
+    # Topologically sorted.
+    seen = {LeftDangle}
+    for binst, pred_cxns in bloqnections:
+        assert all(cxn.right.binst == binst for cxn in pred_cxns)
+        assert all(cxn.left.binst in seen for cxn in pred_cxns)
+        seen.add(binst)
+
+
+def test_iter_flat_bloqnections_max_depth():
+    bb = BloqBuilder()
+    reg = bb.add(TestSerialCombo(), reg=bb.add_register('reg', 1))
+    cbloq = bb.finalize(reg=reg)
+    assert len(list(cbloq.iter_flat_bloqnections(max_depth=2))) == 3 + 1
+    with pytest.raises(ValueError, match=r'Max recursion depth'):
+        list(cbloq.iter_flat_bloqnections(max_depth=1))
+
+
 def test_type_error():
     bb = BloqBuilder()
     a = bb.add_register_from_dtype('i', BQUInt(4, 3))
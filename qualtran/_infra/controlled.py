@@ -43,7 +43,7 @@ if TYPE_CHECKING:
     import cirq
     import quimb.tensor as qtn
 
-    from qualtran import Bloq, BloqBuilder, CompositeBloq, ConnectionT, SoquetT
+    from qualtran import Bloq, BloqBuilder, CompositeBloq, ConnectionT, Soquet, SoquetT
     from qualtran.cirq_interop import CirqQuregT
     from qualtran.drawing import WireSymbol
     from qualtran.resource_counting import BloqCountDictT, SympySymbolAllocator
@@ -638,14 +638,14 @@ class Controlled(_ControlledBase):
 
         ctrl_soqs: List['SoquetT'] = [initial_soqs[creg_name] for creg_name in self.ctrl_reg_names]
 
-        soq_map: List[Tuple[SoquetT, SoquetT]] = []
+        soq_map: Dict[Soquet, Soquet] = {}
         for binst, in_soqs, old_out_soqs in cbloq.iter_bloqsoqs():
             in_soqs = bb.map_soqs(in_soqs, soq_map)
             new_bloq, adder = binst.bloq.get_ctrl_system(self.ctrl_spec)
             adder_output = adder(bb, ctrl_soqs=ctrl_soqs, in_soqs=in_soqs)
             ctrl_soqs = list(adder_output[0])
             new_out_soqs = adder_output[1]
-            soq_map.extend(zip(old_out_soqs, new_out_soqs))
+            bb.update_soq_map(soq_map, zip(old_out_soqs, new_out_soqs))
 
         fsoqs = bb.map_soqs(cbloq.final_soqs(), soq_map)
         fsoqs |= dict(zip(self.ctrl_reg_names, ctrl_soqs))
@@ -0,0 +1,253 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Memoization of bloq decompositions and call graph callees."""
+import contextlib
+import contextvars
+import threading
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+    TYPE_CHECKING,
+    TypeVar,
+    Union,
+)
+
+import attrs
+
+if TYPE_CHECKING:
+    from qualtran import Bloq, CompositeBloq
+    from qualtran.resource_counting import BloqCountDictT, BloqCountT
+
+_T = TypeVar('_T')
+
+
+@attrs.frozen
+class DecompositionCacheInfo:
+    """Statistics for one of the tables of a `DecompositionCache`.
+
+    Args:
+        hits: The number of lookups that were served from the cache.
+        misses: The number of lookups that had to be computed.
+        evictions: The number of entries evicted to respect the size limits.
+        n_entries: The current number of entries.
+        total_size: The current sum of the estimated sizes of the entries.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    n_entries: int
+    total_size: int
+
+
+class _LRUTable(Generic[_T]):
+    """A thread-safe, size-bounded least-recently-used memo table keyed by bloq."""
+
+    def __init__(
+        self, maxsize: Optional[int], max_total_size: Optional[int], size_of: Callable[[_T], int]
+    ):
+        self.maxsize = maxsize
+        self.max_total_size = max_total_size
+        self._size_of = size_of
+        self._data: 'OrderedDict[Bloq, Tuple[_T, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, bloq: 'Bloq', compute: Callable[[], _T]) -> _T:
+        try:
+            with self._lock:
+                val, _ = self._data[bloq]
+                self._data.move_to_end(bloq)
+                self.hits += 1
+                return val
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable bloq.
+            with self._lock:
+                self.misses += 1
+            return compute()
+
+        # Note: we don't hold the lock while computing, which may recursively use this table.
+        val = compute()
+        size = self._size_of(val)
+        with self._lock:
+            self.misses += 1
+            if bloq not in self._data:
+                self._data[bloq] = (val, size)
+                self._total_size += size
+            self._evict()
+        return val
+
+    def _evict(self) -> None:
+        while self._data and (
+            (self.maxsize is not None and len(self._data) > self.maxsize)
+            or (self.max_total_size is not None and self._total_size > self.max_total_size)
+        ):
+            _, (_, size) = self._data.popitem(last=False)
+            self._total_size -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._total_size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self) -> DecompositionCacheInfo:
+        with self._lock:
+            return DecompositionCacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                n_entries=len(self._data),
+                total_size=self._total_size,
+            )
+
+
+def _n_callees(callees: Union['BloqCountDictT', Set['BloqCountT']]) -> int:
+    return len(callees)
+
+
+def _n_connections(cbloq: 'CompositeBloq') -> int:
+    return len(cbloq.connections)
+
+
+class DecompositionCache:
+    """A memo table of bloq decompositions and (raw) callee counts.
+
+    Bloqs are immutable, so their decomposition and their `build_call_graph` result can be
+    re-used every time they are requested. By default, a process-wide instance of this class
+    (see `get_decomposition_cache`) is used by the default `Bloq.decompose_bloq` implementation
+    and by `get_bloq_callee_counts`. This avoids re-decomposing the same bloqs in e.g. cost
+    computations, `flatten`, tensor contraction, and classical simulation.
+
+    Each of the two tables (decompositions and callees) is bounded and evicts its
+    least-recently-used entries first. Errors raised while decomposing are not cached, and
+    unhashable bloqs are never cached.
+
+    Args:
+        maxsize: The maximum number of entries in each table, or `None` for no limit.
+        max_total_size: The maximum total estimated size of the entries in each table, or
+            `None` for no limit. The size of a decomposition is its number of connections. The
+            size of a callee dictionary is its number of callees.
+    """
+
+    def __init__(self, maxsize: Optional[int] = 1024, max_total_size: Optional[int] = 1_000_000):
+        self._decompositions: _LRUTable['CompositeBloq'] = _LRUTable(
+            maxsize, max_total_size, _n_connections
+        )
+        self._callees: _LRUTable[Union['BloqCountDictT', Set['BloqCountT']]] = _LRUTable(
+            maxsize, max_total_size, _n_callees
+        )
+
+    def decompose_bloq(
+        self, bloq: 'Bloq', decompose: Callable[[], 'CompositeBloq']
+    ) -> 'CompositeBloq':
+        """Return the decomposition of `bloq`, calling `decompose()` if it isn't cached."""
+        return self._decompositions.get(bloq, decompose)
+
+    def build_call_graph(
+        self, bloq: 'Bloq', build: Callable[[], Union['BloqCountDictT', Set['BloqCountT']]]
+    ) -> Union['BloqCountDictT', Set['BloqCountT']]:
+        """Return the callees of `bloq`, calling `build()` if they aren't cached."""
+        return self._callees.get(bloq, build)
+
+    def cache_info(self) -> Dict[str, DecompositionCacheInfo]:
+        """Hit/miss statistics for the 'decompose_bloq' and 'build_call_graph' tables."""
+        return {
+            'decompose_bloq': self._decompositions.info(),
+            'build_call_graph': self._callees.info(),
+        }
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        self._decompositions.clear()
+        self._callees.clear()
+
+
+_PROCESS_CACHE = DecompositionCache()
+# The active cache is tracked per thread (and per asyncio task) so that enabling or
+# disabling memoization in one thread does not affect computations in others.
+_ACTIVE_CACHE: contextvars.ContextVar[Optional[DecompositionCache]] = contextvars.ContextVar(
+    '_ACTIVE_CACHE', default=_PROCESS_CACHE
+)
+
+
+def get_decomposition_cache() -> DecompositionCache:
+    """The process-wide `DecompositionCache`.
+
+    Use this to inspect its statistics with `cache_info()` or to `clear()` it.
+    """
+    return _PROCESS_CACHE
+
+
+def get_active_decomposition_cache() -> Optional[DecompositionCache]:
+    """The `DecompositionCache` in use, or `None` if decompositions are not being memoized."""
+    return _ACTIVE_CACHE.get()
+
+
+@contextlib.contextmanager
+def _set_active_cache(cache: Optional[DecompositionCache]) -> Iterator[Any]:
+    token = _ACTIVE_CACHE.set(cache)
+    try:
+        yield cache
+    finally:
+        _ACTIVE_CACHE.reset(token)
+
+
+@contextlib.contextmanager
+def disable_decomposition_cache() -> Iterator[None]:
+    """Do not memoize decompositions and callees within this context.
+
+    This can be useful for benchmarking, or when a bloq's decomposition is not a pure
+    function of its attributes.
+    """
+    with _set_active_cache(None):
+        yield
+
+
+@contextlib.contextmanager
+def memoize_decompositions() -> Iterator[DecompositionCache]:
+    """Memoize bloq decompositions and callee counts within this context.
+
+    While a cache is active, `Bloq.decompose_bloq()` (for bloqs that use the default
+    `build_composite_bloq`-based implementation) and `get_bloq_callee_counts` will only
+    compute the decomposition or callees of each bloq once. If a cache is already active
+    (as it is by default), it is re-used. Otherwise, e.g. within `disable_decomposition_cache`,
+    a temporary, unbounded cache is used for the duration of this context.
+
+    Yields:
+        The active `DecompositionCache`.
+    """
+    active_cache = _ACTIVE_CACHE.get()
+    if active_cache is not None:
+        yield active_cache
+        return
+
+    with _set_active_cache(DecompositionCache(maxsize=None, max_total_size=None)) as cache:
+        yield cache
@@ -0,0 +1,99 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import threading
+
+import pytest
+
+from qualtran import (
+    DecompositionCache,
+    disable_decomposition_cache,
+    get_decomposition_cache,
+    memoize_decompositions,
+)
+from qualtran._infra.decomposition_cache import get_active_decomposition_cache
+from qualtran.bloqs.basic_gates import CNOT
+from qualtran.bloqs.for_testing.with_decomposition import TestCNOTDecomp
+from qualtran.resource_counting import get_bloq_callee_counts
+
+
+def test_process_wide_cache(decomposed_bloqs):
+    bloq = TestCNOTDecomp()
+    cache = get_decomposition_cache()
+    cache.clear()
+
+    assert get_active_decomposition_cache() is cache
+    cbloq = bloq.decompose_bloq()
+    assert bloq.decompose_bloq() is cbloq
+    assert get_bloq_callee_counts(bloq) == [(CNOT(), 1)]
+    assert get_bloq_callee_counts(bloq) == [(CNOT(), 1)]
+    assert len(decomposed_bloqs) == 1
+
+    info = cache.cache_info()
+    assert info['decompose_bloq'].hits == 2
+    assert info['decompose_bloq'].misses == 1
+    assert info['decompose_bloq'].n_entries == 1
+    assert info['decompose_bloq'].total_size == len(cbloq.connections)
+    assert info['build_call_graph'].hits == 1
+    assert info['build_call_graph'].misses == 1
+
+    with disable_decomposition_cache():
+        assert get_active_decomposition_cache() is None
+        assert bloq.decompose_bloq() is not cbloq
+        assert len(decomposed_bloqs) == 2
+
+        with memoize_decompositions() as scoped_cache:
+            assert scoped_cache is not cache
+            cbloq2 = bloq.decompose_bloq()
+            assert bloq.decompose_bloq() is cbloq2
+        assert get_active_decomposition_cache() is None
+
+    with memoize_decompositions() as scoped_cache:
+        assert scoped_cache is cache
+    assert len(decomposed_bloqs) == 3
+
+
+def test_active_cache_is_per_thread():
+    active_in_thread = []
+
+    def run():
+        active_in_thread.append(get_active_decomposition_cache())
+
+    with disable_decomposition_cache():
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        assert get_active_decomposition_cache() is None
+    assert active_in_thread == [get_decomposition_cache()]
+
+
+def test_lru_eviction():
+    cache = DecompositionCache(maxsize=2, max_total_size=None)
+    cbloqs = {}
+    for tag in [0, 1, 0, 2, 1]:
+        bloq = TestCNOTDecomp(tag=tag)
+        cbloqs[tag] = cache.decompose_bloq(bloq, bloq.decompose_bloq)
+    info = cache.cache_info()['decompose_bloq']
+    assert info.n_entries == 2
+    # tag=1 was evicted when tag=2 was added, since tag=0 had been used more recently.
+    assert (info.hits, info.misses, info.evictions) == (1, 4, 2)
+
+    cache = DecompositionCache(maxsize=None, max_total_size=2 * len(cbloqs[0].connections))
+    for tag in range(3):
+        bloq = TestCNOTDecomp(tag=tag)
+        cache.decompose_bloq(bloq, bloq.decompose_bloq)
+    info = cache.cache_info()['decompose_bloq']
+    assert (info.n_entries, info.evictions) == (2, 1)
+
+    cache.clear()
+    assert cache.cache_info()['decompose_bloq'].n_entries == 0
@@ -11,12 +11,18 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
-from typing import Any, Sequence, Tuple
+from typing import Any, Callable, List, Sequence, Tuple
 
 from attrs import field, frozen
 
 from qualtran import Bloq, Signature
-from qualtran.resource_counting import BloqCountDictT, BloqCountT, CostKey, SympySymbolAllocator
+from qualtran.resource_counting import (
+    BloqCountDictT,
+    BloqCountT,
+    CostKey,
+    get_bloq_callee_counts,
+    SympySymbolAllocator,
+)
 
 
 def _convert_callees(callees: Sequence[BloqCountT]) -> Tuple[BloqCountT, ...]:
@@ -56,6 +62,34 @@ class CostingBloq(Bloq):
         return self.name
 
 
+class TestCostKey(CostKey[int]):
+    """A cost key that counts the number of bloqs in the call graph (with multiplicity).
+
+    For testing, it keeps a log (`_log`) of all the bloqs for which `compute` was called.
+    """
+
+    def __init__(self):
+        self._log: List[Bloq] = []
+
+    def compute(self, bloq: 'Bloq', get_callee_cost: Callable[['Bloq'], int]) -> int:
+        self._log.append(bloq)
+
+        total = 1
+        for callee, n_times_called in get_bloq_callee_counts(bloq):
+            total += n_times_called * get_callee_cost(callee)
+
+        return total
+
+    def zero(self) -> int:
+        return 0
+
+    def __hash__(self):
+        return hash(self.__class__)
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__)
+
+
 def make_example_costing_bloqs():
     from qualtran.bloqs.basic_gates import Hadamard, TGate, Toffoli
 
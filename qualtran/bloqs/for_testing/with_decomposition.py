@@ -18,6 +18,7 @@ from typing import Dict, TYPE_CHECKING
 from attrs import frozen
 
 from qualtran import Bloq, BloqBuilder, Signature, Soquet
+from qualtran.bloqs.basic_gates import CNOT
 from qualtran.bloqs.for_testing.atom import TestAtom
 
 if TYPE_CHECKING:
@@ -70,3 +71,24 @@ class TestIndependentParallelCombo(Bloq):
             bb.free(reg)
 
         return {}
+
+
+@frozen
+class TestCNOTDecomp(Bloq):
+    """Decomposes into a single CNOT.
+
+    Args:
+        tag: An arbitrary tag to create distinct (but equivalent) bloqs.
+    """
+
+    tag: int = 0
+
+    @cached_property
+    def signature(self) -> Signature:
+        return Signature.build(a=1, b=1)
+
+    def build_composite_bloq(
+        self, bb: 'BloqBuilder', a: 'Soquet', b: 'Soquet'
+    ) -> Dict[str, 'SoquetT']:
+        a, b = bb.add(CNOT(), ctrl=a, target=b)
+        return {'a': a, 'b': b}
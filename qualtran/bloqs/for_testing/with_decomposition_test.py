@@ -14,6 +14,7 @@
 
 import qualtran.testing as qlt_testing
 from qualtran.bloqs.for_testing.with_decomposition import (
+    TestCNOTDecomp,
     TestIndependentParallelCombo,
     TestParallelCombo,
     TestSerialCombo,
@@ -30,3 +31,7 @@ def test_test_parallel_combo():
 
 def test_test_indep_parallel_combo():
     qlt_testing.assert_valid_bloq_decomposition(TestIndependentParallelCombo())
+
+
+def test_test_cnot_decomp():
+    qlt_testing.assert_valid_bloq_decomposition(TestCNOTDecomp())
@@ -24,10 +24,12 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+from typing import List
+
 import pytest
 
 import qualtran.testing as qlt_testing
-from qualtran import BloqExample
+from qualtran import Bloq, BloqExample
 
 
 def assert_bloq_example_make_for_pytest(bloq_ex: BloqExample):
@@ -194,3 +196,19 @@ def bloq_autotester(request):
     name, func = request.param
     func.check_name = name
     return func
+
+
+@pytest.fixture
+def decomposed_bloqs(monkeypatch) -> List[Bloq]:
+    """The bloqs on which `TestCNOTDecomp.build_composite_bloq` is called during a test."""
+    from qualtran.bloqs.for_testing.with_decomposition import TestCNOTDecomp
+
+    decomposed: List[Bloq] = []
+    build_composite_bloq = TestCNOTDecomp.build_composite_bloq
+
+    def spy(self, bb, **soqs):
+        decomposed.append(self)
+        return build_composite_bloq(self, bb, **soqs)
+
+    monkeypatch.setattr(TestCNOTDecomp, 'build_composite_bloq', spy)
+    return decomposed
@@ -41,7 +41,7 @@ class ClassicalSimGraphDrawer(PrettyGraphDrawer):
         from qualtran.simulation.classical_sim import call_cbloq_classically
 
         _, soq_assign = call_cbloq_classically(
-            self._cbloq.signature, vals, self._cbloq._binst_graph
+            self._cbloq.signature, vals, self._cbloq._compact_binst_graph
         )
         self._soq_assign = soq_assign
 
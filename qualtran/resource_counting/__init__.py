@@ -25,14 +25,50 @@ from ._call_graph import (
     SympySymbolAllocator,
     get_bloq_callee_counts,
     get_bloq_call_graph,
+    iter_call_graph,
     build_cbloq_call_graph,
     format_call_graph_debug_text,
 )
 
-from ._costing import GeneralizerT, get_cost_value, get_cost_cache, query_costs, CostKey, CostValT
+from ._call_graph_session import CallGraphSession
+
+from ._compact_call_graph import CompactCallGraph, get_compact_call_graph
+
+from ._costing import (
+    GeneralizerT,
+    get_cost_value,
+    get_cost_values,
+    get_cost_cache,
+    query_costs,
+    CostKey,
+    CostValT,
+)
+
+from ._cost_diff import CostDiff, diff_costs
+
+from ._arrow_export import call_graph_to_arrow, write_call_graph
+
+from ._profiling import BloqClassProfile, CostProfile, profile_costs
+
+from ._persistent_cache import (
+    PersistentCostsCache,
+    SqliteCostsCache,
+    UnfingerprintableError,
+    bloq_fingerprint,
+)
 
 from ._success_prob import SuccessProb
 from ._qubit_counts import QubitCount
-from ._bloq_counts import BloqCount, QECGatesCost, GateCounts
+from ._bloq_counts import (
+    BloqCount,
+    QECGatesCost,
+    GateCounts,
+    override_qec_gates_rule,
+    register_qec_gates_rule,
+    unregister_qec_gates_rule,
+)
+from ._depth import Depth
+
+from ._sweep import CostsEvaluator, lambdify_costs
 
 from . import generalizers
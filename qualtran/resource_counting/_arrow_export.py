@@ -0,0 +1,226 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Export call graphs and costs to Apache Arrow tables and Parquet files."""
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+    Union,
+)
+
+import attrs
+import networkx as nx
+import numpy as np
+import sympy
+
+from qualtran._infra.decomposition_cache import memoize_decompositions
+
+from ._bloq_counts import GateCounts
+from ._compact_call_graph import CompactCallGraph
+from ._costing import CostKey, get_cost_value
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+    from qualtran import Bloq
+
+    from ._generalization import GeneralizerT
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Exporting call graphs requires the optional dependency `pyarrow`. "
+            "Install it with `pip install pyarrow`."
+        ) from e
+    return pyarrow
+
+
+def _to_arrow_array(values: Sequence[Any]) -> 'pa.Array':
+    """Convert a column of (possibly symbolic) values to an arrow array.
+
+    Integers become an int64 column and other real numbers a float64 column. If any value is
+    symbolic (or otherwise not a number), the whole column is stored as strings that can be
+    parsed back with `sympy.parse_expr`. `None` values are stored as nulls.
+    """
+    pa = _import_pyarrow()
+
+    def _as_number(v):
+        if isinstance(v, sympy.Basic) and v.is_Number:
+            return int(v) if v.is_Integer else float(v)
+        if isinstance(v, np.generic):
+            return v.item()
+        return v
+
+    values = [_as_number(v) for v in values]
+    present = [v for v in values if v is not None]
+    if all(isinstance(v, bool) for v in present):
+        return pa.array(values, type=pa.bool_())
+    if all(isinstance(v, int) and -(2**63) <= v < 2**63 for v in present):
+        return pa.array(values, type=pa.int64())
+    if all(isinstance(v, (int, float)) for v in present):
+        return pa.array([None if v is None else float(v) for v in values], type=pa.float64())
+    return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def _cost_columns(name: str, values: Sequence[Any]) -> Dict[str, 'pa.Array']:
+    """The column(s) for the cost values of one cost key.
+
+    `GateCounts` are flattened into one column per gate type, named `'{name}.{gate type}'`.
+    """
+    if values and all(isinstance(v, GateCounts) for v in values):
+        return {
+            f'{name}.{attr.name}': _to_arrow_array([getattr(v, attr.name) for v in values])
+            for attr in attrs.fields(GateCounts)
+        }
+    return {name: _to_arrow_array(values)}
+
+
+def _as_compact(call_graph: Union[CompactCallGraph, nx.DiGraph]) -> CompactCallGraph:
+    if isinstance(call_graph, CompactCallGraph):
+        return call_graph
+    roots = [bloq for bloq in call_graph.nodes if call_graph.in_degree(bloq) == 0]
+    return CompactCallGraph.from_networkx(call_graph, roots=roots)
+
+
+def call_graph_to_arrow(
+    call_graph: Union[CompactCallGraph, nx.DiGraph],
+    cost_keys: Iterable[CostKey] = (),
+    costs_caches: Optional[Mapping[CostKey, MutableMapping['Bloq', Any]]] = None,
+    generalizer: Optional[Union['GeneralizerT', Sequence['GeneralizerT']]] = None,
+) -> Tuple['pa.Table', 'pa.Table']:
+    """Convert a call graph, and the costs of each of its bloqs, to Apache Arrow tables.
+
+    The node table has one row per bloq with columns:
+     - 'id': The node id of the bloq, i.e. its row number.
+     - 'bloq': The string representation of the bloq.
+     - 'bloq_class': The fully-qualified class name of the bloq.
+     - 'root': Whether the call graph was built from this bloq. For a `networkx.DiGraph`, these
+       are the bloqs without callers.
+     - One column per cost key, named `str(cost_key)`, with the cost of each bloq. `GateCounts`
+       values are split into one column per gate type named `'{str(cost_key)}.{gate type}'`.
+
+    The edge table has one row per call with columns 'caller', 'callee' (the node ids of the
+    bloqs), and 'n' (the number of times the caller calls the callee).
+
+    Numeric values are stored as int64 or float64 columns. A column containing symbolic
+    values is stored as strings which can be parsed with `sympy.parse_expr`.
+
+    This requires the optional dependency `pyarrow`.
+
+    Args:
+        call_graph: The call graph, from `get_compact_call_graph` or `get_bloq_call_graph`.
+        cost_keys: The costs to compute for each bloq in the call graph.
+        costs_caches: If provided, a cache of cost values to use (and mutate) for each cost key.
+            Cost keys missing from this mapping get a new, empty cache.
+        generalizer: If provided, the generalizer the call graph was built with. It is used
+            when computing costs so the callees of each bloq match the call graph.
+
+    Returns:
+        The node table and the edge table.
+    """
+    pa = _import_pyarrow()
+    cg = _as_compact(call_graph)
+
+    roots = np.zeros(cg.n_nodes, dtype=bool)
+    roots[list(cg.roots)] = True
+    nodes: Dict[str, Any] = {
+        'id': pa.array(np.arange(cg.n_nodes, dtype=np.int64)),
+        'bloq': pa.array([str(bloq) for bloq in cg.bloqs], type=pa.string()),
+        'bloq_class': pa.array(
+            [f'{type(bloq).__module__}.{type(bloq).__qualname__}' for bloq in cg.bloqs],
+            type=pa.string(),
+        ),
+        'root': pa.array(roots),
+    }
+
+    with memoize_decompositions():
+        for cost_key in cost_keys:
+            name = str(cost_key)
+            costs_cache: MutableMapping['Bloq', Any] = {}
+            if costs_caches is not None and cost_key in costs_caches:
+                costs_cache = costs_caches[cost_key]
+            values: List[Any] = [
+                get_cost_value(bloq, cost_key, costs_cache=costs_cache, generalizer=generalizer)
+                for bloq in cg.bloqs
+            ]
+            columns = _cost_columns(name, values)
+            if any(col in nodes for col in columns):
+                raise ValueError(f"Duplicate column name for cost key {name!r}.")
+            nodes.update(columns)
+
+    callers = np.repeat(np.arange(cg.n_nodes, dtype=np.int64), np.diff(cg.indptr))
+    if cg.counts.dtype == object:
+        counts = _to_arrow_array(cg.counts.tolist())
+    else:
+        counts = pa.array(cg.counts.astype(np.int64, copy=False))
+    edges = {
+        'caller': pa.array(callers),
+        'callee': pa.array(cg.indices.astype(np.int64, copy=False)),
+        'n': counts,
+    }
+    return pa.table(nodes), pa.table(edges)
+
+
+def write_call_graph(
+    call_graph: Union[CompactCallGraph, nx.DiGraph],
+    nodes_path: str,
+    edges_path: str,
+    cost_keys: Iterable[CostKey] = (),
+    costs_caches: Optional[Mapping[CostKey, MutableMapping['Bloq', Any]]] = None,
+    generalizer: Optional[Union['GeneralizerT', Sequence['GeneralizerT']]] = None,
+    file_format: str = 'parquet',
+) -> None:
+    """Write a call graph, and the costs of each of its bloqs, to files.
+
+    The node table is written to `nodes_path` and the edge table to `edges_path`. See
+    `call_graph_to_arrow` for the contents of the tables.
+
+    This requires the optional dependency `pyarrow`.
+
+    Args:
+        call_graph: The call graph, from `get_compact_call_graph` or `get_bloq_call_graph`.
+        nodes_path: The file to write the node table to.
+        edges_path: The file to write the edge table to.
+        cost_keys: The costs to compute for each bloq in the call graph.
+        costs_caches: If provided, a cache of cost values to use (and mutate) for each cost key.
+        generalizer: If provided, the generalizer the call graph was built with.
+        file_format: 'parquet' to write compressed Parquet files or 'arrow' to write
+            uncompressed Arrow IPC (Feather) files, which can be memory-mapped.
+    """
+    if file_format not in ('parquet', 'arrow'):
+        raise ValueError(f"Unknown file format {file_format!r}. Use 'parquet' or 'arrow'.")
+    nodes, edges = call_graph_to_arrow(
+        call_graph, cost_keys=cost_keys, costs_caches=costs_caches, generalizer=generalizer
+    )
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+
+        pq.write_table(nodes, nodes_path)
+        pq.write_table(edges, edges_path)
+    else:
+        import pyarrow.feather as feather
+
+        feather.write_feather(nodes, nodes_path, compression='uncompressed')
+        feather.write_feather(edges, edges_path, compression='uncompressed')
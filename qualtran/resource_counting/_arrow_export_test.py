@@ -0,0 +1,91 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import pytest
+import sympy
+
+from qualtran.bloqs.basic_gates import Hadamard, TGate, Toffoli
+from qualtran.bloqs.for_testing.costing import CostingBloq
+from qualtran.resource_counting import (
+    call_graph_to_arrow,
+    get_bloq_call_graph,
+    get_compact_call_graph,
+    QECGatesCost,
+    QubitCount,
+    write_call_graph,
+)
+
+
+def _make_algo(n_toffoli=100):
+    func1 = CostingBloq('Func1', num_qubits=10, callees=[(TGate(), 10), (Hadamard(), 10)])
+    func2 = CostingBloq('Func2', num_qubits=3, callees=[(Toffoli(), n_toffoli)])
+    return CostingBloq('Algo', num_qubits=100, callees=[(func1, 2), (func2, 1)])
+
+
+def test_call_graph_to_arrow():
+    algo = _make_algo()
+    cg = get_compact_call_graph(algo)
+    nodes, edges = call_graph_to_arrow(cg, cost_keys=[QECGatesCost(), QubitCount()])
+
+    assert nodes.num_rows == 6
+    assert nodes['id'].to_pylist() == list(range(6))
+    assert nodes['bloq'].to_pylist() == [str(b) for b in cg.bloqs]
+    assert nodes['bloq_class'].to_pylist()[0] == 'qualtran.bloqs.for_testing.costing.CostingBloq'
+    assert nodes['root'].to_pylist() == [True] + [False] * 5
+    assert nodes['qubit count'].to_pylist()[0] == 100
+    assert nodes['gate counts.t'].to_pylist()[0] == 20
+    assert nodes['gate counts.toffoli'].to_pylist()[0] == 100
+    assert nodes['gate counts.clifford'].to_pylist()[0] == 20
+
+    assert edges.column_names == ['caller', 'callee', 'n']
+    assert sorted(zip(*(edges[c].to_pylist() for c in edges.column_names))) == sorted(
+        (cg.index(caller), cg.index(callee), n) for caller, callee, n in cg.edges()
+    )
+
+    # A networkx call graph gives the same tables, up to node order.
+    g, _ = get_bloq_call_graph(algo)
+    nx_nodes, nx_edges = call_graph_to_arrow(g)
+    assert sorted(nx_nodes['bloq'].to_pylist()) == sorted(nodes['bloq'].to_pylist())
+    assert nx_nodes['root'].to_pylist() == [str(b) == str(algo) for b in g.nodes]
+    assert sorted(nx_edges['n'].to_pylist()) == sorted(edges['n'].to_pylist())
+
+
+def test_call_graph_to_arrow_symbolic():
+    n = sympy.Symbol('n')
+    cg = get_compact_call_graph(_make_algo(n_toffoli=n))
+    nodes, edges = call_graph_to_arrow(cg, cost_keys=[QECGatesCost()])
+    assert edges['n'].type == pa.string()
+    assert sympy.parse_expr(nodes['gate counts.toffoli'].to_pylist()[0]) == n
+    assert nodes['gate counts.t'].type == pa.int64()
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_write_call_graph(tmp_path, file_format):
+
+    cg = get_compact_call_graph(_make_algo())
+    nodes_path, edges_path = str(tmp_path / 'nodes'), str(tmp_path / 'edges')
+    write_call_graph(cg, nodes_path, edges_path, [QECGatesCost()], file_format=file_format)
+
+    nodes, edges = call_graph_to_arrow(cg, [QECGatesCost()])
+    if file_format == 'parquet':
+        assert pq.read_table(nodes_path).equals(nodes)
+        assert pq.read_table(edges_path).equals(edges)
+    else:
+        assert feather.read_table(nodes_path, memory_map=True).equals(nodes)
+        assert feather.read_table(edges_path, memory_map=True).equals(edges)
+
+    with pytest.raises(ValueError):
+        write_call_graph(cg, nodes_path, edges_path, file_format='csv')
@@ -11,29 +11,41 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+import contextlib
+import functools
 import logging
 import warnings
-from collections import defaultdict
-from typing import Callable, cast, Dict, Sequence, Tuple, TYPE_CHECKING
+from collections import ChainMap, defaultdict
+from typing import (
+    Callable,
+    cast,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TYPE_CHECKING,
+    Union,
+)
 
 import attrs
 import networkx as nx
 import sympy
 from attrs import field, frozen
 
-from qualtran.symbolics import is_zero, SymbolicInt
+from qualtran.symbolics import is_zero, ssum, SymbolicInt
 
 from ._call_graph import get_bloq_callee_counts
 from ._costing import CostKey
-from .classify_bloqs import (
-    bloq_is_clifford,
-    bloq_is_rotation,
-    bloq_is_state_or_effect,
-    bloq_is_t_like,
-)
+from .classify_bloqs import bloq_is_clifford, bloq_is_rotation, bloq_is_t_like
 
 if TYPE_CHECKING:
     from qualtran import Bloq
+    from qualtran.bloqs.mcmt import And, MultiTargetCNOT
     from qualtran.cirq_interop.t_complexity_protocol import TComplexity
 
 logger = logging.getLogger(__name__)
@@ -104,15 +116,15 @@ class BloqCount(CostKey[BloqCountDict]):
             logger.info("Computing %s: %s is in the target gateset.", self, bloq)
             return {bloq: 1}
 
-        totals: BloqCountDict = defaultdict(lambda: 0)
+        terms: Dict['Bloq', List[SymbolicInt]] = defaultdict(list)
         callees = get_bloq_callee_counts(bloq)
         logger.info("Computing %s for %s from %d callee(s)", self, bloq, len(callees))
         for callee, n_times_called in callees:
             callee_cost = get_callee_cost(callee)
             for gateset_bloq, count in callee_cost.items():
-                totals[gateset_bloq] += n_times_called * count
+                terms[gateset_bloq].append(n_times_called * count)
 
-        return dict(totals)
+        return {gateset_bloq: ssum(ns) for gateset_bloq, ns in terms.items()}
 
     def zero(self) -> BloqCountDict:
         # The additive identity of the bloq counts dictionary is an empty dictionary.
@@ -297,11 +309,6 @@ class QECGatesCost(CostKey[GateCounts]):
     legacy_shims: bool = False
 
     def compute(self, bloq: 'Bloq', get_callee_cost: Callable[['Bloq'], GateCounts]) -> GateCounts:
-        from qualtran.bloqs.basic_gates import GlobalPhase, Identity, Toffoli, TwoBitCSwap
-        from qualtran.bloqs.basic_gates._shims import Measure
-        from qualtran.bloqs.bookkeeping._bookkeeping_bloq import _BookkeepingBloq
-        from qualtran.bloqs.mcmt import And, MultiTargetCNOT
-
         if self.legacy_shims:
             if hasattr(bloq, '_t_complexity_'):
                 legacy_val = bloq._t_complexity_()
@@ -317,73 +324,16 @@ class QECGatesCost(CostKey[GateCounts]):
                     t=legacy_val.t, clifford=legacy_val.clifford, rotation=legacy_val.rotations
                 )
 
-        # T gates
-        if bloq_is_t_like(bloq):
-            return GateCounts(t=1)
-
-        # Toffolis
-        if isinstance(bloq, Toffoli):
-            return GateCounts(toffoli=1)
-
-        # Measurement
-        if isinstance(bloq, Measure):
-            return GateCounts(measurement=1)
-
-        # 'And' bloqs
-        if isinstance(bloq, And):
-            # To match the legacy `t_complexity` protocol, we can hack in the explicit
-            # counts for the clifford operations used to invert the control bit.
-            # Note: we *only* add in the clifford operations that correspond to correctly
-            # setting the control line. The other clifford operations inherent in compiling
-            # an And gate to the gateset considered by the legacy `t_complexity` protocol can be
-            # simply added in as part of `GateCounts.to_legacy_t_complexity()`
-            n_inverted_controls = (bloq.cv1 == 0) + int(bloq.cv2 == 0)
-            if bloq.uncompute:
-                if self.legacy_shims:
-                    return GateCounts(clifford=3 + 2 * n_inverted_controls, measurement=1)
-                else:
-                    return GateCounts(measurement=1, clifford=1)
-
-            if self.legacy_shims:
-                return GateCounts(and_bloq=1, clifford=2 * n_inverted_controls)
-            else:
-                return GateCounts(and_bloq=1)
-
-        # CSwaps aka Fredkin
-        if isinstance(bloq, TwoBitCSwap):
-            return GateCounts(cswap=1)
-
-        if isinstance(bloq, MultiTargetCNOT):
-            # TODO(https://github.com/quantumlib/Qualtran/issues/1318): Decide how to count this.
-            if self.legacy_shims:
-                # Legacy mode: don't treat this as one clifford. Use its decomposition.
-                pass  # fall through
-            else:
-                return GateCounts(clifford=1)
-
-        # Cliffords
-        if bloq_is_clifford(bloq):
-            return GateCounts(clifford=1)
-
-        # States and effects
-        if bloq_is_state_or_effect(bloq):
-            return GateCounts()
-
-        # Bookkeeping, empty bloqs
-        if isinstance(bloq, _BookkeepingBloq) or isinstance(bloq, (GlobalPhase, Identity)):
-            return GateCounts()
-
-        if bloq_is_rotation(bloq):
-            return GateCounts(rotation=1)
+        leaf_counts = _qec_gates_leaf_counts(bloq, self)
+        if leaf_counts is not None:
+            return leaf_counts
 
         # Recursive case
-        totals = GateCounts()
         callees = get_bloq_callee_counts(bloq, ignore_decomp_failure=False)
         logger.info("Computing %s for %s from %d callee(s)", self, bloq, len(callees))
-        for callee, n_times_called in callees:
-            callee_cost = get_callee_cost(callee)
-            totals += n_times_called * callee_cost
-        return totals
+        return _sum_gate_counts(
+            (n_times_called, get_callee_cost(callee)) for callee, n_times_called in callees
+        )
 
     def zero(self) -> GateCounts:
         return GateCounts()
@@ -394,3 +344,241 @@ class QECGatesCost(CostKey[GateCounts]):
 
     def __str__(self):
         return 'gate counts'
+
+
+def _sum_gate_counts(terms: Iterable[Tuple[SymbolicInt, GateCounts]]) -> GateCounts:
+    """Sum `n * counts` for each `(n, counts)` in `terms`.
+
+    This gives the same value as adding the terms one at a time, but each symbolic field is
+    summed with a single `ssum`, so the size of the intermediate expressions doesn't grow with
+    the number of callees.
+    """
+    terms = list(terms)
+    return GateCounts(
+        **{
+            attr.name: ssum(n * getattr(counts, attr.name) for n, counts in terms)
+            for attr in attrs.fields(GateCounts)
+        }
+    )
+
+
+QECGatesRuleT = Union[GateCounts, Callable[['Bloq', QECGatesCost], Optional[GateCounts]], None]
+"""How `QECGatesCost` counts the bloqs of a class.
+
+This is one of:
+ - The `GateCounts` of every bloq of the class.
+ - A function of the bloq and the `QECGatesCost` cost key. It returns the bloq's `GateCounts`,
+   or `None` to count the bloq's callees.
+ - `None` to always count the bloq's callees.
+"""
+
+_REGISTERED_QEC_GATES_RULES: Dict[Type['Bloq'], QECGatesRuleT] = {}
+_QEC_GATES_RULE_CACHE: Dict[Type['Bloq'], QECGatesRuleT] = {}
+
+
+def register_qec_gates_rule(bloq_cls: Type['Bloq'], rule: QECGatesRuleT) -> None:
+    """Register how `QECGatesCost` counts bloqs of class `bloq_cls` and its subclasses.
+
+    `QECGatesCost` classifies each bloq with a single lookup on its class. Classes without a
+    rule, or whose rule gives `None`, are counted by recursing into their callees. A rule for
+    a class applies to its subclasses unless they have a rule of their own.
+
+    >>> register_qec_gates_rule(MyToffoliLikeGate, GateCounts(toffoli=1))
+
+    Args:
+        bloq_cls: The bloq class.
+        rule: The `GateCounts` of every bloq of this class, a function of the bloq and the
+            `QECGatesCost` cost key that returns the bloq's `GateCounts` (or `None` to count
+            its callees), or `None` to always count the bloq's callees.
+    """
+    _REGISTERED_QEC_GATES_RULES[bloq_cls] = rule
+    _QEC_GATES_RULE_CACHE.clear()
+
+
+def unregister_qec_gates_rule(bloq_cls: Type['Bloq']) -> None:
+    """Remove the rule registered for `bloq_cls` with `register_qec_gates_rule`.
+
+    Bloqs of the class are then counted using the rule of their nearest base class, or the
+    built-in rules.
+
+    Raises:
+        KeyError: If no rule is registered for `bloq_cls`.
+    """
+    del _REGISTERED_QEC_GATES_RULES[bloq_cls]
+    _QEC_GATES_RULE_CACHE.clear()
+
+
+@contextlib.contextmanager
+def override_qec_gates_rule(bloq_cls: Type['Bloq'], rule: QECGatesRuleT) -> Iterator[None]:
+    """Register a rule for `bloq_cls` within this context.
+
+    On exit, the previously registered rule for `bloq_cls` (if any) is restored.
+
+    >>> with override_qec_gates_rule(MyToffoliLikeGate, GateCounts(toffoli=1)):
+    >>>     gc = get_cost_value(algo, QECGatesCost())
+
+    Args:
+        bloq_cls: The bloq class.
+        rule: The rule, see `register_qec_gates_rule`.
+    """
+    had_rule = bloq_cls in _REGISTERED_QEC_GATES_RULES
+    old_rule = _REGISTERED_QEC_GATES_RULES.get(bloq_cls)
+    register_qec_gates_rule(bloq_cls, rule)
+    try:
+        yield
+    finally:
+        if had_rule:
+            register_qec_gates_rule(bloq_cls, old_rule)
+        else:
+            _REGISTERED_QEC_GATES_RULES.pop(bloq_cls, None)
+            _QEC_GATES_RULE_CACHE.clear()
+
+
+def _get_qec_gates_rule(bloq_cls: Type['Bloq']) -> QECGatesRuleT:
+    """The rule for the nearest class in `bloq_cls`'s MRO that has one, memoized per class."""
+    try:
+        return _QEC_GATES_RULE_CACHE[bloq_cls]
+    except KeyError:
+        pass
+    rules: Mapping[Type['Bloq'], QECGatesRuleT] = ChainMap(
+        _REGISTERED_QEC_GATES_RULES, _default_qec_gates_rules()
+    )
+    rule = next((rules[cls] for cls in bloq_cls.__mro__ if cls in rules), None)
+    _QEC_GATES_RULE_CACHE[bloq_cls] = rule
+    return rule
+
+
+def _qec_gates_leaf_counts(bloq: 'Bloq', cost_key: QECGatesCost) -> Optional[GateCounts]:
+    """The `GateCounts` of `bloq` if it is a leaf of `QECGatesCost`, otherwise `None`."""
+    rule = _get_qec_gates_rule(type(bloq))
+    if isinstance(rule, GateCounts):
+        return rule
+    if rule is not None:
+        return rule(bloq, cost_key)
+    return None
+
+
+def _and_counts(bloq: 'And', cost_key: QECGatesCost) -> GateCounts:
+    # To match the legacy `t_complexity` protocol, we can hack in the explicit
+    # counts for the clifford operations used to invert the control bit.
+    # Note: we *only* add in the clifford operations that correspond to correctly
+    # setting the control line. The other clifford operations inherent in compiling
+    # an And gate to the gateset considered by the legacy `t_complexity` protocol can be
+    # simply added in as part of `GateCounts.to_legacy_t_complexity()`
+    n_inverted_controls = (bloq.cv1 == 0) + int(bloq.cv2 == 0)
+    if bloq.uncompute:
+        if cost_key.legacy_shims:
+            return GateCounts(clifford=3 + 2 * n_inverted_controls, measurement=1)
+        else:
+            return GateCounts(measurement=1, clifford=1)
+
+    if cost_key.legacy_shims:
+        return GateCounts(and_bloq=1, clifford=2 * n_inverted_controls)
+    else:
+        return GateCounts(and_bloq=1)
+
+
+def _multi_target_cnot_counts(
+    bloq: 'MultiTargetCNOT', cost_key: QECGatesCost
+) -> Optional[GateCounts]:
+    # TODO(https://github.com/quantumlib/Qualtran/issues/1318): Decide how to count this.
+    if cost_key.legacy_shims:
+        # Legacy mode: don't treat this as one clifford. Use its decomposition.
+        return None
+    return GateCounts(clifford=1)
+
+
+def _rotation_counts(bloq: 'Bloq', cost_key: QECGatesCost) -> Optional[GateCounts]:
+    # Single-qubit rotations may hide T gates or cliffords.
+    if bloq_is_t_like(bloq):
+        return GateCounts(t=1)
+    if bloq_is_clifford(bloq):
+        return GateCounts(clifford=1)
+    if bloq_is_rotation(bloq):
+        return GateCounts(rotation=1)
+    return None
+
+
+def _adjoint_counts(bloq: 'Bloq', cost_key: QECGatesCost) -> Optional[GateCounts]:
+    if bloq_is_clifford(bloq):
+        return GateCounts(clifford=1)
+    return None
+
+
+def _controlled_counts(bloq: 'Bloq', cost_key: QECGatesCost) -> Optional[GateCounts]:
+    if bloq_is_rotation(bloq):
+        return GateCounts(rotation=1)
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _default_qec_gates_rules() -> Dict[Type['Bloq'], QECGatesRuleT]:
+    """The rules for the bloqs in the Qualtran standard library.
+
+    These are the classes checked by `bloq_is_t_like`, `bloq_is_clifford`, `bloq_is_rotation`
+    and `bloq_is_state_or_effect`, along with the other leaf bloqs of `QECGatesCost`.
+    """
+    from qualtran import Adjoint, Controlled
+    from qualtran.bloqs.basic_gates import (
+        CNOT,
+        CYGate,
+        CZ,
+        GlobalPhase,
+        Hadamard,
+        Identity,
+        Rx,
+        Ry,
+        Rz,
+        SGate,
+        TGate,
+        Toffoli,
+        TwoBitCSwap,
+        TwoBitSwap,
+        XGate,
+        XPowGate,
+        YGate,
+        YPowGate,
+        ZGate,
+        ZPowGate,
+    )
+    from qualtran.bloqs.basic_gates._shims import Measure
+    from qualtran.bloqs.basic_gates.x_basis import _XVector
+    from qualtran.bloqs.basic_gates.z_basis import _ZVector
+    from qualtran.bloqs.bookkeeping import ArbitraryClifford
+    from qualtran.bloqs.bookkeeping._bookkeeping_bloq import _BookkeepingBloq
+    from qualtran.bloqs.mcmt import And, MultiTargetCNOT
+
+    rules: Dict[Type['Bloq'], QECGatesRuleT] = {
+        TGate: GateCounts(t=1),
+        Toffoli: GateCounts(toffoli=1),
+        Measure: GateCounts(measurement=1),
+        And: _and_counts,
+        TwoBitCSwap: GateCounts(cswap=1),
+        MultiTargetCNOT: _multi_target_cnot_counts,
+        # States and effects; bookkeeping and empty bloqs.
+        _XVector: GateCounts(),
+        _ZVector: GateCounts(),
+        _BookkeepingBloq: GateCounts(),
+        GlobalPhase: GateCounts(),
+        Identity: GateCounts(),
+        # Adjoint cliffords are cliffords; singly-controlled rotations are rotations.
+        Adjoint: _adjoint_counts,
+        Controlled: _controlled_counts,
+    }
+    cliffords = [
+        TwoBitSwap,
+        Hadamard,
+        XGate,
+        ZGate,
+        YGate,
+        ArbitraryClifford,
+        CNOT,
+        CYGate,
+        CZ,
+        SGate,
+    ]
+    for cls in cliffords:
+        rules[cls] = GateCounts(clifford=1)
+    for cls in [Rx, Ry, Rz, XPowGate, YPowGate, ZPowGate]:
+        rules[cls] = _rotation_counts
+    return rules
@@ -11,16 +11,30 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+from typing import Dict, Optional
+
+import numpy as np
 import pytest
 import sympy
+from attrs import frozen
 
+from qualtran import Bloq, Controlled, CtrlSpec, Signature
 from qualtran.bloqs import basic_gates, mcmt, rotations
 from qualtran.bloqs.basic_gates import Hadamard, TGate, Toffoli
 from qualtran.bloqs.basic_gates._shims import Measure
 from qualtran.bloqs.for_testing.costing import make_example_costing_bloqs
 from qualtran.bloqs.mcmt import MultiAnd, MultiTargetCNOT
 from qualtran.cirq_interop.t_complexity_protocol import TComplexity
-from qualtran.resource_counting import BloqCount, GateCounts, get_cost_value, QECGatesCost
+from qualtran.resource_counting import (
+    BloqCount,
+    GateCounts,
+    get_cost_value,
+    override_qec_gates_rule,
+    QECGatesCost,
+    register_qec_gates_rule,
+    unregister_qec_gates_rule,
+)
+from qualtran.resource_counting._bloq_counts import _sum_gate_counts
 
 
 def test_bloq_count():
@@ -79,6 +93,16 @@ def test_gate_counts_toffoli_only():
     assert gc.total_toffoli_only() == sympy.Symbol('n')
 
 
+def test_sum_gate_counts():
+    n, m = sympy.symbols('n m')
+    terms = [(2, GateCounts(t=n, toffoli=1)), (m, GateCounts(t=1, cswap=3)), (4, GateCounts(t=n))]
+    expected = GateCounts()
+    for k, counts in terms:
+        expected += k * counts
+    assert _sum_gate_counts(terms) == expected == GateCounts(t=6 * n + m, toffoli=2, cswap=3 * m)
+    assert _sum_gate_counts([]) == GateCounts()
+
+
 def test_qec_gates_cost():
     algo = make_example_costing_bloqs()
     gc = get_cost_value(algo, QECGatesCost())
@@ -130,3 +154,76 @@ def test_count_multi_target_cnot():
     # TODO: https://github.com/quantumlib/Qualtran/issues/1318
     assert get_cost_value(b, QECGatesCost(legacy_shims=True)) == GateCounts(clifford=23)
     assert b.t_complexity() == TComplexity(clifford=23)
+
+
+@frozen
+class _CustomGate(Bloq):
+    n: int = 1
+
+    @property
+    def signature(self) -> 'Signature':
+        return Signature.build(q=1)
+
+    def build_call_graph(self, ssa) -> Dict['Bloq', int]:
+        return {TGate(): 2 * self.n}
+
+
+@frozen
+class _CustomGateSubclass(_CustomGate):
+    pass
+
+
+def test_register_qec_gates_rule():
+    assert get_cost_value(_CustomGateSubclass(), QECGatesCost()) == GateCounts(t=2)
+
+    def _rule(bloq: _CustomGate, cost_key: QECGatesCost) -> Optional[GateCounts]:
+        if bloq.n == 1:
+            return GateCounts(rotation=1)
+        return None
+
+    with override_qec_gates_rule(_CustomGate, _rule):
+        # Rules apply to subclasses, and rules returning `None` recurse.
+        assert get_cost_value(_CustomGateSubclass(), QECGatesCost()) == GateCounts(rotation=1)
+        assert get_cost_value(_CustomGateSubclass(n=3), QECGatesCost()) == GateCounts(t=6)
+
+        # A subclass can override its base class's rule.
+        with override_qec_gates_rule(_CustomGateSubclass, None):
+            assert get_cost_value(_CustomGate(), QECGatesCost()) == GateCounts(rotation=1)
+            assert get_cost_value(_CustomGateSubclass(), QECGatesCost()) == GateCounts(t=2)
+
+            with override_qec_gates_rule(_CustomGateSubclass, GateCounts(toffoli=1)):
+                cost = get_cost_value(_CustomGateSubclass(n=3), QECGatesCost())
+                assert cost == GateCounts(toffoli=1)
+
+            # The previous rule is restored on exit.
+            assert get_cost_value(_CustomGateSubclass(), QECGatesCost()) == GateCounts(t=2)
+        assert get_cost_value(_CustomGateSubclass(), QECGatesCost()) == GateCounts(rotation=1)
+    assert get_cost_value(_CustomGateSubclass(), QECGatesCost()) == GateCounts(t=2)
+
+
+def test_unregister_qec_gates_rule():
+    register_qec_gates_rule(_CustomGate, GateCounts(toffoli=1))
+    assert get_cost_value(_CustomGate(), QECGatesCost()) == GateCounts(toffoli=1)
+    unregister_qec_gates_rule(_CustomGate)
+    assert get_cost_value(_CustomGate(), QECGatesCost()) == GateCounts(t=2)
+
+    with pytest.raises(KeyError):
+        unregister_qec_gates_rule(_CustomGate)
+
+
+@pytest.mark.parametrize(
+    ['bloq', 'counts'],
+    [
+        [basic_gates.TGate().adjoint(), GateCounts(t=1)],
+        [basic_gates.SGate().adjoint(), GateCounts(clifford=1)],
+        [basic_gates.Rz(angle=np.pi / 4), GateCounts(t=1)],
+        [basic_gates.Rz(angle=np.pi / 2), GateCounts(clifford=1)],
+        [basic_gates.Rz(angle=sympy.Symbol('theta')), GateCounts(rotation=1)],
+        [Controlled(basic_gates.Rx(angle=0.1), CtrlSpec()), GateCounts(rotation=1)],
+        [basic_gates.PlusState(), GateCounts()],
+        [basic_gates.GlobalPhase(exponent=0.5), GateCounts()],
+        [mcmt.And(cv1=0, cv2=1).adjoint(), GateCounts(measurement=1, clifford=1)],
+    ],
+)
+def test_qec_gates_cost_leaf_classes(bloq, counts):
+    assert get_cost_value(bloq, QECGatesCost()) == counts
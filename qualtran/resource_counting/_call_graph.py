@@ -22,6 +22,7 @@ from typing import (
     cast,
     Dict,
     Iterable,
+    Iterator,
     List,
     Mapping,
     MutableMapping,
@@ -33,14 +34,17 @@ from typing import (
 )
 
 import networkx as nx
+import numpy as np
 import sympy
 
 from qualtran import Bloq, CompositeBloq, DecomposeNotImplementedError, DecomposeTypeError
+from qualtran._infra.decomposition_cache import get_active_decomposition_cache
 
 BloqCountT = Tuple[Bloq, Union[int, sympy.Expr]]
 BloqCountDictT = Mapping[Bloq, Union[int, sympy.Expr]]
 MutableBloqCountDictT = MutableMapping[Bloq, Union[int, sympy.Expr]]
 from ._generalization import _make_composite_generalizer, GeneralizerT
+from ._profiling import get_active_cost_profile
 
 
 def big_O(expr) -> sympy.Order:
@@ -140,11 +144,27 @@ def get_bloq_callee_counts(
         generalizer = lambda b: b
     if isinstance(generalizer, (list, tuple)):
         generalizer = _make_composite_generalizer(*generalizer)
+
+    # Callees can be memoized if they don't depend on the state of a user-provided `ssa`.
+    cache = get_active_decomposition_cache()
+    can_memoize = ssa is None and cache is not None and not isinstance(bloq, CompositeBloq)
     if ssa is None:
         ssa = SympySymbolAllocator()
 
+    def _build() -> Union[BloqCountDictT, Set[BloqCountT]]:
+        profile = get_active_cost_profile()
+        if profile is None:
+            return bloq.build_call_graph(ssa)
+        with profile.time_call_graph(bloq):
+            return bloq.build_call_graph(ssa)
+
     try:
-        return _generalize_callees(bloq.build_call_graph(ssa), cast(GeneralizerT, generalizer))
+        if can_memoize:
+            assert cache is not None
+            raw_callee_counts = cache.build_call_graph(bloq, _build)
+        else:
+            raw_callee_counts = _build()
+        return _generalize_callees(raw_callee_counts, cast(GeneralizerT, generalizer))
     except (DecomposeNotImplementedError, DecomposeTypeError) as e:
         if ignore_decomp_failure:
             return []
@@ -152,6 +172,67 @@ def get_bloq_callee_counts(
             raise e
 
 
+def _walk_call_graph(
+    bloq: Bloq,
+    generalizer: GeneralizerT,
+    keep: Callable[[Bloq], bool],
+    max_depth: Optional[int],
+    depth: int,
+    is_visited: Callable[[Bloq], bool],
+    mark_visited: Callable[[Bloq], None],
+) -> Iterator[Tuple[Bloq, Bloq, Union[int, sympy.Expr]]]:
+    """Traverse the call graph depth-first, yielding `(caller, callee, n)` edges.
+
+    A bloq is expanded the first time it is visited, i.e. when `is_visited(bloq)` is False.
+    `mark_visited` is called on the bloq before its callees are visited (even if it is a leaf).
+    An edge is yielded once its callee has been visited, before the callee's own edges.
+
+    We manage an explicit stack of frames so that the Python call stack does not grow with the
+    depth of the call graph.
+    """
+    # Each frame is a bloq whose callees are being visited, its depth, and an iterator over
+    # its (remaining) callees.
+    stack: List[Tuple[Bloq, int, Iterator[BloqCountT]]] = []
+
+    def _visit(bloq: Bloq, depth: int) -> None:
+        """Mark `bloq` as visited and push a frame if we need to visit its callees."""
+        if is_visited(bloq):
+            return
+        mark_visited(bloq)
+
+        # Base case 1: This node is requested by the user to be a leaf node via the `keep`
+        # parameter.
+        if keep(bloq):
+            return
+
+        # Base case 2: Max depth exceeded
+        if max_depth is not None and depth >= max_depth:
+            return
+
+        # Get the callees and modify them according to `generalizer`.
+        callee_counts = get_bloq_callee_counts(bloq, generalizer)
+
+        # Base case 3: Empty list of callees
+        if not callee_counts:
+            return
+
+        stack.append((bloq, depth, iter(callee_counts)))
+
+    _visit(bloq, depth)
+    while stack:
+        caller, caller_depth, callees = stack[-1]
+        try:
+            callee, n = next(callees)
+        except StopIteration:
+            stack.pop()
+            continue
+
+        # Quite important: we visit the callee before yielding the edge. A consumer adding the
+        # edge to a graph would otherwise mark the callee as already-visited.
+        _visit(callee, caller_depth + 1)
+        yield caller, callee, n
+
+
 def _build_call_graph(
     bloq: Bloq,
     generalizer: GeneralizerT,
@@ -161,50 +242,139 @@ def _build_call_graph(
     g: nx.DiGraph,
     depth: int,
 ) -> None:
-    """Recursively build the call graph.
+    """Build the call graph.
 
     Arguments are the same as `get_bloq_call_graph`, except `g` is the graph we're building
-    (i.e. it is mutated by this function) and `depth` is the current recursion depth.
+    (i.e. it is mutated by this function) and `depth` is the depth of `bloq`. Bloqs
+    already in `g` are not expanded again.
     """
-    if bloq in g:
-        # We already visited this node.
-        return
+    for caller, callee, n in _walk_call_graph(
+        bloq,
+        generalizer,
+        keep,
+        max_depth,
+        depth,
+        is_visited=g.__contains__,
+        mark_visited=g.add_node,
+    ):
+        if (caller, callee) in g.edges:
+            g.edges[caller, callee]['n'] += n
+        else:
+            g.add_edge(caller, callee, n=n)
 
-    # Make sure this node is present in the graph.
-    g.add_node(bloq)
 
-    # Base case 1: This node is requested by the user to be a leaf node via the `keep` parameter.
-    if keep(bloq):
-        return
+def iter_call_graph(
+    bloq: Bloq,
+    generalizer: Optional[Union['GeneralizerT', Sequence['GeneralizerT']]] = None,
+    keep: Optional[Callable[[Bloq], bool]] = None,
+    max_depth: Optional[int] = None,
+    dedup: bool = True,
+) -> Iterator[Tuple[Bloq, Bloq, Union[int, sympy.Expr]]]:
+    """Lazily traverse the bloq call graph, yielding `(caller, callee, n)` edges.
 
-    # Base case 2: Max depth exceeded
-    if max_depth is not None and depth >= max_depth:
-        return
+    This traverses the same call graph as `get_bloq_call_graph` in the same order, but yields
+    each edge as it is discovered instead of building a `networkx.DiGraph`. This lets
+    consumers that only need part of the graph, or an aggregate of it, stream over the edges.
 
-    # Prep for recursion: get the callees and modify them according to `generalizer`.
-    callee_counts = get_bloq_callee_counts(bloq, generalizer)
+    Args:
+        bloq: The bloq whose call graph to traverse.
+        generalizer: If provided, run this function on each (sub)bloq to replace attributes
+            that do not affect resource estimates. See `get_bloq_call_graph`.
+        keep: If this function evaluates to True for the current bloq, don't recurse into it.
+        max_depth: If provided, traverse at most this many layers.
+        dedup: If True, each bloq is expanded the first time it is encountered, so each edge is
+            yielded once and only a set of visited bloqs is kept in memory. Otherwise, the call
+            graph is traversed as a tree: the callees of a bloq are yielded each time the bloq
+            is called. This keeps no state other than the current path, but can take
+            exponentially longer.
+
+    Yields:
+        Tuples of `(caller, callee, n)` where `n` is the number of times the (generalized)
+        caller calls the (generalized) callee.
+    """
+    if keep is None:
+        keep = lambda b: False
+    if generalizer is None:
+        generalizer = lambda b: b
+    if isinstance(generalizer, collections.abc.Sequence):
+        generalizer = _make_composite_generalizer(*generalizer)
 
-    # Base case 3: Empty list of callees
-    if not callee_counts:
-        return
+    root = generalizer(bloq)
+    if root is None:
+        raise ValueError("You can't generalize away the root bloq.")
 
-    for callee, n in callee_counts:
-        # Quite important: we do the recursive call first before adding in the edges.
-        # Otherwise, adding the edge would mark the callee node as already-visited by
-        # virtue of it being added to the graph with the `g.add_edge` call.
+    if dedup:
+        visited: Set[Bloq] = set()
+        is_visited: Callable[[Bloq], bool] = visited.__contains__
+        mark_visited: Callable[[Bloq], None] = visited.add
+    else:
+        is_visited = lambda b: False
+        mark_visited = lambda b: None
+    yield from _walk_call_graph(
+        root, generalizer, keep, max_depth, 0, is_visited=is_visited, mark_visited=mark_visited
+    )
 
-        # Do the recursive step, which will continue to mutate `g`
-        _build_call_graph(callee, generalizer, ssa, keep, max_depth, g, depth + 1)
 
-        # Update edge in `g`
-        if (bloq, callee) in g.edges:
-            g.edges[bloq, callee]['n'] += n
-        else:
-            g.add_edge(bloq, callee, n=n)
+def _is_integral_count(n: Union[int, sympy.Expr]) -> bool:
+    return isinstance(n, (int, np.integer)) and not isinstance(n, bool) and n >= 0
+
+
+def _compute_sigma_numeric(root_bloq: Bloq, g: nx.DiGraph) -> Optional[Dict[Bloq, int]]:
+    """Compute call totals for a call graph with integer counts using sparse matrices.
+
+    Each bloq reachable from `root_bloq` is assigned an integer index and the edge counts
+    form a sparse matrix `A` where `A[i, j]` is the number of times bloq `i` calls bloq `j`.
+    Starting from the root, we propagate the number of times each bloq is (transitively) called
+    through the topological generations of the graph. All the callers of a bloq are in earlier
+    generations, so its total is final by the time we propagate it to its callees. The totals
+    of the leaf bloqs form sigma.
+
+    Returns `None` if an edge count is not a non-negative integer (e.g. it is symbolic) or if
+    the totals are too large to be represented exactly by floating point numbers.
+    """
+    import scipy.sparse
+
+    nodes = [root_bloq] + list(nx.descendants(g, root_bloq))
+    idxs = {bloq: i for i, bloq in enumerate(nodes)}
+    sub_g = g.subgraph(nodes)
+
+    rows: List[int] = []
+    cols: List[int] = []
+    counts: List[int] = []
+    for caller, callee, n in sub_g.edges(data='n'):
+        if not _is_integral_count(n):
+            return None
+        rows.append(idxs[caller])
+        cols.append(idxs[callee])
+        counts.append(n)
+
+    n_nodes = len(nodes)
+    calls = scipy.sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float64), (rows, cols)), shape=(n_nodes, n_nodes)
+    )
+    totals = np.zeros(n_nodes, dtype=np.float64)
+    totals[0] = 1
+    for generation in nx.topological_generations(sub_g):
+        gen_idxs = [idxs[bloq] for bloq in generation]
+        totals += calls[gen_idxs, :].T @ totals[gen_idxs]
+
+    if n_nodes and totals.max() >= 2**53:
+        # Each total is a sum of non-negative terms, so all the intermediate values are exact
+        # if the largest total is.
+        return None
+    return {bloq: int(totals[idxs[bloq]]) for bloq in nodes if not g.succ[bloq]}
 
 
 def _compute_sigma(root_bloq: Bloq, g: nx.DiGraph) -> Dict[Bloq, Union[int, sympy.Expr]]:
-    """Iterate over nodes to sum up the counts of leaf bloqs."""
+    """Iterate over nodes to sum up the counts of leaf bloqs.
+
+    If all the counts are integers, we use the vectorized `_compute_sigma_numeric`. Otherwise,
+    we fall back to summing (symbolic) counts from the leaves upwards.
+    """
+    numeric_sigma = _compute_sigma_numeric(root_bloq, g)
+    if numeric_sigma is not None:
+        return cast(Dict[Bloq, Union[int, sympy.Expr]], numeric_sigma)
+
     bloq_sigmas: Dict[Bloq, Dict[Bloq, Union[int, sympy.Expr]]] = defaultdict(
         lambda: defaultdict(lambda: 0)
     )
@@ -0,0 +1,230 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Incremental re-computation of bloq call graphs."""
+import collections.abc
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Sequence, Set, Tuple, TYPE_CHECKING, Union
+
+import networkx as nx
+import sympy
+
+from ._call_graph import _build_call_graph, _walk_call_graph, SympySymbolAllocator
+from ._generalization import _make_composite_generalizer
+
+if TYPE_CHECKING:
+    from qualtran import Bloq
+
+    from ._generalization import GeneralizerT
+
+
+class CallGraphSession:
+    """A call graph that can be cheaply updated after changing the root or a sub-bloq.
+
+    `get_bloq_call_graph` builds the call graph and call totals from scratch. When iterating
+    on the parameters of a large algorithm, most of the call graph stays the same. A session
+    keeps every bloq it has expanded, along with the call totals ("sigma") of each bloq's
+    sub-graph, so that:
+
+     - Setting a new root bloq with `set_root` only expands bloqs that haven't been seen before,
+       and only computes the totals of the new bloqs.
+     - Replacing a sub-bloq with `replace` only expands the replacement and re-computes the totals
+       of the bloqs that (transitively) call the replaced bloq.
+
+    The callees of a bloq are a function of the bloq (and the generalizer), so the expanded
+    graph is valid for any root. Replacements apply to the whole session: once `old` is replaced
+    by `new`, every bloq that calls `old`, including those expanded later, calls `new` instead.
+
+    >>> session = CallGraphSession(prep_thc, generalizer=ignore_split_join)
+    >>> session.replace(old_qrom, new_qrom)
+    >>> graph, sigma = session.get_call_graph()
+
+    Args:
+        root: The bloq whose call graph and totals to compute.
+        generalizer: If provided, run this function on each (sub)bloq to replace attributes
+            that do not affect resource estimates. See `get_bloq_call_graph`.
+        keep: If this function evaluates to True for a bloq, keep the bloq as a leaf node in
+            the call graph instead of recursing into it.
+    """
+
+    def __init__(
+        self,
+        root: 'Bloq',
+        generalizer: Optional[Union['GeneralizerT', Sequence['GeneralizerT']]] = None,
+        keep: Optional[Callable[['Bloq'], bool]] = None,
+    ):
+        if generalizer is None:
+            generalizer = lambda b: b
+        if isinstance(generalizer, collections.abc.Sequence):
+            generalizer = _make_composite_generalizer(*generalizer)
+        self._user_generalizer: 'GeneralizerT' = generalizer
+        self._keep: Callable[['Bloq'], bool] = keep if keep is not None else lambda b: False
+        self._ssa = SympySymbolAllocator()
+        self._substitutions: Dict['Bloq', 'Bloq'] = {}
+
+        # Every node in `_g` has been fully expanded.
+        self._g = nx.DiGraph()
+        self._sigmas: Dict['Bloq', Dict['Bloq', Union[int, sympy.Expr]]] = {}
+        self._root: 'Bloq' = self._generalize_root(root)
+        self._expand(self._root)
+
+    def _generalize(self, bloq: 'Bloq') -> Optional['Bloq']:
+        bloq = self._user_generalizer(bloq)
+        if bloq is None:
+            return None
+        return self._substitutions.get(bloq, bloq)
+
+    def _generalize_root(self, bloq: 'Bloq') -> 'Bloq':
+        root = self._generalize(bloq)
+        if root is None:
+            raise ValueError("You can't generalize away the root bloq.")
+        return root
+
+    def _expand(self, bloq: 'Bloq') -> None:
+        """Add `bloq` and all its (not-yet-expanded) descendants to the graph."""
+        _build_call_graph(
+            bloq, self._generalize, self._ssa, self._keep, max_depth=None, g=self._g, depth=0
+        )
+
+    def _expand_scratch(self, bloq: 'Bloq') -> nx.DiGraph:
+        """Expand `bloq` into a new graph, without modifying the session.
+
+        Bloqs already in the session are not expanded again; they appear as leaves of the
+        returned graph.
+        """
+        scratch = nx.DiGraph()
+        for caller, callee, n in _walk_call_graph(
+            bloq,
+            self._generalize,
+            self._keep,
+            max_depth=None,
+            depth=0,
+            is_visited=lambda b: b in self._g or b in scratch,
+            mark_visited=scratch.add_node,
+        ):
+            if scratch.has_edge(caller, callee):
+                scratch.edges[caller, callee]['n'] += n
+            else:
+                scratch.add_edge(caller, callee, n=n)
+        return scratch
+
+    def _descendants(self, bloq: 'Bloq', scratch: nx.DiGraph) -> Set['Bloq']:
+        """The descendants of `bloq` in the union of the session's graph and `scratch`."""
+        seen: Set['Bloq'] = set()
+        todo = [bloq]
+        while todo:
+            b = todo.pop()
+            for g in (self._g, scratch):
+                if b not in g:
+                    continue
+                for callee in g.succ[b]:
+                    if callee not in seen:
+                        seen.add(callee)
+                        todo.append(callee)
+        return seen
+
+    def _sigma(self, bloq: 'Bloq') -> Dict['Bloq', Union[int, sympy.Expr]]:
+        """The call totals of `bloq`, computing them for un-memoized nodes in its sub-graph."""
+        if bloq in self._sigmas:
+            return self._sigmas[bloq]
+
+        todo = [b for b in nx.descendants(self._g, bloq) if b not in self._sigmas] + [bloq]
+        for b in reversed(list(nx.topological_sort(self._g.subgraph(todo)))):
+            callees = self._g.succ[b]
+            if not callees:
+                self._sigmas[b] = {b: 1}
+                continue
+
+            sigma: Dict['Bloq', Union[int, sympy.Expr]] = defaultdict(lambda: 0)
+            for callee, data in callees.items():
+                n = data['n']
+                for leaf, k in self._sigmas[callee].items():
+                    sigma[leaf] += k * n
+            self._sigmas[b] = dict(sigma)
+        return self._sigmas[bloq]
+
+    @property
+    def root(self) -> 'Bloq':
+        """The (generalized) root bloq."""
+        return self._root
+
+    def set_root(self, root: 'Bloq') -> None:
+        """Change the root bloq, expanding only bloqs not already in the session."""
+        root = self._generalize_root(root)
+        self._expand(root)
+        self._root = root
+
+    def replace(self, old: 'Bloq', new: 'Bloq') -> None:
+        """Replace every call to the bloq `old` with a call to the bloq `new`.
+
+        Only `new` (and its not-yet-expanded descendants) are expanded, and only the totals
+        of the bloqs that call `old` are invalidated.
+
+        Args:
+            old: A bloq in the session's call graph, as it appears in the (generalized) graph.
+            new: The bloq to call instead. It will be generalized.
+
+        Raises:
+            ValueError: If `old` is not in the call graph or if `new` calls `old`.
+        """
+        if old not in self._g:
+            raise ValueError(f"{old} is not in the call graph.")
+        new = self._generalize_root(new)
+        if new == old:
+            return
+
+        # Validate on a scratch expansion so that the session is unchanged if we raise.
+        scratch = self._expand_scratch(new)
+        if old in self._descendants(new, scratch):
+            raise ValueError(f"Can't replace {old} with {new}, which calls it.")
+        # Every caller in `scratch` is new to the session, so its edges can be added as-is.
+        self._g.add_nodes_from(scratch)
+        self._g.add_edges_from(scratch.edges(data=True))
+
+        for caller in nx.ancestors(self._g, old):
+            self._sigmas.pop(caller, None)
+
+        # Re-wire the callers of `old`.
+        for caller in list(self._g.predecessors(old)):
+            n = self._g.edges[caller, old]['n']
+            self._g.remove_edge(caller, old)
+            if self._g.has_edge(caller, new):
+                self._g.edges[caller, new]['n'] += n
+            else:
+                self._g.add_edge(caller, new, n=n)
+
+        # Bloqs expanded later will also call `new` instead of `old`.
+        for k, v in self._substitutions.items():
+            if v == old:
+                self._substitutions[k] = new
+        self._substitutions[old] = new
+        if self._root == old:
+            self._root = new
+
+    @property
+    def sigma(self) -> Dict['Bloq', Union[int, sympy.Expr]]:
+        """Call totals for the leaf bloqs of the root."""
+        return dict(self._sigma(self._root))
+
+    def get_call_graph(self) -> Tuple[nx.DiGraph, Dict['Bloq', Union[int, sympy.Expr]]]:
+        """The call graph and call totals of the root bloq.
+
+        Returns:
+            g: A directed graph where nodes are (generalized) bloqs and edge attribute 'n' reports
+                the number of times successor bloq is called via its predecessor. This is a
+                copy of the part of the session's graph that is reachable from the root.
+            sigma: Call totals for "leaf" bloqs.
+        """
+        nodes = [self._root] + list(nx.descendants(self._g, self._root))
+        return self._g.subgraph(nodes).copy(), self.sigma
@@ -0,0 +1,93 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import attrs
+import networkx as nx
+import pytest
+
+from qualtran.bloqs.basic_gates import TGate, Toffoli
+from qualtran.bloqs.chemistry.thc.prepare import _thc_prep
+from qualtran.bloqs.data_loading.qroam_clean import QROAMClean
+from qualtran.resource_counting import CallGraphSession, get_bloq_call_graph
+from qualtran.resource_counting._call_graph_test import OnlyCallGraphBloqShim
+from qualtran.resource_counting.generalizers import ignore_split_join
+
+
+def assert_same_call_graph(session: CallGraphSession):
+    g, sigma = session.get_call_graph()
+    g_ref, sigma_ref = get_bloq_call_graph(session.root, generalizer=ignore_split_join)
+    assert sigma == sigma_ref
+    assert nx.utils.edges_equal(g.edges(data='n'), g_ref.edges(data='n'))
+
+
+def test_call_graph_session_set_root():
+    prep = _thc_prep.make()
+    session = CallGraphSession(prep, generalizer=ignore_split_join)
+    assert session.root == prep
+    assert_same_call_graph(session)
+
+    session.set_root(attrs.evolve(prep, log_block_size=1))
+    assert_same_call_graph(session)
+
+
+def test_call_graph_session_replace():
+    prep = _thc_prep.make()
+    session = CallGraphSession(prep, generalizer=ignore_split_join)
+    old = next(b for b in session.get_call_graph()[0].succ[prep] if isinstance(b, QROAMClean))
+    new = attrs.evolve(old, log_block_sizes=(1,))
+    session.replace(old, new)
+
+    g, sigma = session.get_call_graph()
+    assert old not in g
+    assert g.edges[prep, new]['n'] == 1
+    _, sigma_new = get_bloq_call_graph(new, generalizer=ignore_split_join)
+    _, sigma_old = get_bloq_call_graph(old, generalizer=ignore_split_join)
+    _, sigma_ref = get_bloq_call_graph(prep, generalizer=ignore_split_join)
+    for leaf in set(sigma_ref) | set(sigma_new) | set(sigma_old):
+        expected = sigma_ref.get(leaf, 0) - sigma_old.get(leaf, 0) + sigma_new.get(leaf, 0)
+        assert sigma.get(leaf, 0) == expected
+
+
+def test_call_graph_session_incremental():
+    c = OnlyCallGraphBloqShim('c', callees=[(TGate(), 4)])
+    b = OnlyCallGraphBloqShim('b', callees=[(c, 2)])
+    a = OnlyCallGraphBloqShim('a', callees=[(b, 3), (c, 1)])
+    session = CallGraphSession(a)
+    assert session.sigma == {TGate(): 28}
+
+    memoized_sigmas = session._sigmas
+    c2 = OnlyCallGraphBloqShim('c2', callees=[(Toffoli(), 1)])
+    session.replace(c, c2)
+    # Only the callers of `c` are invalidated.
+    assert TGate() in memoized_sigmas
+    assert c in memoized_sigmas
+    assert a not in memoized_sigmas and b not in memoized_sigmas
+    assert session.sigma == {Toffoli(): 7}
+
+    # The replacement applies to bloqs expanded later.
+    d = OnlyCallGraphBloqShim('d', callees=[(c, 5), (TGate(), 1)])
+    session.set_root(d)
+    assert session.sigma == {Toffoli(): 5, TGate(): 1}
+
+    # A failed replacement leaves the session unchanged.
+    nodes, edges = set(session._g.nodes), set(session._g.edges)
+    with pytest.raises(ValueError, match='calls it'):
+        session.replace(TGate(), OnlyCallGraphBloqShim('e', callees=[(TGate(), 2)]))
+    e2 = OnlyCallGraphBloqShim('e2', callees=[(Toffoli(), 1), (d, 1)])
+    with pytest.raises(ValueError, match='calls it'):
+        session.replace(TGate(), e2)
+    assert set(session._g.nodes) == nodes and set(session._g.edges) == edges
+    assert session.sigma == {Toffoli(): 5, TGate(): 1}
+    with pytest.raises(ValueError, match='not in the call graph'):
+        session.replace(OnlyCallGraphBloqShim('f'), TGate())
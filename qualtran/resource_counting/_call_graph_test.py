@@ -12,6 +12,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import sys
 from collections import defaultdict
 from functools import cached_property
 from typing import Dict, Iterable, Optional, Sequence, Tuple
@@ -31,9 +32,11 @@ from qualtran.resource_counting import (
     BloqCountT,
     get_bloq_call_graph,
     get_bloq_callee_counts,
+    iter_call_graph,
     MutableBloqCountDictT,
     SympySymbolAllocator,
 )
+from qualtran.resource_counting._call_graph import _compute_sigma, _compute_sigma_numeric
 from qualtran.resource_counting.generalizers import generalize_rotation_angle
 from qualtran.symbolics import SymbolicInt
 
@@ -249,3 +252,90 @@ def test_multiple_overlaping_call_graph_entries():
     b = OnlyCallGraphBloqShim(name='for_gen', callees=[(TGate(), 1), (TGate().adjoint(), 2)])
     counts = get_bloq_callee_counts(b, generalizer=generalize_rotation_angle)
     assert counts == [(TGate(), 3)]
+
+
+@frozen
+class ChainBloq(Bloq):
+    depth: int
+
+    @property
+    def signature(self) -> 'Signature':
+        return Signature([])
+
+    def build_call_graph(self, ssa: 'SympySymbolAllocator') -> 'BloqCountDictT':
+        if self.depth == 0:
+            return {TGate(): 1}
+        return {ChainBloq(self.depth - 1): 2}
+
+
+def test_deep_call_graph():
+    n = 3 * sys.getrecursionlimit()
+    graph, sigma = get_bloq_call_graph(ChainBloq(n))
+    assert len(graph) == n + 2
+    assert sigma == {TGate(): 2**n}
+    assert graph.edges[ChainBloq(1), ChainBloq(0)]['n'] == 2
+
+    graph, sigma = get_bloq_call_graph(ChainBloq(n), max_depth=3)
+    assert len(graph) == 4
+    assert sigma == {ChainBloq(n - 3): 8}
+
+
+def test_compute_sigma_numeric():
+    from qualtran.bloqs.chemistry.thc.prepare import _thc_prep
+
+    bloq = _thc_prep.make()
+    graph, sigma = get_bloq_call_graph(bloq)
+    numeric_sigma = _compute_sigma_numeric(bloq, graph)
+    assert numeric_sigma is not None
+    assert numeric_sigma == sigma
+    assert all(type(n) is int for n in numeric_sigma.values())
+
+    # Numeric and symbolic paths agree on a diamond with a zero-count edge.
+    c = OnlyCallGraphBloqShim('c')
+    d = OnlyCallGraphBloqShim('d')
+    b1 = OnlyCallGraphBloqShim('b1', callees=[(c, 3)])
+    b2 = OnlyCallGraphBloqShim('b2', callees=[(c, 5), (d, 0)])
+    a = OnlyCallGraphBloqShim('a', callees=[(b1, 2), (b2, 7)])
+    graph, sigma = get_bloq_call_graph(a)
+    assert sigma == {c: 41, d: 0}
+    assert _compute_sigma_numeric(a, graph) == sigma
+
+
+def test_compute_sigma_fallback():
+    n = sympy.Symbol('n')
+    c = OnlyCallGraphBloqShim('c')
+    b = OnlyCallGraphBloqShim('b', callees=[(c, n)])
+    a = OnlyCallGraphBloqShim('a', callees=[(b, 2), (c, 1)])
+    graph, sigma = get_bloq_call_graph(a)
+    assert _compute_sigma_numeric(a, graph) is None
+    assert sigma == {c: 2 * n + 1}
+
+    # Too large to be represented exactly as a float.
+    graph, _ = get_bloq_call_graph(ChainBloq(60))
+    assert _compute_sigma_numeric(ChainBloq(60), graph) is None
+    assert _compute_sigma(ChainBloq(60), graph) == {TGate(): 2**60}
+
+
+def test_iter_call_graph():
+    bloq, _ = make_diamond_graph()
+    edges = [(a.name, b.name, n) for a, b, n in iter_call_graph(bloq)]
+    assert edges == [('a', 'b1', 1), ('b1', 'c', 1), ('a', 'b2', 1), ('b2', 'c', 1)]
+    assert [(a.name, b.name) for a, b, _ in iter_call_graph(bloq, max_depth=1)] == [
+        ('a', 'b1'),
+        ('a', 'b2'),
+    ]
+
+    # Same edges as the materialized call graph.
+    graph, _ = get_bloq_call_graph(ChainBloq(5))
+    edges = list(iter_call_graph(ChainBloq(5)))
+    assert edges == list(graph.edges(data='n'))
+
+    # Without de-duplication, the graph is traversed as a tree.
+    assert len(list(iter_call_graph(bloq, dedup=False))) == 4
+    funnel, _ = make_funnel_graph()
+    assert len(list(iter_call_graph(funnel))) == 5
+    assert len(list(iter_call_graph(funnel, dedup=False))) == 6
+    assert [b for _, b, _ in iter_call_graph(ChainBloq(3), keep=lambda b: b == ChainBloq(1))] == [
+        ChainBloq(2),
+        ChainBloq(1),
+    ]
@@ -0,0 +1,267 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""A compact, integer-indexed representation of bloq call graphs."""
+import collections.abc
+from collections import deque
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+    Union,
+)
+
+import networkx as nx
+import numpy as np
+import sympy
+
+from ._call_graph import _walk_call_graph
+from ._generalization import _make_composite_generalizer
+
+if TYPE_CHECKING:
+    from qualtran import Bloq
+
+    from ._call_graph import BloqCountT
+    from ._generalization import GeneralizerT
+
+
+class CompactCallGraph:
+    """A call graph stored as a table of interned bloqs and compressed sparse rows of calls.
+
+    Each bloq is stored once, in `bloqs`, and is referred to by its index in this table. The
+    callees of bloq `i` are `indices[indptr[i]:indptr[i+1]]`, each called the corresponding
+    number of times in `counts[indptr[i]:indptr[i+1]]`. This takes memory proportional to the
+    number of nodes and edges without the per-node and per-edge dictionaries of a
+    `networkx.DiGraph`, and each bloq only needs to be hashed when it is first interned.
+
+    Use `get_compact_call_graph` to build one, and `to_networkx` to get a `networkx.DiGraph`
+    for drawing or analysis.
+
+    Args:
+        bloqs: The interned bloqs. The index of a bloq in this sequence is its node id.
+        indptr: Array of length `len(bloqs) + 1` of offsets into `indices` and `counts`.
+        indices: The node ids of the callees.
+        counts: The number of times each callee is called. This is an integer array if all
+            counts are integers that fit in 64 bits and an object array otherwise.
+        roots: The node ids of the bloqs the graph was built from.
+    """
+
+    def __init__(
+        self,
+        bloqs: Sequence['Bloq'],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        counts: np.ndarray,
+        roots: Sequence[int] = (),
+    ):
+        if len(indptr) != len(bloqs) + 1:
+            raise ValueError(f"Expected {len(bloqs) + 1} row offsets, got {len(indptr)}.")
+        if len(indices) != len(counts) or indptr[-1] != len(indices):
+            raise ValueError("`indices` and `counts` must have `indptr[-1]` entries.")
+        self.bloqs: Tuple['Bloq', ...] = tuple(bloqs)
+        self.indptr = indptr
+        self.indices = indices
+        self.counts = counts
+        self.roots: Tuple[int, ...] = tuple(roots)
+        self._ids: Optional[Dict['Bloq', int]] = None
+        self._nx_graph: Optional[nx.DiGraph] = None
+
+    @classmethod
+    def from_callee_lists(
+        cls,
+        bloqs: Sequence['Bloq'],
+        callees: Sequence[Sequence[Tuple[int, Union[int, sympy.Expr]]]],
+        roots: Sequence[int] = (),
+    ) -> 'CompactCallGraph':
+        """Build from a list of `(callee_id, n)` pairs for each bloq."""
+        indptr = np.zeros(len(bloqs) + 1, dtype=np.intp)
+        np.cumsum([len(cs) for cs in callees], out=indptr[1:])
+        indices = np.fromiter((j for cs in callees for j, _ in cs), dtype=np.intp)
+        count_list = [n for cs in callees for _, n in cs]
+        if all(isinstance(n, (int, np.integer)) and -(2**63) <= n < 2**63 for n in count_list):
+            counts = np.asarray(count_list, dtype=np.int64)
+        else:
+            counts = np.empty(len(count_list), dtype=object)
+            counts[:] = count_list
+        return cls(bloqs=bloqs, indptr=indptr, indices=indices, counts=counts, roots=roots)
+
+    @classmethod
+    def from_networkx(cls, g: nx.DiGraph, roots: Iterable['Bloq'] = ()) -> 'CompactCallGraph':
+        """Build from a call graph with edge attribute 'n', like from `get_bloq_call_graph`."""
+        bloqs = list(g.nodes)
+        ids = {bloq: i for i, bloq in enumerate(bloqs)}
+        callees = [
+            [(ids[callee], data['n']) for callee, data in g.succ[bloq].items()] for bloq in bloqs
+        ]
+        return cls.from_callee_lists(bloqs, callees, roots=[ids[root] for root in roots])
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.bloqs)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.indices)
+
+    def __len__(self) -> int:
+        return len(self.bloqs)
+
+    def __contains__(self, bloq: object) -> bool:
+        return bloq in self._id_table()
+
+    def _id_table(self) -> Dict['Bloq', int]:
+        if self._ids is None:
+            self._ids = {bloq: i for i, bloq in enumerate(self.bloqs)}
+        return self._ids
+
+    def index(self, bloq: 'Bloq') -> int:
+        """The node id of `bloq`."""
+        try:
+            return self._id_table()[bloq]
+        except KeyError:
+            raise ValueError(f"{bloq} is not in the call graph.") from None
+
+    def callee_ids(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """The node ids of the callees of node `i` and the number of times each is called."""
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:stop], self.counts[start:stop]
+
+    def callees(self, bloq: 'Bloq') -> List['BloqCountT']:
+        """The callees of `bloq` and the number of times each is called."""
+        ids, counts = self.callee_ids(self.index(bloq))
+        return [(self.bloqs[j], n) for j, n in zip(ids.tolist(), counts.tolist())]
+
+    def edges(self) -> Iterator[Tuple['Bloq', 'Bloq', Union[int, sympy.Expr]]]:
+        """Iterate over `(caller, callee, n)` for every call."""
+        callers = np.repeat(np.arange(len(self.bloqs)), np.diff(self.indptr))
+        for i, j, n in zip(callers.tolist(), self.indices.tolist(), self.counts.tolist()):
+            yield self.bloqs[i], self.bloqs[j], n
+
+    def to_networkx(self) -> nx.DiGraph:
+        """The call graph as a `networkx.DiGraph` with edge attribute 'n'.
+
+        The graph is constructed on first use and cached. Don't mutate it.
+        """
+        if self._nx_graph is None:
+            g = nx.DiGraph()
+            g.add_nodes_from(self.bloqs)
+            g.add_edges_from((caller, callee, {'n': n}) for caller, callee, n in self.edges())
+            self._nx_graph = g
+        return self._nx_graph
+
+    def sigma(self, root: Optional['Bloq'] = None) -> Dict['Bloq', Union[int, sympy.Expr]]:
+        """Call totals for the leaf bloqs reachable from `root`.
+
+        Args:
+            root: The bloq whose call totals to compute. By default, this is the sole root
+                the graph was built from.
+        """
+        if root is None:
+            if len(self.roots) != 1:
+                raise ValueError(f"Specify one of the {len(self.roots)} roots.")
+            root_id = self.roots[0]
+        else:
+            root_id = self.index(root)
+
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        counts = self.counts.tolist()
+
+        # Count the callers of each reachable node.
+        n_callers: Dict[int, int] = {root_id: 0}
+        todo = [root_id]
+        while todo:
+            i = todo.pop()
+            for j in indices[indptr[i] : indptr[i + 1]]:
+                if j not in n_callers:
+                    n_callers[j] = 0
+                    todo.append(j)
+                n_callers[j] += 1
+
+        # Propagate totals in topological order: a node's total is final once all of its
+        # callers have been processed.
+        totals: Dict[int, Union[int, sympy.Expr]] = {root_id: 1}
+        sigma: Dict['Bloq', Union[int, sympy.Expr]] = {}
+        queue = deque([root_id])
+        while queue:
+            i = queue.popleft()
+            start, stop = indptr[i], indptr[i + 1]
+            if start == stop:
+                sigma[self.bloqs[i]] = totals[i]
+                continue
+            for j, n in zip(indices[start:stop], counts[start:stop]):
+                totals[j] = totals.get(j, 0) + totals[i] * n
+                n_callers[j] -= 1
+                if n_callers[j] == 0:
+                    queue.append(j)
+        return sigma
+
+
+def get_compact_call_graph(
+    bloqs: Union['Bloq', Iterable['Bloq']],
+    generalizer: Optional[Union['GeneralizerT', Sequence['GeneralizerT']]] = None,
+    keep: Optional[Callable[['Bloq'], bool]] = None,
+    max_depth: Optional[int] = None,
+) -> CompactCallGraph:
+    """Build the (union of the) call graph(s) of one or more bloqs in compact form.
+
+    This visits bloqs in the same order as `get_bloq_call_graph` but stores the result as a
+    `CompactCallGraph`.
+
+    Args:
+        bloqs: The bloq, or bloqs, whose call graph to build.
+        generalizer: If provided, run this function on each (sub)bloq to replace attributes
+            that do not affect resource estimates. See `get_bloq_call_graph`.
+        keep: If this function evaluates to True for the current bloq, keep the bloq as a leaf
+            node in the call graph instead of recursing into it.
+        max_depth: If provided, build a call graph with at most this many layers.
+    """
+    from qualtran import Bloq
+
+    if isinstance(bloqs, Bloq):
+        bloqs = [bloqs]
+    if keep is None:
+        keep = lambda b: False
+    if generalizer is None:
+        generalizer = lambda b: b
+    if isinstance(generalizer, collections.abc.Sequence):
+        generalizer = _make_composite_generalizer(*generalizer)
+
+    ids: Dict['Bloq', int] = {}
+    table: List['Bloq'] = []
+    callee_lists: List[List[Tuple[int, Union[int, sympy.Expr]]]] = []
+
+    def _intern(bloq: 'Bloq') -> None:
+        ids[bloq] = len(table)
+        table.append(bloq)
+        callee_lists.append([])
+
+    roots = []
+    for bloq in bloqs:
+        root = generalizer(bloq)
+        if root is None:
+            raise ValueError("You can't generalize away the root bloq.")
+        for caller, callee, n in _walk_call_graph(
+            root, generalizer, keep, max_depth, 0, is_visited=ids.__contains__, mark_visited=_intern
+        ):
+            callee_lists[ids[caller]].append((ids[callee], n))
+        roots.append(ids[root])
+
+    return CompactCallGraph.from_callee_lists(table, callee_lists, roots=roots)
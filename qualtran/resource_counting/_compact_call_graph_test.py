@@ -0,0 +1,60 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import networkx as nx
+import numpy as np
+import pytest
+import sympy
+
+from qualtran.bloqs.basic_gates import TGate
+from qualtran.bloqs.chemistry.thc.prepare import _thc_prep
+from qualtran.resource_counting import CompactCallGraph, get_bloq_call_graph, get_compact_call_graph
+from qualtran.resource_counting._call_graph_test import ChainBloq, OnlyCallGraphBloqShim
+from qualtran.resource_counting.generalizers import ignore_split_join
+
+
+@pytest.mark.parametrize('max_depth', [None, 2])
+def test_compact_call_graph(max_depth):
+    bloq = _thc_prep.make()
+    g, sigma = get_bloq_call_graph(bloq, generalizer=ignore_split_join, max_depth=max_depth)
+    cg = get_compact_call_graph(bloq, generalizer=ignore_split_join, max_depth=max_depth)
+
+    assert cg.bloqs == tuple(g.nodes)
+    assert cg.n_edges == g.number_of_edges()
+    assert cg.counts.dtype == np.int64
+    assert cg.sigma() == sigma
+    assert nx.utils.edges_equal(cg.to_networkx().edges(data='n'), g.edges(data='n'))
+    assert cg.to_networkx() is cg.to_networkx()
+    for callee, n in cg.callees(bloq):
+        assert g.edges[bloq, callee]['n'] == n
+
+    cg2 = CompactCallGraph.from_networkx(g, roots=[bloq])
+    assert cg2.sigma() == sigma
+    np.testing.assert_array_equal(cg2.indptr, cg.indptr)
+
+
+def test_compact_call_graph_union():
+    n = sympy.Symbol('n')
+    c = OnlyCallGraphBloqShim('c', callees=[(TGate(), n)])
+    a = OnlyCallGraphBloqShim('a', callees=[(c, 2)])
+    cg = get_compact_call_graph([a, ChainBloq(70), c])
+    assert cg.roots == (0, 3, 1)
+    assert cg.counts.dtype == object
+    assert cg.sigma(a) == {TGate(): 2 * n}
+    assert cg.sigma(ChainBloq(70)) == {TGate(): 2**70}
+    assert TGate() in cg
+    with pytest.raises(ValueError, match='Specify one'):
+        cg.sigma()
+    with pytest.raises(ValueError, match='not in the call graph'):
+        cg.index(OnlyCallGraphBloqShim('x'))
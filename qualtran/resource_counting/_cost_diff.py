@@ -0,0 +1,225 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Compare the costs of two versions of a bloq."""
+import collections.abc
+from collections import defaultdict
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+    Union,
+)
+
+from attrs import field, frozen
+
+from qualtran._infra.decomposition_cache import memoize_decompositions
+from qualtran.symbolics import SymbolicInt
+
+from ._call_graph import get_bloq_callee_counts
+from ._costing import CostKey, get_cost_value
+from ._generalization import _make_composite_generalizer
+
+if TYPE_CHECKING:
+    from qualtran import Bloq
+
+    from ._generalization import GeneralizerT
+
+
+@frozen
+class CostDiff:
+    """The difference in cost between two bloqs, and the callees responsible for it.
+
+    `diff_costs` compares an `old` and a `new` bloq. Their callees are compared: callees that are
+    called the same number of times by both are identical subtrees and are omitted. Each
+    remaining callee is either called a different number of times, or is only called by one of
+    the bloqs. A callee of `old` that is replaced by a callee of `new` (of the same class, or
+    the only remaining callees on each side) is compared recursively, giving a tree of the
+    changes.
+
+    Args:
+        old: The old bloq, or `None` if `new` was added.
+        new: The new bloq, or `None` if `old` was removed.
+        old_cost: The cost of `old`, or zero if it is `None`.
+        new_cost: The cost of `new`, or zero if it is `None`.
+        n_old: The number of times the old parent calls `old`.
+        n_new: The number of times the new parent calls `new`.
+        children: The differences between the callees of `old` and `new`.
+    """
+
+    old: Optional['Bloq']
+    new: Optional['Bloq']
+    old_cost: Any
+    new_cost: Any
+    n_old: SymbolicInt = 1
+    n_new: SymbolicInt = 1
+    children: Tuple['CostDiff', ...] = field(converter=tuple, default=())
+
+    @property
+    def delta(self) -> Any:
+        """The change in cost contributed to the parent: `n_new * new_cost - n_old * old_cost`.
+
+        This is only meaningful for additive costs like gate counts. For other costs (e.g. qubit
+        counts), compare `old_cost` and `new_cost` directly.
+        """
+        return self.n_new * self.new_cost + (-self.n_old) * self.old_cost
+
+    def walk(self, depth: int = 0) -> Iterator[Tuple[int, 'CostDiff']]:
+        """Iterate over `(depth, diff)` for this difference and all its children, in pre-order."""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+    def _line(self) -> str:
+        if self.old is None:
+            return f'+ {self.n_new} x {self.new}: {self.new_cost}'
+        if self.new is None:
+            return f'- {self.n_old} x {self.old}: {self.old_cost}'
+        if self.old == self.new:
+            return f'~ {self.n_old} -> {self.n_new} x {self.new}: {self.new_cost}'
+        return (
+            f'~ {self.n_old} x {self.old} -> {self.n_new} x {self.new}: '
+            f'{self.old_cost} -> {self.new_cost}'
+        )
+
+    def __str__(self):
+        return '\n'.join('  ' * depth + diff._line() for depth, diff in self.walk())
+
+
+def _pair_callees(
+    old_only: Sequence[Tuple['Bloq', SymbolicInt]], new_only: Sequence[Tuple['Bloq', SymbolicInt]]
+) -> Tuple[
+    List[Tuple[Tuple['Bloq', SymbolicInt], Tuple['Bloq', SymbolicInt]]],
+    List[Tuple['Bloq', SymbolicInt]],
+    List[Tuple['Bloq', SymbolicInt]],
+]:
+    """Match up callees that were replaced, by class, in order."""
+    new_by_type: Dict[type, List[int]] = defaultdict(list)
+    for i, (bloq, _) in enumerate(new_only):
+        new_by_type[type(bloq)].append(i)
+
+    pairs = []
+    removed = []
+    paired = set()
+    for old_bn in old_only:
+        candidates = new_by_type.get(type(old_bn[0]))
+        if candidates:
+            i = candidates.pop(0)
+            paired.add(i)
+            pairs.append((old_bn, new_only[i]))
+        else:
+            removed.append(old_bn)
+    added = [new_bn for i, new_bn in enumerate(new_only) if i not in paired]
+
+    # If one callee was replaced by one callee of a different class, compare them.
+    if len(removed) == 1 and len(added) == 1:
+        pairs.append((removed.pop(), added.pop()))
+    return pairs, removed, added
+
+
+def diff_costs(
+    old: 'Bloq',
+    new: 'Bloq',
+    cost_key: CostKey,
+    generalizer: Optional[Union['GeneralizerT', Sequence['GeneralizerT']]] = None,
+    costs_cache: Optional[MutableMapping['Bloq', Any]] = None,
+    max_depth: Optional[int] = None,
+) -> CostDiff:
+    """Compare the costs of two versions of a bloq.
+
+    Both bloqs are costed with one `costs_cache`, and decompositions are memoized, so subtrees
+    that are shared between `old` and `new` are only decomposed and costed once. Only the
+    callees of bloqs that differ are expanded to find the subtrees responsible for each change.
+
+    >>> diff = diff_costs(ModExp(..., mult=...), ModExp(..., mult=...), QECGatesCost())
+    >>> print(diff)
+    >>> diff.delta
+
+    Args:
+        old: The old version of the bloq.
+        new: The new version of the bloq.
+        cost_key: The cost to compare.
+        generalizer: If provided, run this function on each bloq in the call graphs to
+            dynamically modify attributes. If the function returns `None`, the bloq is ignored.
+            If a sequence of generalizers is provided, each generalizer will be run in order.
+        costs_cache: If provided, a cache of cost values to use (and mutate).
+        max_depth: If provided, only compare callees up to this many layers deep.
+
+    Returns:
+        A `CostDiff` tree rooted at the pair `(old, new)`.
+    """
+    if generalizer is None:
+        generalizer = lambda b: b
+    if isinstance(generalizer, collections.abc.Sequence):
+        generalizer = _make_composite_generalizer(*generalizer)
+    if costs_cache is None:
+        costs_cache = {}
+
+    def _cost(bloq: Optional['Bloq']) -> Any:
+        if bloq is None:
+            return cost_key.zero()
+        return get_cost_value(bloq, cost_key, costs_cache=costs_cache, generalizer=generalizer)
+
+    def _diff(
+        old_bloq: Optional['Bloq'],
+        new_bloq: Optional['Bloq'],
+        n_old: SymbolicInt,
+        n_new: SymbolicInt,
+        depth: int,
+    ) -> CostDiff:
+        children: List[CostDiff] = []
+        if (
+            old_bloq is not None
+            and new_bloq is not None
+            and old_bloq != new_bloq
+            and (max_depth is None or depth < max_depth)
+        ):
+            old_callees = dict(get_bloq_callee_counts(old_bloq, generalizer=generalizer))
+            new_callees = dict(get_bloq_callee_counts(new_bloq, generalizer=generalizer))
+            for callee, n in old_callees.items():
+                if callee in new_callees and new_callees[callee] != n:
+                    children.append(_diff(callee, callee, n, new_callees[callee], depth + 1))
+            pairs, removed, added = _pair_callees(
+                [(b, n) for b, n in old_callees.items() if b not in new_callees],
+                [(b, n) for b, n in new_callees.items() if b not in old_callees],
+            )
+            for (ob, on), (nb, nn) in pairs:
+                children.append(_diff(ob, nb, on, nn, depth + 1))
+            for ob, on in removed:
+                children.append(_diff(ob, None, on, 0, depth + 1))
+            for nb, nn in added:
+                children.append(_diff(None, nb, 0, nn, depth + 1))
+
+        return CostDiff(
+            old=old_bloq,
+            new=new_bloq,
+            old_cost=_cost(old_bloq),
+            new_cost=_cost(new_bloq),
+            n_old=n_old,
+            n_new=n_new,
+            children=children,
+        )
+
+    old_root = generalizer(old)
+    new_root = generalizer(new)
+    if old_root is None or new_root is None:
+        raise ValueError("You can't generalize away the root bloq.")
+    with memoize_decompositions():
+        return _diff(old_root, new_root, 1, 1, 0)
@@ -0,0 +1,94 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import pytest
+
+from qualtran.bloqs.basic_gates import CNOT, Hadamard, TGate, Toffoli
+from qualtran.bloqs.for_testing.costing import CostingBloq
+from qualtran.resource_counting import (
+    CostDiff,
+    diff_costs,
+    GateCounts,
+    get_cost_value,
+    QECGatesCost,
+    QubitCount,
+)
+
+
+def _make_versions():
+    func1 = CostingBloq('Func1', num_qubits=10, callees=[(TGate(), 10), (Hadamard(), 10)])
+    func2 = CostingBloq('Func2', num_qubits=3, callees=[(Toffoli(), 100)])
+    func2_v2 = CostingBloq('Func2v2', num_qubits=3, callees=[(Toffoli(), 50), (CNOT(), 4)])
+    shared = CostingBloq('Shared', num_qubits=5, callees=[(func1, 7)])
+    old = CostingBloq('Algo', num_qubits=100, callees=[(func1, 2), (func2, 1), (shared, 1)])
+    new = CostingBloq('Algo', num_qubits=100, callees=[(func1, 3), (func2_v2, 1), (shared, 1)])
+    return old, new, func1, func2, func2_v2
+
+
+def test_diff_costs():
+    old, new, func1, func2, func2_v2 = _make_versions()
+    diff = diff_costs(old, new, QECGatesCost())
+
+    assert diff.old == old
+    assert diff.new == new
+    assert diff.old_cost == get_cost_value(old, QECGatesCost())
+    assert diff.new_cost == get_cost_value(new, QECGatesCost())
+    assert diff.delta == GateCounts(t=10, toffoli=-50, clifford=14)
+
+    # The shared subtree is omitted.
+    assert [(d.old, d.new, d.n_old, d.n_new) for d in diff.children] == [
+        (func1, func1, 2, 3),
+        (func2, func2_v2, 1, 1),
+    ]
+    func2_diff = diff.children[1]
+    assert func2_diff.children == (
+        CostDiff(Toffoli(), Toffoli(), GateCounts(toffoli=1), GateCounts(toffoli=1), 100, 50),
+        CostDiff(None, CNOT(), GateCounts(), GateCounts(clifford=1), 0, 4),
+    )
+    assert func2_diff.delta == GateCounts(toffoli=-50, clifford=4)
+    assert sum((d.delta for d in diff.children), GateCounts()) == diff.delta
+
+    assert str(diff) == '\n'.join(
+        [
+            '~ 1 x Algo -> 1 x Algo: t: 90, toffoli: 100, clifford: 90 -> '
+            't: 100, toffoli: 50, clifford: 104',
+            '  ~ 2 -> 3 x Func1: t: 10, clifford: 10',
+            '  ~ 1 x Func2 -> 1 x Func2v2: toffoli: 100 -> toffoli: 50, clifford: 4',
+            '    ~ 100 -> 50 x Toffoli: toffoli: 1',
+            '    + 4 x CNOT: clifford: 1',
+        ]
+    )
+
+
+def test_diff_costs_shared_cache():
+    old, new, func1, func2, func2_v2 = _make_versions()
+    costs_cache: dict = {}
+    diff = diff_costs(old, new, QubitCount(), costs_cache=costs_cache, max_depth=1)
+    assert diff.old_cost == diff.new_cost == 100
+    assert all(not d.children for d in diff.children)
+    assert func1 in costs_cache and func2 in costs_cache and func2_v2 in costs_cache
+
+
+def test_diff_costs_removed():
+    old = CostingBloq('Algo', num_qubits=1, callees=[(TGate(), 1), (Hadamard(), 2)])
+    new = CostingBloq('Algo2', num_qubits=1, callees=[(Toffoli(), 1)])
+    diff = diff_costs(old, new, QECGatesCost())
+    # Callees of different classes are only compared if they're the only changes.
+    assert [(d.old, d.new) for d in diff.children] == [
+        (TGate(), None),
+        (Hadamard(), None),
+        (None, Toffoli()),
+    ]
+
+    with pytest.raises(ValueError):
+        diff_costs(old, new, QECGatesCost(), generalizer=lambda b: None)
@@ -14,6 +14,8 @@
 
 import abc
 import collections
+import concurrent.futures
+import contextvars
 import logging
 import time
 from collections import defaultdict
@@ -22,6 +24,9 @@ from typing import (
     Dict,
     Generic,
     Iterable,
+    List,
+    Mapping,
+    MutableMapping,
     Optional,
     Sequence,
     TYPE_CHECKING,
@@ -29,11 +34,17 @@ from typing import (
     Union,
 )
 
+import networkx as nx
+
 from qualtran import CompositeBloq
+from qualtran._infra.decomposition_cache import memoize_decompositions
 
 from ._generalization import _make_composite_generalizer, GeneralizerT
+from ._profiling import get_active_cost_profile
 
 if TYPE_CHECKING:
+    import pandas as pd
+
     from qualtran import Bloq
 
 logger = logging.getLogger(__name__)
@@ -102,7 +113,7 @@ def _get_cost_value(
     bloq: 'Bloq',
     cost_key: CostKey[CostValT],
     *,
-    costs_cache: Dict['Bloq', CostValT],
+    costs_cache: MutableMapping['Bloq', CostValT],
     generalizer: 'GeneralizerT',
 ) -> CostValT:
     """Helper function for getting costs.
@@ -123,16 +134,24 @@ def _get_cost_value(
     if bloq is None:
         return cost_key.zero()
 
+    profile = get_active_cost_profile()
+
     # Strategy 1: Use cached value
     if not isinstance(bloq, CompositeBloq) and bloq in costs_cache:
         logger.debug("Using cached %s for %s", cost_key, bloq)
+        if profile is not None:
+            profile.record_cache_hit(bloq)
         return costs_cache[bloq]
+    if profile is not None and not isinstance(bloq, CompositeBloq):
+        profile.record_cache_miss(bloq)
 
     # Strategy 2: Static costs
     static_cost = bloq.my_static_costs(cost_key)
     if static_cost is not NotImplemented:
         cost_key.validate_val(static_cost)
         logger.info("Using static %s for %s", cost_key, bloq)
+        if profile is not None:
+            profile.record_static(bloq)
         costs_cache[bloq] = static_cost
         return static_cost
 
@@ -143,7 +162,11 @@ def _get_cost_value(
 
     # part b. call the compute method and cache the result.
     tstart = time.perf_counter()
-    computed_cost = cost_key.compute(bloq, _get_cost_val_internal)
+    if profile is None:
+        computed_cost = cost_key.compute(bloq, _get_cost_val_internal)
+    else:
+        with profile.time_compute(bloq):
+            computed_cost = cost_key.compute(bloq, _get_cost_val_internal)
     tdur = time.perf_counter() - tstart
     logger.info("Computed %s for %s in %g s", cost_key, bloq, tdur)
     if not isinstance(bloq, CompositeBloq):
@@ -151,11 +174,84 @@ def _get_cost_value(
     return computed_cost
 
 
+def _compute_cost_value_in_worker(
+    bloq: 'Bloq',
+    cost_key: CostKey[CostValT],
+    callee_costs: Dict['Bloq', CostValT],
+    generalizer: Optional[Union['GeneralizerT', Sequence['GeneralizerT']]],
+) -> CostValT:
+    """Compute the cost of one bloq given the (already computed) costs of its callees.
+
+    This is the unit of work submitted to an executor by `_populate_costs_cache_concurrently`.
+    It must be a module-level function so it can be pickled for use with process pools.
+    """
+    return get_cost_value(bloq, cost_key, costs_cache=dict(callee_costs), generalizer=generalizer)
+
+
+def _populate_costs_cache_concurrently(
+    bloq: 'Bloq',
+    cost_key: CostKey[CostValT],
+    costs_cache: MutableMapping['Bloq', CostValT],
+    generalizer: Optional[Union['GeneralizerT', Sequence['GeneralizerT']]],
+    executor: concurrent.futures.Executor,
+) -> None:
+    """Compute costs for the call graph of `bloq` level-by-level using `executor`.
+
+    We first build the call graph of `bloq`, stopping at bloqs with static costs for
+    `cost_key`. Then, we visit the topological generations of the call graph from the leaves
+    upwards. The bloqs in each generation do not call each other, so their costs are computed
+    concurrently. Each task is provided the costs of the bloq's callees, and results are merged
+    into `costs_cache` before the next generation is started.
+
+    This only warms `costs_cache`: if the cost of a bloq can't be computed on a worker, it is
+    skipped here and any errors will be raised when the cost is computed (serially) afterwards.
+    """
+    from ._call_graph import get_bloq_call_graph
+
+    gen_f = generalizer
+    if gen_f is None:
+        gen_f = lambda b: b
+    if isinstance(gen_f, collections.abc.Sequence):
+        gen_f = _make_composite_generalizer(*gen_f)
+    if gen_f(bloq) is None:
+        return
+
+    g, _ = get_bloq_call_graph(
+        bloq,
+        generalizer=generalizer,
+        keep=lambda b: b.my_static_costs(cost_key) is not NotImplemented,
+    )
+    for generation in reversed(list(nx.topological_generations(g))):
+        futures = {}
+        for node in generation:
+            if isinstance(node, CompositeBloq) or node in costs_cache:
+                continue
+            callee_costs = {
+                callee: costs_cache[callee] for callee in g.succ[node] if callee in costs_cache
+            }
+            task = (_compute_cost_value_in_worker, node, cost_key, callee_costs, generalizer)
+            if isinstance(executor, concurrent.futures.ThreadPoolExecutor):
+                # Run in a copy of the current context so the thread uses the same active
+                # decomposition cache and cost profile.
+                fut = executor.submit(contextvars.copy_context().run, *task)
+            else:
+                fut = executor.submit(*task)
+            futures[fut] = node
+
+        for fut in concurrent.futures.as_completed(futures):
+            node = futures[fut]
+            try:
+                costs_cache[node] = fut.result()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.info("Could not concurrently compute %s for %s: %s", cost_key, node, e)
+
+
 def get_cost_value(
     bloq: 'Bloq',
     cost_key: CostKey[CostValT],
-    costs_cache: Optional[Dict['Bloq', CostValT]] = None,
+    costs_cache: Optional[MutableMapping['Bloq', CostValT]] = None,
     generalizer: Optional[Union['GeneralizerT', Sequence['GeneralizerT']]] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
 ) -> CostValT:
     """Compute the specified cost of the provided bloq.
 
@@ -164,17 +260,25 @@ def get_cost_value(
         cost_key: A CostKey that specifies which cost to compute.
         costs_cache: If provided, use this dictionary of cached cost values. Values in this
             dictionary will be preferred over computed values (even if they disagree). This
-            dictionary will be mutated by the function.
+            dictionary will be mutated by the function. A `PersistentCostsCache` can be
+            provided to re-use values across processes.
         generalizer: If provided, run this function on each bloq in the call graph to dynamically
             modify attributes. If the function returns `None`, the bloq is ignored in the
             cost computation. If a sequence of generalizers is provided, each generalizer
             will be run in order.
+        executor: If provided, first compute the costs of the bloqs in the call graph
+            level-by-level (from the leaves upwards), using this `concurrent.futures.Executor`
+            to compute the costs of independent bloqs concurrently. With a
+            `ProcessPoolExecutor`, the bloqs, `cost_key`, and `generalizer` must be picklable
+            (e.g. module-level generalizer functions).
 
     Returns:
         The cost value. Its type depends on the provided `cost_key`.
     """
     if costs_cache is None:
         costs_cache = {}
+    if executor is not None:
+        _populate_costs_cache_concurrently(bloq, cost_key, costs_cache, generalizer, executor)
     if generalizer is None:
         generalizer = lambda b: b
     if isinstance(generalizer, collections.abc.Sequence):
@@ -187,9 +291,10 @@ def get_cost_value(
 def get_cost_cache(
     bloq: 'Bloq',
     cost_key: CostKey[CostValT],
-    costs_cache: Optional[Dict['Bloq', CostValT]] = None,
+    costs_cache: Optional[MutableMapping['Bloq', CostValT]] = None,
     generalizer: Optional[Union['GeneralizerT', Sequence['GeneralizerT']]] = None,
-) -> Dict['Bloq', CostValT]:
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> MutableMapping['Bloq', CostValT]:
     """Build a cache of cost values for the bloq and its callees.
 
     This can be useful to inspect how callees' costs flow upwards in a given cost computation.
@@ -205,6 +310,11 @@ def get_cost_cache(
             modify attributes. If the function returns `None`, the bloq is ignored in the
             cost computation. If a sequence of generalizers is provided, each generalizer
             will be run in order.
+        executor: If provided, first compute the costs of the bloqs in the call graph
+            level-by-level (from the leaves upwards), using this `concurrent.futures.Executor`
+            to compute the costs of independent bloqs concurrently. With a
+            `ProcessPoolExecutor`, the bloqs, `cost_key`, and `generalizer` must be picklable
+            (e.g. module-level generalizer functions).
 
     Returns:
         A dictionary mapping bloqs to cost values. The value type depends on the `cost_key`.
@@ -212,6 +322,8 @@ def get_cost_cache(
     """
     if costs_cache is None:
         costs_cache = {}
+    if executor is not None:
+        _populate_costs_cache_concurrently(bloq, cost_key, costs_cache, generalizer, executor)
     if generalizer is None:
         generalizer = lambda b: b
     if isinstance(generalizer, collections.abc.Sequence):
@@ -225,6 +337,7 @@ def query_costs(
     bloq: 'Bloq',
     cost_keys: Iterable[CostKey],
     generalizer: Optional[Union['GeneralizerT', Sequence['GeneralizerT']]] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
 ) -> Dict['Bloq', Dict[CostKey, CostValT]]:
     """Compute a selection of costs for a bloq and its callees.
 
@@ -232,6 +345,9 @@ def query_costs(
     for each bloq. Specifically, the return value of this function can be used as the
     `bloq_data` argument to `GraphvizCallGraph`.
 
+    Bloq decompositions and callees are shared between the cost computations, so each
+    bloq is decomposed at most once regardless of the number of cost keys.
+
     Args:
         bloq: The bloq to seed the cost computation.
         cost_keys: A sequence of CostKey that specifies which costs to compute.
@@ -239,14 +355,83 @@ def query_costs(
             modify attributes. If the function returns `None`, the bloq is ignored in the
             cost computation. If a sequence of generalizers is provided, each generalizer
             will be run in order.
+        executor: If provided, use this `concurrent.futures.Executor` to compute the costs
+            of independent bloqs concurrently. See `get_cost_value`.
 
     Returns:
         A dictionary of dictionaries forming a table of multiple costs for multiple bloqs.
         This is indexed by bloq, then cost key.
     """
     costs: Dict['Bloq', Dict[CostKey, CostValT]] = defaultdict(dict)
-    for cost_key in cost_keys:
-        cost_for_bloqs = get_cost_cache(bloq, cost_key, generalizer=generalizer)
-        for bloq, val in cost_for_bloqs.items():
-            costs[bloq][cost_key] = val
+    # Each cost key traverses the same call graph. Memoize decompositions and callees
+    # so each bloq is only decomposed once.
+    with memoize_decompositions():
+        for cost_key in cost_keys:
+            cost_for_bloqs = get_cost_cache(
+                bloq, cost_key, generalizer=generalizer, executor=executor
+            )
+            for callee, val in cost_for_bloqs.items():
+                costs[callee][cost_key] = val
     return dict(costs)
+
+
+def get_cost_values(
+    bloqs: Iterable['Bloq'],
+    cost_keys: Iterable[CostKey],
+    costs_caches: Optional[Mapping[CostKey, MutableMapping['Bloq', CostValT]]] = None,
+    generalizer: Optional[Union['GeneralizerT', Sequence['GeneralizerT']]] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> 'pd.DataFrame':
+    """Compute a selection of costs for each of many bloqs.
+
+    Costing many variants of a bloq (e.g. all the bloq examples, or a bloq over a grid of
+    parameters) one at a time with `get_cost_value` computes the costs of their common
+    sub-bloqs over and over. Here, each cost key uses one cache for the whole batch, and bloq
+    decompositions and callees are shared between all the bloqs and cost keys, so each distinct
+    (generalized) sub-bloq is decomposed and costed at most once.
+
+    >>> bloqs = [SelectSwapQROM(data).with_log_block_sizes(k) for k in range(5)]
+    >>> df = get_cost_values(bloqs, [QECGatesCost(), QubitCount()])
+
+    Args:
+        bloqs: The bloqs to compute the costs of.
+        cost_keys: A sequence of CostKey that specifies which costs to compute.
+        costs_caches: If provided, a cache of cost values to use (and mutate) for each cost key.
+            Cost keys missing from this mapping get a new, empty cache. A
+            `PersistentCostsCache` can be provided to re-use values across processes.
+        generalizer: If provided, run this function on each bloq in the call graph to dynamically
+            modify attributes. If the function returns `None`, the bloq is ignored in the
+            cost computation. If a sequence of generalizers is provided, each generalizer
+            will be run in order.
+        executor: If provided, use this `concurrent.futures.Executor` to compute the costs
+            of independent bloqs concurrently. See `get_cost_value`.
+
+    Returns:
+        A pandas DataFrame with one row per bloq, in order. The 'bloq' column contains the bloq
+        and there is a column of cost values named `str(cost_key)` for each cost key.
+    """
+    import pandas as pd
+
+    bloqs = list(bloqs)
+    cost_keys = list(cost_keys)
+    names = [str(cost_key) for cost_key in cost_keys]
+    if len(set(names)) != len(names) or 'bloq' in names:
+        raise ValueError(f"Cost keys must have distinct names other than 'bloq', got {names}.")
+
+    columns: Dict[str, List[CostValT]] = {}
+    with memoize_decompositions():
+        for cost_key, name in zip(cost_keys, names):
+            costs_cache: MutableMapping['Bloq', CostValT] = {}
+            if costs_caches is not None and cost_key in costs_caches:
+                costs_cache = costs_caches[cost_key]
+            columns[name] = [
+                get_cost_value(
+                    bloq,
+                    cost_key,
+                    costs_cache=costs_cache,
+                    generalizer=generalizer,
+                    executor=executor,
+                )
+                for bloq in bloqs
+            ]
+    return pd.DataFrame({'bloq': bloqs, **columns})
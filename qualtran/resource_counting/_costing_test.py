@@ -12,46 +12,31 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from typing import Callable, List
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import attrs
+import pytest
 
-from qualtran import Bloq
+from qualtran import disable_decomposition_cache, get_decomposition_cache
 from qualtran.bloqs.basic_gates import Hadamard, TGate
-from qualtran.bloqs.for_testing.costing import CostingBloq, make_example_costing_bloqs
+from qualtran.bloqs.for_testing.costing import CostingBloq, make_example_costing_bloqs, TestCostKey
+from qualtran.bloqs.for_testing.with_decomposition import TestCNOTDecomp
 from qualtran.resource_counting import (
-    CostKey,
+    GateCounts,
     get_bloq_callee_counts,
     get_cost_cache,
     get_cost_value,
+    get_cost_values,
+    QECGatesCost,
+    QubitCount,
+    query_costs,
+    SuccessProb,
 )
 from qualtran.resource_counting.generalizers import generalize_rotation_angle
 
 
-class TestCostKey(CostKey[int]):
-    def __init__(self):
-        # For testing, keep a log of all the bloqs for which we called 'compute' on.
-        self._log: List[Bloq] = []
-
-    def compute(self, bloq: 'Bloq', get_callee_cost: Callable[['Bloq'], int]) -> int:
-        self._log.append(bloq)
-
-        total = 1
-        for callee, n_times_called in get_bloq_callee_counts(bloq):
-            total += n_times_called * get_callee_cost(callee)
-
-        return total
-
-    def zero(self) -> int:
-        return 0
-
-    def __hash__(self):
-        return hash(self.__class__)
-
-    def __eq__(self, other):
-        return isinstance(other, self.__class__)
-
-
 def test_get_cost_value_caching():
     cost = TestCostKey()
     algo = make_example_costing_bloqs()
@@ -109,3 +94,87 @@ def test_costs_generalizer():
     assert TGate() in cost_cache_gen
     assert TGate().adjoint() not in cost_cache_gen
     assert cost_cache_gen[algo] == 3
+
+
+@pytest.mark.parametrize(
+    'executor_cls',
+    [
+        ThreadPoolExecutor,
+        pytest.param(
+            functools.partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context('spawn')),
+            marks=pytest.mark.slow,
+        ),
+    ],
+)
+def test_get_cost_value_executor(executor_cls):
+    algo = make_example_costing_bloqs()
+    expected = get_cost_cache(algo, QECGatesCost(), generalizer=generalize_rotation_angle)
+
+    with executor_cls(max_workers=2) as executor:
+        cache = get_cost_cache(
+            algo, QECGatesCost(), generalizer=generalize_rotation_angle, executor=executor
+        )
+    assert cache == expected
+
+    with executor_cls(max_workers=2) as executor:
+        costs = query_costs(algo, [QECGatesCost(), QubitCount()], executor=executor)
+    assert costs[algo][QECGatesCost()] == expected[algo]
+    assert costs[algo][QubitCount()] == 100
+
+
+def test_get_cost_value_executor_static():
+    algo = make_example_costing_bloqs()
+    func1 = algo.callees[0][0]
+    func1_mod = attrs.evolve(func1, static_costs=[(TestCostKey(), 123)])
+    algo_mod = attrs.evolve(algo, callees=[(func1_mod, 1), algo.callees[1]])
+
+    cost = TestCostKey()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert get_cost_value(algo_mod, cost, executor=executor) == 1 + 123 + 101
+    assert TGate().adjoint() not in cost._log
+    assert Hadamard() not in cost._log
+
+
+def test_query_costs_decomposes_once(decomposed_bloqs):
+    bloq = TestCNOTDecomp()
+    with disable_decomposition_cache():
+        _ = query_costs(bloq, [QECGatesCost(), QubitCount(), SuccessProb()])
+    assert decomposed_bloqs == [bloq]
+
+    get_decomposition_cache().clear()
+    decomposed_bloqs.clear()
+    costs = query_costs(bloq, [QECGatesCost(), QubitCount(), SuccessProb()])
+    assert costs[bloq][QECGatesCost()] == GateCounts(clifford=1)
+    assert costs[bloq][QubitCount()] == 2
+    assert costs[bloq][SuccessProb()] == 1.0
+    assert decomposed_bloqs == [bloq]
+
+
+def test_get_cost_values():
+    algo = make_example_costing_bloqs()
+    bloqs = [algo, TGate(), algo] + [callee for callee, _ in get_bloq_callee_counts(algo)]
+    cost = TestCostKey()
+    caches = {cost: {}}
+    df = get_cost_values(bloqs, [cost, QECGatesCost()], costs_caches=caches)
+
+    assert list(df.columns) == ['bloq', str(cost), 'gate counts']
+    assert df['bloq'].tolist() == bloqs
+    assert df[str(cost)].tolist() == [get_cost_value(bloq, TestCostKey()) for bloq in bloqs]
+    assert df['gate counts'][0] == get_cost_value(algo, QECGatesCost())
+
+    # Each distinct sub-bloq is costed once for the whole batch, using the provided cache.
+    assert len(cost._log) == len(set(cost._log))
+    assert set(caches[cost].keys()) == set(cost._log)
+
+    with pytest.raises(ValueError):
+        get_cost_values(bloqs, [QubitCount(), QubitCount()])
+
+
+def test_get_cost_values_decomposes_once(decomposed_bloqs):
+    get_decomposition_cache().clear()
+    bloqs = [TestCNOTDecomp(tag=1), TestCNOTDecomp(tag=2), TestCNOTDecomp(tag=1)]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        df = get_cost_values(bloqs, [QECGatesCost(), QubitCount()], executor=executor)
+    assert df['qubit count'].tolist() == [2, 2, 2]
+    assert df['gate counts'].tolist() == [GateCounts(clifford=1)] * 3
+    assert sorted(b.tag for b in decomposed_bloqs) == [1, 2]
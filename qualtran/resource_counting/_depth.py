@@ -0,0 +1,154 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import logging
+from typing import Callable, Dict, Union
+
+import networkx as nx
+from attrs import field, frozen
+from attrs.validators import in_
+
+from qualtran import Bloq, BloqInstance, DanglingT, DecomposeNotImplementedError, DecomposeTypeError
+from qualtran._infra.binst_graph import as_binst_graph, BinstGraph
+from qualtran._infra.composite_bloq import CompositeBloq
+from qualtran.symbolics import is_zero, smax, SymbolicInt
+
+from ._bloq_counts import _qec_gates_leaf_counts, GateCounts, QECGatesCost
+from ._call_graph import get_bloq_callee_counts
+from ._costing import CostKey
+
+logger = logging.getLogger(__name__)
+
+
+def _cbloq_depth(
+    binst_graph: Union[BinstGraph, nx.DiGraph],
+    _bloq_depth: Callable[[Bloq], SymbolicInt] = lambda b: 0,
+    time_optimal: bool = True,
+) -> SymbolicInt:
+    """Get the depth of a composite bloq.
+
+    With `time_optimal`, each binst starts as soon as all its predecessors are done, and
+    the depth is the length of the longest (critical) path through the dataflow graph where
+    each binst has length `_bloq_depth(binst.bloq)`. Otherwise, the binsts are executed
+    one after the other and the depth is the sum of their depths.
+    """
+    binst_graph = as_binst_graph(binst_graph)
+    if not time_optimal:
+        return sum(
+            (_bloq_depth(binst.bloq) for binst in binst_graph if not isinstance(binst, DanglingT)),
+            0,
+        )
+
+    max_depth: SymbolicInt = 0
+    end_depths: Dict[BloqInstance, SymbolicInt] = {}
+    for binst in binst_graph.topological_sort():
+        preds = binst_graph.preds(binst)
+        start: SymbolicInt = smax([end_depths[pred] for pred in preds]) if preds else 0
+        if isinstance(binst, DanglingT):
+            end = start
+        else:
+            end = start + _bloq_depth(binst.bloq)
+        end_depths[binst] = end
+        max_depth = smax(max_depth, end)
+    return max_depth
+
+
+@frozen
+class Depth(CostKey[SymbolicInt]):
+    """A cost estimating the depth of a bloq, in layers of gates.
+
+    The leaf bloqs are those counted by `QECGatesCost`. Each leaf bloq counted by `gateset`
+    takes one layer; the other leaf bloqs (and bookkeeping bloqs, states, and effects) take
+    none. Depending on `gateset`, this is:
+     - 'all': the depth in layers of any non-trivial gate.
+     - 't': the T-depth. Note that Toffoli, `And`, and CSwap bloqs are leaves of
+       `QECGatesCost`, so their T gates are not counted.
+     - 'toffoli': the depth in layers of Toffoli, `And`, and CSwap bloqs.
+
+    The depth of other bloqs is computed from their decomposition according to `schedule`:
+     - 'time': The time-optimal schedule. Each subbloq is executed as soon as its inputs are
+       available, so the depth is the length of the longest path (the "critical path") through
+       the dataflow graph of the decomposition, where each subbloq's length is its depth
+       (computed recursively). This may require more qubits than `QubitCount` reports, since
+       that assumes a serial execution.
+     - 'space': The space-optimal schedule. Subbloqs are executed one after the other, matching
+       the assumptions of `QubitCount`, so the depth is the sum of the subbloqs' depths.
+
+    Bloqs that don't have a decomposition but do have callees carry no information about which
+    callees can run in parallel, so their depth is the sum of their callees' depths for
+    either schedule. For the time-optimal schedule, this is an upper bound.
+
+    Args:
+        gateset: The leaf bloqs that take a layer: 'all', 't', or 'toffoli'.
+        schedule: 'time' for the time-optimal (parallel) schedule or 'space' for the
+            space-optimal (serial) schedule.
+    """
+
+    gateset: str = field(default='all', validator=in_(['all', 't', 'toffoli']))
+    schedule: str = field(default='time', validator=in_(['time', 'space']))
+
+    def _leaf_depth(self, counts: GateCounts) -> int:
+        if self.gateset == 't':
+            takes_layer = not is_zero(counts.t)
+        elif self.gateset == 'toffoli':
+            takes_layer = not all(
+                is_zero(n) for n in [counts.toffoli, counts.and_bloq, counts.cswap]
+            )
+        else:
+            takes_layer = counts != GateCounts()
+        return 1 if takes_layer else 0
+
+    def compute(
+        self, bloq: 'Bloq', get_callee_cost: Callable[['Bloq'], SymbolicInt]
+    ) -> SymbolicInt:
+        """Compute an estimate of the depth of `bloq`.
+
+        See the class docstring for more information.
+        """
+        leaf_counts = _qec_gates_leaf_counts(bloq, QECGatesCost())
+        if leaf_counts is not None:
+            return self._leaf_depth(leaf_counts)
+
+        time_optimal = self.schedule == 'time'
+        if isinstance(bloq, CompositeBloq):
+            logger.info("Computing %s by the passed-in CompositeBloq", self)
+            return _cbloq_depth(
+                bloq._compact_binst_graph, get_callee_cost, time_optimal=time_optimal
+            )
+        try:
+            cbloq = bloq.decompose_bloq()
+            logger.info("Computing %s for %s from its decomposition", self, bloq)
+            return _cbloq_depth(
+                cbloq._compact_binst_graph, get_callee_cost, time_optimal=time_optimal
+            )
+        except (DecomposeNotImplementedError, DecomposeTypeError):
+            pass
+
+        # Fallback:
+        # Without a decomposition, we don't know which callees can be executed in parallel.
+        callees = get_bloq_callee_counts(bloq)
+        logger.info("Computing %s for %s from %d callee(s)", self, bloq, len(callees))
+        tot: SymbolicInt = 0
+        for callee, n in callees:
+            tot += n * get_callee_cost(callee)
+        return tot
+
+    def zero(self) -> SymbolicInt:
+        """Zero cost is zero layers."""
+        return 0
+
+    def __str__(self):
+        name = {'all': 'depth', 't': 't depth', 'toffoli': 'toffoli depth'}[self.gateset]
+        if self.schedule == 'space':
+            return f'{name} (serial)'
+        return name
@@ -0,0 +1,82 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import pytest
+import sympy
+
+from qualtran import BloqBuilder, QUInt
+from qualtran.bloqs.arithmetic import Add
+from qualtran.bloqs.basic_gates import CNOT, Hadamard, TGate, Toffoli
+from qualtran.bloqs.mcmt import MultiAnd
+from qualtran.resource_counting import Depth, get_cost_value
+from qualtran.resource_counting._depth import _cbloq_depth
+
+
+def _make_t_layers():
+    bb = BloqBuilder()
+    q0 = bb.add(TGate(), q=bb.add_register('q0', 1))
+    q1 = bb.add(TGate(), q=bb.add_register('q1', 1))
+    q2 = bb.add(Hadamard(), q=bb.add_register('q2', 1))
+    q0, q1 = bb.add(CNOT(), ctrl=q0, target=q1)
+    q0 = bb.add(TGate(), q=q0)
+    return bb.finalize(q0=q0, q1=q1, q2=q2)
+
+
+def test_depth_time_vs_space():
+    cbloq = _make_t_layers()
+    assert get_cost_value(cbloq, Depth()) == 3
+    assert get_cost_value(cbloq, Depth(schedule='space')) == 5
+    assert get_cost_value(cbloq, Depth('t')) == 2
+    assert get_cost_value(cbloq, Depth('t', schedule='space')) == 3
+    assert get_cost_value(cbloq, Depth('toffoli')) == 0
+
+
+def test_depth_leaves():
+    assert get_cost_value(Toffoli(), Depth()) == 1
+    assert get_cost_value(Toffoli(), Depth('t')) == 0
+    assert get_cost_value(Toffoli(), Depth('toffoli')) == 1
+    assert get_cost_value(Hadamard(), Depth('t')) == 0
+
+
+def test_depth_recursive():
+    # The `And`s of a `MultiAnd` form a chain.
+    assert get_cost_value(MultiAnd(cvs=(1,) * 5), Depth('toffoli')) == 4
+
+    add = Add(QUInt(8))
+    assert get_cost_value(add, Depth('toffoli')) == 7
+    assert get_cost_value(add, Depth()) < get_cost_value(add, Depth(schedule='space'))
+
+
+def test_depth_symbolic():
+    n = sympy.Symbol('n', positive=True, integer=True)
+    # Without a decomposition, callees are assumed to be executed serially.
+    assert get_cost_value(Add(QUInt(n)), Depth('toffoli')) == n - 1
+
+
+def test_cbloq_depth_symbolic():
+    cbloq = _make_t_layers()
+    a, b = sympy.symbols('a b', positive=True)
+    depths = {TGate(): a, Hadamard(): b, CNOT(): 1}
+    depth = _cbloq_depth(cbloq._binst_graph, lambda bloq: depths[bloq])
+    assert depth == sympy.Max(2 * a + 1, b)
+    depth = _cbloq_depth(cbloq._binst_graph, lambda bloq: depths[bloq], time_optimal=False)
+    assert depth == 3 * a + b + 1
+
+
+def test_depth_str():
+    assert str(Depth()) == 'depth'
+    assert str(Depth('t', schedule='space')) == 't depth (serial)'
+    with pytest.raises(ValueError):
+        Depth('cnot')
+    with pytest.raises(ValueError):
+        Depth(schedule='fast')
@@ -11,22 +11,78 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
-from typing import Callable, Optional, TYPE_CHECKING
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple, TYPE_CHECKING, TypeVar
 
 if TYPE_CHECKING:
     from qualtran import Bloq
 
 GeneralizerT = Callable[['Bloq'], Optional['Bloq']]
 
+_K = TypeVar('_K', bound=Hashable)
+_V = TypeVar('_V')
 
-def _make_composite_generalizer(*funcs: 'GeneralizerT') -> 'GeneralizerT':
-    """Return a generalizer that calls each `*funcs` generalizers in order."""
 
-    def _composite_generalize(b: Optional['Bloq']) -> Optional['Bloq']:
+def _lru_get(memo: 'OrderedDict[_K, _V]', key: _K) -> _V:
+    """Look up `key` in `memo`, marking it as most recently used. Raises `KeyError`."""
+    val = memo[key]
+    memo.move_to_end(key)
+    return val
+
+
+def _lru_set(memo: 'OrderedDict[_K, _V]', key: _K, val: _V, maxsize: Optional[int]) -> None:
+    """Add `key` to `memo`, evicting the least recently used entry if it is full."""
+    memo[key] = val
+    if maxsize is not None and len(memo) > maxsize:
+        memo.popitem(last=False)
+
+
+def _make_composite_generalizer(
+    *funcs: 'GeneralizerT', maxsize: Optional[int] = 1024
+) -> 'GeneralizerT':
+    """Return a generalizer that calls each `*funcs` generalizers in order.
+
+    The generalizers are fused into one function that memoizes its results, so each distinct
+    bloq is generalized once while it is in the memo. Bloqs are looked up by identity first,
+    which avoids hashing bloqs that are seen again (e.g. the callees returned from a cached
+    decomposition), and then by value. Generalizers must be pure functions of the bloq for
+    this to be valid.
+
+    Args:
+        *funcs: The generalizers.
+        maxsize: The maximum number of bloqs to memoize (by identity and by value, each), or
+            `None` for no limit. The least recently used entries are evicted first.
+    """
+    if not funcs:
+        return lambda b: b
+
+    def _generalize(b: Optional['Bloq']) -> Optional['Bloq']:
         for func in funcs:
             if b is None:
                 return None
             b = func(b)
         return b
 
+    # Results by id(bloq). We keep a reference to each bloq so that its id is not re-used
+    # while it is in the memo.
+    by_id: 'OrderedDict[int, Tuple[Optional[Bloq], Optional[Bloq]]]' = OrderedDict()
+    by_value: 'OrderedDict[Optional[Bloq], Optional[Bloq]]' = OrderedDict()
+
+    def _composite_generalize(b: Optional['Bloq']) -> Optional['Bloq']:
+        try:
+            return _lru_get(by_id, id(b))[1]
+        except KeyError:
+            pass
+
+        try:
+            result = _lru_get(by_value, b)
+        except KeyError:
+            result = _generalize(b)
+            _lru_set(by_value, b, result, maxsize)
+        except TypeError:
+            # Unhashable bloq.
+            return _generalize(b)
+        _lru_set(by_id, id(b), (b, result), maxsize)
+        return result
+
     return _composite_generalize
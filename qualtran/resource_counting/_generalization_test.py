@@ -44,3 +44,50 @@ def test_make_composite_generalizer():
     assert g01(b) is None
     assert g11(b) is None
     assert g11_r(b) is None
+
+
+def test_composite_generalizer_memoizes():
+    calls = []
+
+    def func(b: Bloq) -> Optional[Bloq]:
+        calls.append(b)
+        if isinstance(b, TestAtom) and b.tag == 'drop':
+            return None
+        return TestAtom()
+
+    gen = _make_composite_generalizer(func, func)
+    b1 = TestAtom(tag='x')
+    assert gen(b1) == TestAtom()
+    assert calls == [b1, TestAtom()]
+
+    # Memoized by identity and by value.
+    assert gen(b1) == TestAtom()
+    assert gen(TestAtom(tag='x')) == TestAtom()
+    assert len(calls) == 2
+
+    assert gen(TestAtom(tag='drop')) is None
+    assert gen(TestAtom(tag='drop')) is None
+    assert len(calls) == 3
+
+    # Each composite generalizer has its own memo.
+    assert _make_composite_generalizer(func)(b1) == TestAtom()
+    assert len(calls) == 4
+
+
+def test_composite_generalizer_lru():
+    calls = []
+
+    def func(b: Bloq) -> Optional[Bloq]:
+        calls.append(b)
+        return b
+
+    gen = _make_composite_generalizer(func, maxsize=2)
+    for tag in ['a', 'b', 'a', 'c']:
+        gen(TestAtom(tag=tag))
+    assert calls == [TestAtom(tag='a'), TestAtom(tag='b'), TestAtom(tag='c')]
+
+    # 'b' was evicted when 'c' was added, since 'a' had been used more recently.
+    gen(TestAtom(tag='a'))
+    assert len(calls) == 3
+    gen(TestAtom(tag='b'))
+    assert calls[-1] == TestAtom(tag='b') and len(calls) == 4
@@ -0,0 +1,350 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Cost caches that persist across processes."""
+import abc
+import enum
+import functools
+import hashlib
+import inspect
+import logging
+import pickle
+import sqlite3
+from typing import Any, Dict, Generic, Iterator, MutableMapping, Optional, TYPE_CHECKING
+
+import attrs
+import numpy as np
+import sympy
+
+from qualtran._version import __version__
+
+from ._costing import CostKey, CostValT
+
+if TYPE_CHECKING:
+    from qualtran import Bloq
+
+logger = logging.getLogger(__name__)
+
+_PICKLE_PROTOCOL = 4
+"""A fixed pickle protocol, so that pickled values digest the same way in every process."""
+
+
+class UnfingerprintableError(TypeError):
+    """Raised if a value can't be given a stable, process-independent fingerprint."""
+
+
+def _digest_into(h: 'hashlib._Hash', obj: Any) -> None:
+    """Feed a canonical, process-independent byte representation of `obj` into `h`."""
+    if obj is None or isinstance(obj, (bool, int, float, complex, str, bytes, enum.Enum)):
+        h.update(f'{type(obj).__qualname__}:{obj!r};'.encode())
+    elif isinstance(obj, np.ndarray):
+        h.update(f'ndarray:{obj.dtype.str}:{obj.shape};'.encode())
+        if obj.dtype == object:
+            for x in obj.reshape(-1):
+                _digest_into(h, x)
+        else:
+            h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, np.generic):
+        _digest_into(h, obj.item())
+    elif isinstance(obj, sympy.Basic):
+        h.update(f'sympy:{sympy.srepr(obj)};'.encode())
+    elif isinstance(obj, (tuple, list)):
+        h.update(f'{type(obj).__qualname__}:{len(obj)}['.encode())
+        for x in obj:
+            _digest_into(h, x)
+        h.update(b']')
+    elif isinstance(obj, (set, frozenset)):
+        # Iteration order of sets depends on the (randomized) hash seed, so we sort
+        # the digests of the elements.
+        h.update(f'set:{len(obj)}['.encode())
+        for d in sorted(bloq_fingerprint(x) for x in obj):
+            h.update(d.encode())
+        h.update(b']')
+    elif isinstance(obj, dict):
+        h.update(f'dict:{len(obj)}['.encode())
+        for kd, vd in sorted((bloq_fingerprint(k), bloq_fingerprint(v)) for k, v in obj.items()):
+            h.update(f'{kd}={vd},'.encode())
+        h.update(b']')
+    elif attrs.has(type(obj)):
+        cls = type(obj)
+        h.update(f'{cls.__module__}.{cls.__qualname__}('.encode())
+        for field in attrs.fields(cls):
+            h.update(f'{field.name}='.encode())
+            _digest_into(h, getattr(obj, field.name))
+        h.update(b')')
+    else:
+        # The `repr` of arbitrary objects can include memory addresses, which are neither
+        # stable across processes nor unique. Use a pickle instead: functions and classes are
+        # pickled by their qualified names, and other objects by their state.
+        try:
+            data = pickle.dumps(obj, protocol=_PICKLE_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            raise UnfingerprintableError(
+                f"Can't fingerprint {obj!r} of type {type(obj).__qualname__}: {e}"
+            ) from e
+        h.update(f'pickle:{type(obj).__qualname__}:{len(data)};'.encode())
+        h.update(data)
+
+
+def bloq_fingerprint(obj: Any) -> str:
+    """A stable, content-based digest of a bloq (or any of its attribute values).
+
+    Python's built-in `hash` is salted per-process, so it cannot be used to key values
+    stored on disk. This function walks the attrs fields of the object and digests their
+    values: arrays are digested by dtype, shape, and raw data; sympy expressions
+    by their `srepr`; and nested bloqs recursively. Values of other types are digested by
+    their pickle, so module-level functions are identified by their qualified names.
+
+    Raises:
+        UnfingerprintableError: If a value can't be pickled, e.g. a lambda or a locally
+            defined function.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    _digest_into(h, obj)
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _class_version(cls: type) -> str:
+    """A version string that changes if the source code of `cls` or the qualtran version changes.
+
+    This only covers `cls` itself: changes to other classes (e.g. the bloqs in its
+    decomposition) are not detected.
+    """
+    try:
+        src = inspect.getsource(cls)
+    except (OSError, TypeError):
+        # E.g. classes defined interactively. Fall back to the package version alone.
+        src = ''
+    src_digest = hashlib.blake2b(src.encode(), digest_size=8).hexdigest()
+    return f'{__version__}:{src_digest}'
+
+
+class PersistentCostsCache(
+    MutableMapping['Bloq', CostValT], Generic[CostValT], metaclass=abc.ABCMeta
+):
+    """Base class for a cost cache that outlives the current process.
+
+    Instances can be passed as the `costs_cache` argument of `get_cost_value` and
+    `get_cost_cache`. Each instance is bound to one `CostKey`. Bloqs are keyed by
+    their `bloq_fingerprint` together with a version string derived from the source code of
+    the bloq's own class and the qualtran version. Cost keys are identified by their attrs
+    fields or, if they are not attrs classes, by their class.
+
+    The cost of a bloq depends on its entire callee subtree, but only the source of the
+    bloq's own class is part of the key. Editing a callee (e.g. the decomposition of a
+    subroutine) does not invalidate the cached values of its callers. This is particularly
+    relevant in development installs, where the qualtran version does not change. In that
+    case, pass a new `version` string or call `clear()` to discard the stored values.
+
+    Computed cost values depend on the generalizer used in the computation. If you use
+    the same storage for differently-generalized computations, use a distinct `namespace`
+    for each of them.
+
+    Bloqs that can't be fingerprinted (see `bloq_fingerprint`), e.g. because an attribute is
+    a lambda, are only cached in-process: they are never stored and looking them up in
+    storage is a cache miss.
+
+    Subclasses provide the storage by implementing the `_load`, `_store`, `_delete`, `_keys`,
+    and `flush` methods on (string) keys and (bytes) values. Values are pickled.
+    In-process, loaded values are memoized in an ordinary dictionary.
+
+    Warning: Unpickling can run arbitrary code. Only load values from storage that you
+    trust, e.g. cache files that you created yourself.
+
+    Args:
+        cost_key: The cost key whose values are cached.
+        namespace: An optional name to further partition the cache.
+        version: An optional version string that is part of every key. Change it to
+            invalidate all the values stored with a different version.
+    """
+
+    def __init__(self, cost_key: CostKey[CostValT], namespace: str = '', version: str = ''):
+        self.cost_key = cost_key
+        self.namespace = namespace
+        self.version = version
+        if attrs.has(type(cost_key)):
+            cost_key_fp = bloq_fingerprint(cost_key)
+        else:
+            # We can't inspect the attributes of arbitrary classes; identify them by class.
+            cost_key_fp = bloq_fingerprint(
+                f'{type(cost_key).__module__}.{type(cost_key).__qualname__}'
+            )
+        self._prefix = f'{namespace}/{cost_key_fp}/{version}/'
+        self._mem: Dict['Bloq', CostValT] = {}
+
+    def _key(self, bloq: 'Bloq') -> Optional[str]:
+        """The storage key of `bloq`, or `None` if it can't be fingerprinted."""
+        try:
+            fingerprint = bloq_fingerprint(bloq)
+        except UnfingerprintableError as e:
+            logger.debug("Not using persistent storage for %s: %s", bloq, e)
+            return None
+        return f'{self._prefix}{fingerprint}@{_class_version(type(bloq))}'
+
+    @abc.abstractmethod
+    def _load(self, key: str) -> Optional[bytes]:
+        """Return the stored value for `key` or `None` if it is missing."""
+
+    @abc.abstractmethod
+    def _store(self, key: str, val: bytes) -> None:
+        """Store `val` under `key`."""
+
+    @abc.abstractmethod
+    def _delete(self, key: str) -> bool:
+        """Delete `key` from storage. Return whether it existed."""
+
+    @abc.abstractmethod
+    def _keys(self, prefix: str) -> Iterator[str]:
+        """Iterate over stored keys starting with `prefix`."""
+
+    @abc.abstractmethod
+    def flush(self) -> None:
+        """Make sure all values are written to storage."""
+
+    def __contains__(self, bloq: object) -> bool:
+        if bloq in self._mem:
+            return True
+        try:
+            _ = self[bloq]  # type: ignore[index]
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, bloq: 'Bloq') -> CostValT:
+        if bloq in self._mem:
+            return self._mem[bloq]
+        key = self._key(bloq)
+        raw = self._load(key) if key is not None else None
+        if raw is None:
+            raise KeyError(bloq)
+        val = pickle.loads(raw)
+        self._mem[bloq] = val
+        return val
+
+    def __setitem__(self, bloq: 'Bloq', val: CostValT) -> None:
+        self._mem[bloq] = val
+        key = self._key(bloq)
+        if key is not None:
+            self._store(key, pickle.dumps(val))
+
+    def __delitem__(self, bloq: 'Bloq') -> None:
+        in_mem = bloq in self._mem
+        self._mem.pop(bloq, None)
+        key = self._key(bloq)
+        in_storage = key is not None and self._delete(key)
+        if not in_storage and not in_mem:
+            raise KeyError(bloq)
+
+    def __iter__(self) -> Iterator['Bloq']:
+        """Iterate over the bloqs whose values were loaded or stored in this process.
+
+        Bloq objects cannot be recovered from their fingerprints, so values stored by other
+        processes are only reachable by lookup.
+        """
+        return iter(list(self._mem))
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+    def clear(self) -> None:
+        """Delete all the stored values for this cost key, namespace, and version."""
+        self._mem.clear()
+        for key in list(self._keys(self._prefix)):
+            self._delete(key)
+
+    def n_stored(self) -> int:
+        """The number of values in storage for this cost key, namespace, and version."""
+        return sum(1 for _ in self._keys(self._prefix))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+
+class SqliteCostsCache(PersistentCostsCache[CostValT]):
+    """A persistent cost cache backed by an SQLite database file.
+
+    >>> with SqliteCostsCache('costs.db', QECGatesCost()) as cache:
+    >>>     gc = get_cost_value(bloq, QECGatesCost(), costs_cache=cache)
+
+    Writes are committed every `commit_every` new values and when `flush` is called (which
+    happens on leaving the `with` block).
+
+    Warning: Values are stored as pickles, and loading them can run arbitrary code. Only open
+    cache files that you trust. Do not open cache files from untrusted sources.
+
+    Args:
+        path: The path to the database file. It will be created if it does not exist.
+        cost_key: The cost key whose values are cached.
+        namespace: An optional name to further partition the cache.
+        version: An optional version string that is part of every key, see
+            `PersistentCostsCache`.
+        commit_every: Commit to the database after this many new values.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        cost_key: CostKey[CostValT],
+        namespace: str = '',
+        version: str = '',
+        commit_every: int = 1_000,
+    ):
+        super().__init__(cost_key=cost_key, namespace=namespace, version=version)
+        self.path = path
+        self.commit_every = commit_every
+        self._n_uncommitted = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS costs (key TEXT PRIMARY KEY, val BLOB)')
+        self._conn.commit()
+
+    def _load(self, key: str) -> Optional[bytes]:
+        row = self._conn.execute('SELECT val FROM costs WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return row[0]
+
+    def _store(self, key: str, val: bytes) -> None:
+        self._conn.execute('INSERT OR REPLACE INTO costs (key, val) VALUES (?, ?)', (key, val))
+        self._n_uncommitted += 1
+        if self._n_uncommitted >= self.commit_every:
+            self.flush()
+
+    def _delete(self, key: str) -> bool:
+        cur = self._conn.execute('DELETE FROM costs WHERE key = ?', (key,))
+        return cur.rowcount > 0
+
+    def _keys(self, prefix: str) -> Iterator[str]:
+        # `prefix` is a namespace and hex digest; escape the LIKE wildcards in the namespace.
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        for (key,) in self._conn.execute(
+            "SELECT key FROM costs WHERE key LIKE ? ESCAPE '\\'", (escaped + '%',)
+        ):
+            yield key
+
+    def flush(self) -> None:
+        logger.debug("Committing %d values to %s", self._n_uncommitted, self.path)
+        self._conn.commit()
+        self._n_uncommitted = 0
+
+    def close(self) -> None:
+        """Commit outstanding writes and close the database connection."""
+        self.flush()
+        self._conn.close()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,149 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import cirq
+import numpy as np
+import pytest
+import sympy
+
+from qualtran import BQUInt, Register
+from qualtran.bloqs.basic_gates import TGate
+from qualtran.bloqs.data_loading.qrom import QROM
+from qualtran.bloqs.for_testing.costing import make_example_costing_bloqs, TestCostKey
+from qualtran.bloqs.multiplexers.apply_gate_to_lth_target import ApplyGateToLthQubit
+from qualtran.resource_counting import (
+    bloq_fingerprint,
+    get_cost_value,
+    QECGatesCost,
+    QubitCount,
+    SqliteCostsCache,
+    UnfingerprintableError,
+)
+
+
+def test_bloq_fingerprint():
+    assert bloq_fingerprint(TGate()) == bloq_fingerprint(TGate())
+    assert bloq_fingerprint(TGate()) != bloq_fingerprint(TGate().adjoint())
+
+    data = np.arange(100)
+    assert bloq_fingerprint(QROM.build_from_data(data)) == bloq_fingerprint(
+        QROM.build_from_data(data.copy())
+    )
+    assert bloq_fingerprint(QROM.build_from_data(data)) != bloq_fingerprint(
+        QROM.build_from_data(data[::-1])
+    )
+    n = sympy.Symbol('n')
+    assert bloq_fingerprint(frozenset([n, 2 * n])) == bloq_fingerprint(frozenset([2 * n, n]))
+
+
+def test_sqlite_costs_cache(tmp_path):
+    path = str(tmp_path / 'costs.db')
+    algo = make_example_costing_bloqs()
+
+    with SqliteCostsCache(path, QECGatesCost()) as cache:
+        gc = get_cost_value(algo, QECGatesCost(), costs_cache=cache)
+        assert cache.n_stored() == len(cache) > 0
+
+    # A fresh process-level cache: values are loaded from disk and `compute` is not called.
+    cost = TestCostKey()
+    with SqliteCostsCache(path, cost) as cache:
+        assert cache.n_stored() == 0
+        val = get_cost_value(algo, cost, costs_cache=cache)
+    assert len(cost._log) > 0
+
+    cost = TestCostKey()
+    with SqliteCostsCache(path, cost) as cache:
+        assert get_cost_value(algo, cost, costs_cache=cache) == val
+    assert cost._log == []
+
+    with SqliteCostsCache(path, QECGatesCost()) as cache:
+        assert algo in cache
+        assert cache[algo] == gc
+        del cache[algo]
+        assert algo not in cache
+
+
+def test_sqlite_costs_cache_keys(tmp_path):
+    path = str(tmp_path / 'costs.db')
+    algo = make_example_costing_bloqs()
+    with SqliteCostsCache(path, QECGatesCost()) as cache:
+        get_cost_value(algo, QECGatesCost(), costs_cache=cache)
+
+    with SqliteCostsCache(path, QECGatesCost(legacy_shims=True)) as cache:
+        assert algo not in cache
+    with SqliteCostsCache(path, QubitCount()) as cache:
+        assert algo not in cache
+    with SqliteCostsCache(path, QECGatesCost(), namespace='other') as cache:
+        assert algo not in cache
+    with SqliteCostsCache(path, QECGatesCost(), version='v2') as cache:
+        assert algo not in cache
+
+
+def test_sqlite_costs_cache_clear(tmp_path):
+    path = str(tmp_path / 'costs.db')
+    algo = make_example_costing_bloqs()
+    with SqliteCostsCache(path, QECGatesCost()) as cache:
+        get_cost_value(algo, QECGatesCost(), costs_cache=cache)
+    with SqliteCostsCache(path, QubitCount()) as cache:
+        get_cost_value(algo, QubitCount(), costs_cache=cache)
+        n_qubit_counts = cache.n_stored()
+
+    with SqliteCostsCache(path, QECGatesCost()) as cache:
+        assert cache.n_stored() > 0
+        cache.clear()
+        assert cache.n_stored() == 0
+        assert len(cache) == 0
+        assert algo not in cache
+
+    with SqliteCostsCache(path, QubitCount()) as cache:
+        assert cache.n_stored() == n_qubit_counts > 0
+
+
+def _x_gate(n: int) -> cirq.Gate:
+    return cirq.X
+
+
+def _z_gate(n: int) -> cirq.Gate:
+    return cirq.Z
+
+
+def _apply_gate(nth_gate) -> ApplyGateToLthQubit:
+    return ApplyGateToLthQubit(Register('selection', BQUInt(2, 4)), nth_gate)
+
+
+def test_bloq_fingerprint_callable_field():
+    # Module-level functions are identified by their qualified names.
+    assert bloq_fingerprint(_apply_gate(_x_gate)) == bloq_fingerprint(_apply_gate(_x_gate))
+    assert bloq_fingerprint(_apply_gate(_x_gate)) != bloq_fingerprint(_apply_gate(_z_gate))
+
+    # Lambdas have no stable identity.
+    with pytest.raises(UnfingerprintableError):
+        bloq_fingerprint(_apply_gate(lambda n: cirq.X))
+
+
+def test_sqlite_costs_cache_unfingerprintable(tmp_path):
+    path = str(tmp_path / 'costs.db')
+    bloq = _apply_gate(lambda n: cirq.X)
+    with SqliteCostsCache(path, QubitCount()) as cache:
+        n_qubits = get_cost_value(bloq, QubitCount(), costs_cache=cache)
+        # The value is cached in-process, but only the values of its callees are stored.
+        assert cache[bloq] == n_qubits
+        assert cache.n_stored() == len(cache) - 1
+    with SqliteCostsCache(path, QubitCount()) as cache:
+        assert bloq not in cache
+        cache[bloq] = n_qubits
+        assert cache[bloq] == n_qubits
+        del cache[bloq]
+        assert bloq not in cache
+        with pytest.raises(KeyError):
+            del cache[bloq]
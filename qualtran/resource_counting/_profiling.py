@@ -0,0 +1,243 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Instrumentation of cost computations."""
+import contextlib
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from typing import ContextManager, Dict, Iterator, List, Optional, TYPE_CHECKING
+
+import attrs
+
+if TYPE_CHECKING:
+    from qualtran import Bloq
+
+
+@attrs.mutable
+class BloqClassProfile:
+    """Profiling statistics for all the bloqs of one class.
+
+    Times are in seconds. Compute times are exclusive: they do not include the time spent
+    computing the costs of callees, decomposing, or building call graphs, which are reported
+    separately.
+
+    Args:
+        n_computed: The number of times a cost was computed with `CostKey.compute`.
+        compute_time: The time spent in `CostKey.compute`.
+        n_cache_hits: The number of times a cost was found in the costs cache.
+        n_cache_misses: The number of times a cost was not found in the costs cache, so it
+            was taken from the static costs or computed.
+        n_static: The number of times a static cost (`my_static_costs`) was used.
+        n_decomposed: The number of times a bloq was decomposed.
+        decompose_time: The time spent decomposing bloqs.
+        n_call_graph: The number of calls to `build_call_graph`.
+        call_graph_time: The time spent in `build_call_graph`.
+    """
+
+    n_computed: int = 0
+    compute_time: float = 0.0
+    n_cache_hits: int = 0
+    n_cache_misses: int = 0
+    n_static: int = 0
+    n_decomposed: int = 0
+    decompose_time: float = 0.0
+    n_call_graph: int = 0
+    call_graph_time: float = 0.0
+
+    @property
+    def total_time(self) -> float:
+        return self.compute_time + self.decompose_time + self.call_graph_time
+
+
+@attrs.mutable
+class _Frame:
+    name: str
+    start: float
+    child_time: float = 0.0
+
+
+class CostProfile:
+    """Per-bloq-class timing and cache statistics collected by `profile_costs`.
+
+    Every timed event (a cost computation, a decomposition, or a call to
+    `build_call_graph`) is a frame on a stack. The exclusive time of each frame is recorded
+    both per bloq class, in `by_class`, and per stack of frames, which can be written in the
+    "folded stacks" format understood by flame graph tools (e.g. `flamegraph.pl` or
+    speedscope) with `write_folded_stacks`.
+    """
+
+    def __init__(self):
+        self.by_class: Dict[str, BloqClassProfile] = defaultdict(BloqClassProfile)
+        self.folded_stacks: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List['_Frame']:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    @contextlib.contextmanager
+    def _timed(self, bloq: 'Bloq', suffix: str, count_attr: str, time_attr: str) -> Iterator[None]:
+        """Time a frame and add its exclusive time to the statistics of `bloq`'s class.
+
+        Frames are recorded even if they raise, e.g. a `DecomposeTypeError`.
+        """
+        cls_name = _bloq_class_name(bloq)
+        name = cls_name + suffix
+        stack = self._stack()
+        frame = _Frame(name=name, start=time.perf_counter())
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.pop()
+            duration = time.perf_counter() - frame.start
+            if stack:
+                stack[-1].child_time += duration
+            exclusive_time = duration - frame.child_time
+            key = ';'.join([f.name for f in stack] + [name])
+            with self._lock:
+                self.folded_stacks[key] += exclusive_time
+                stats = self.by_class[cls_name]
+                setattr(stats, count_attr, getattr(stats, count_attr) + 1)
+                setattr(stats, time_attr, getattr(stats, time_attr) + exclusive_time)
+
+    def time_compute(self, bloq: 'Bloq') -> ContextManager[None]:
+        """Time a call to `CostKey.compute` for `bloq`."""
+        return self._timed(bloq, '', 'n_computed', 'compute_time')
+
+    def time_decompose(self, bloq: 'Bloq') -> ContextManager[None]:
+        """Time the decomposition of `bloq`."""
+        return self._timed(bloq, '.decompose_bloq', 'n_decomposed', 'decompose_time')
+
+    def time_call_graph(self, bloq: 'Bloq') -> ContextManager[None]:
+        """Time a call to `bloq.build_call_graph`."""
+        return self._timed(bloq, '.build_call_graph', 'n_call_graph', 'call_graph_time')
+
+    def record_cache_hit(self, bloq: 'Bloq') -> None:
+        with self._lock:
+            self.by_class[_bloq_class_name(bloq)].n_cache_hits += 1
+
+    def record_cache_miss(self, bloq: 'Bloq') -> None:
+        with self._lock:
+            self.by_class[_bloq_class_name(bloq)].n_cache_misses += 1
+
+    def record_static(self, bloq: 'Bloq') -> None:
+        with self._lock:
+            self.by_class[_bloq_class_name(bloq)].n_static += 1
+
+    def format_table(self, sort_by: str = 'total_time', limit: Optional[int] = None) -> str:
+        """A text table of the statistics per bloq class.
+
+        Args:
+            sort_by: The `BloqClassProfile` attribute to sort the rows by, in descending order.
+            limit: If provided, only show this many rows.
+        """
+        rows = sorted(self.by_class.items(), key=lambda kv: getattr(kv[1], sort_by), reverse=True)
+        if limit is not None:
+            rows = rows[:limit]
+        header = [
+            'bloq class',
+            'total s',
+            'computed',
+            'compute s',
+            'cache hits',
+            'cache misses',
+            'static',
+            'decomposed',
+            'decompose s',
+            'call graphs',
+            'call graph s',
+        ]
+        lines = [header]
+        for name, s in rows:
+            lines.append(
+                [
+                    name,
+                    f'{s.total_time:.4f}',
+                    str(s.n_computed),
+                    f'{s.compute_time:.4f}',
+                    str(s.n_cache_hits),
+                    str(s.n_cache_misses),
+                    str(s.n_static),
+                    str(s.n_decomposed),
+                    f'{s.decompose_time:.4f}',
+                    str(s.n_call_graph),
+                    f'{s.call_graph_time:.4f}',
+                ]
+            )
+        widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+        return '\n'.join(
+            '  '.join(
+                cell.ljust(w) if i == 0 else cell.rjust(w)
+                for i, (cell, w) in enumerate(zip(line, widths))
+            ).rstrip()
+            for line in lines
+        )
+
+    def format_folded_stacks(self) -> str:
+        """The exclusive time of each stack of frames, in microseconds, in folded format."""
+        return ''.join(
+            f'{stack} {round(t * 1e6)}\n' for stack, t in sorted(self.folded_stacks.items())
+        )
+
+    def write_folded_stacks(self, path: str) -> None:
+        """Write `format_folded_stacks()` to a file for use with flame graph tools."""
+        with open(path, 'w') as f:
+            f.write(self.format_folded_stacks())
+
+
+def _bloq_class_name(bloq: 'Bloq') -> str:
+    return type(bloq).__name__
+
+
+# The active profile is tracked per thread (and per asyncio task) so that profiling in one
+# thread does not record the work of unrelated threads.
+_ACTIVE_PROFILE: contextvars.ContextVar[Optional[CostProfile]] = contextvars.ContextVar(
+    '_ACTIVE_PROFILE', default=None
+)
+
+
+def get_active_cost_profile() -> Optional[CostProfile]:
+    """The `CostProfile` collecting statistics, or `None` if costs are not being profiled."""
+    return _ACTIVE_PROFILE.get()
+
+
+@contextlib.contextmanager
+def profile_costs() -> Iterator[CostProfile]:
+    """Collect per-bloq-class timing and cache statistics within this context.
+
+    Cost computations (`get_cost_value`, `get_cost_cache`, `query_costs`), bloq
+    decompositions, and calls to `build_call_graph` are timed. Only work done in the current
+    thread, or on a `ThreadPoolExecutor` passed to the cost functions, is recorded.
+
+    >>> with profile_costs() as profile:
+    >>>     get_cost_value(bloq, QECGatesCost())
+    >>> print(profile.format_table(limit=10))
+    >>> profile.write_folded_stacks('costs.folded')
+
+    Yields:
+        The `CostProfile` that is populated within the context.
+    """
+    profile = CostProfile()
+    token = _ACTIVE_PROFILE.set(profile)
+    try:
+        yield profile
+    finally:
+        _ACTIVE_PROFILE.reset(token)
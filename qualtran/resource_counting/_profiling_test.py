@@ -0,0 +1,86 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from qualtran import disable_decomposition_cache
+from qualtran.bloqs.for_testing.with_decomposition import TestParallelCombo, TestSerialCombo
+from qualtran.resource_counting import get_cost_value, profile_costs, QECGatesCost
+from qualtran.resource_counting._profiling import get_active_cost_profile
+
+
+def test_profile_costs(tmp_path):
+    assert get_active_cost_profile() is None
+    with disable_decomposition_cache(), profile_costs() as profile:
+        assert get_active_cost_profile() is profile
+        get_cost_value(TestSerialCombo(), QECGatesCost())
+    assert get_active_cost_profile() is None
+
+    combo = profile.by_class['TestSerialCombo']
+    assert combo.n_computed == 1
+    assert (combo.n_cache_hits, combo.n_cache_misses) == (0, 1)
+    assert combo.n_decomposed == 1
+    assert combo.n_call_graph == 1
+    assert combo.total_time >= combo.compute_time > 0
+
+    # `TestSerialCombo` calls three `TestAtom`s, which have static costs.
+    atom = profile.by_class['TestAtom']
+    assert atom.n_static == 3
+    assert atom.n_computed == 0
+    assert (atom.n_cache_hits, atom.n_cache_misses) == (0, 3)
+
+    table = profile.format_table()
+    assert table.splitlines()[0].startswith('bloq class')
+    assert len(profile.format_table(limit=1).splitlines()) == 2
+
+    folded = profile.format_folded_stacks()
+    assert (
+        'TestSerialCombo;TestSerialCombo.build_call_graph;TestSerialCombo.decompose_bloq ' in folded
+    )
+    for line in folded.splitlines():
+        stack, us = line.rsplit(' ', 1)
+        assert int(us) >= 0
+
+    path = tmp_path / 'costs.folded'
+    profile.write_folded_stacks(str(path))
+    assert path.read_text() == folded
+
+
+def test_profile_costs_cache_hits():
+    costs_cache = {}
+    get_cost_value(TestSerialCombo(), QECGatesCost(), costs_cache=costs_cache)
+    with profile_costs() as profile:
+        get_cost_value(TestSerialCombo(), QECGatesCost(), costs_cache=costs_cache)
+    combo = profile.by_class['TestSerialCombo']
+    assert (combo.n_cache_hits, combo.n_cache_misses, combo.n_computed) == (1, 0, 0)
+    assert 'TestAtom' not in profile.by_class
+
+
+def test_profile_costs_threads():
+    def run():
+        get_cost_value(TestParallelCombo(), QECGatesCost())
+
+    with profile_costs() as profile:
+        # Other threads are not profiled ...
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        assert dict(profile.by_class) == {}
+
+        # ... unless they are running tasks for an executor passed to the cost functions.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            get_cost_value(TestSerialCombo(), QECGatesCost(), executor=executor)
+    combo = profile.by_class['TestSerialCombo']
+    assert (combo.n_computed, combo.n_cache_hits) == (1, 1)
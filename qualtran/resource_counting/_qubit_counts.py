@@ -13,14 +13,23 @@
 #  limitations under the License.
 
 import logging
-from typing import Callable, Set
+from typing import Callable, Iterable, List, Set, Tuple, Union
 
 import networkx as nx
 from attrs import frozen
 
-from qualtran import Bloq, Connection, DanglingT, DecomposeNotImplementedError, DecomposeTypeError
+from qualtran import (
+    Bloq,
+    BloqInstance,
+    Connection,
+    DanglingT,
+    DecomposeNotImplementedError,
+    DecomposeTypeError,
+    LeftDangle,
+)
+from qualtran._infra.binst_graph import as_binst_graph, BinstGraph
 from qualtran._infra.composite_bloq import _binst_to_cxns, CompositeBloq
-from qualtran.symbolics import smax, SymbolicInt
+from qualtran.symbolics import is_symbolic, smax, SymbolicInt
 
 from ._call_graph import get_bloq_callee_counts
 from ._costing import CostKey
@@ -28,8 +37,36 @@ from ._costing import CostKey
 logger = logging.getLogger(__name__)
 
 
+def _lifetime_aware_order(
+    binst_graph: Union[BinstGraph, nx.DiGraph]
+) -> Iterable[Union[BloqInstance, DanglingT]]:
+    """A topological order of `binst_graph` that keeps qubits allocated for as little as possible.
+
+    Of the binsts whose predecessors have all been executed, the one that increases the number
+    of qubits in play the least is executed first. This delays allocations (e.g. `Allocate` or
+    computing `And`) until their qubits are needed and executes de-allocations (e.g. `Free`)
+    as soon as possible. Ties are broken by the order in which the binsts were added.
+    """
+
+    binst_graph = as_binst_graph(binst_graph)
+
+    def _priority(binst: Union[BloqInstance, DanglingT]) -> Tuple[SymbolicInt, int]:
+        if isinstance(binst, DanglingT):
+            return (0, -1) if binst is LeftDangle else (0, len(binst_graph))
+        pred_cxns, succ_cxns = _binst_to_cxns(binst, binst_graph=binst_graph)
+        delta = sum(cxn.shape for cxn in succ_cxns) - sum(cxn.shape for cxn in pred_cxns)
+        if is_symbolic(delta):
+            # Symbolic sizes can't be compared, so fall back to the order of addition.
+            delta = 0
+        return delta, binst.i
+
+    return binst_graph.lexicographical_topological_sort(key=_priority)
+
+
 def _cbloq_max_width(
-    binst_graph: nx.DiGraph, _bloq_max_width: Callable[[Bloq], SymbolicInt] = lambda b: 0
+    binst_graph: Union[BinstGraph, nx.DiGraph],
+    _bloq_max_width: Callable[[Bloq], SymbolicInt] = lambda b: 0,
+    lifetime_aware: bool = False,
 ) -> SymbolicInt:
     """Get the maximum width of a composite bloq.
 
@@ -39,14 +76,31 @@ def _cbloq_max_width(
     `_bloq_max_width` callable) and the bystander connections that are "in play". The max
     width is the maximum over all the time points.
 
+    By default, the binsts are executed in an arbitrary topological order. If `lifetime_aware`
+    is set, they are executed in an order that delays allocations and hastens de-allocations
+    (see `_lifetime_aware_order`), which gives a tighter estimate.
+
     If the dataflow graph has more than one connected component, we treat each component
     independently.
     """
+    binst_graph = as_binst_graph(binst_graph)
     max_width: SymbolicInt = 0
     in_play: Set[Connection] = set()
 
-    for cc in nx.weakly_connected_components(binst_graph):
-        for binst in nx.topological_sort(binst_graph.subgraph(cc)):
+    # A topological order of the whole graph visits the binsts of each weakly connected
+    # component in the same order as a topological order of just that component.
+    if lifetime_aware:
+        order = _lifetime_aware_order(binst_graph)
+    else:
+        order = binst_graph.topological_sort()
+    components = binst_graph.weakly_connected_components()
+    component_of = {binst: k for k, cc in enumerate(components) for binst in cc}
+    ordered_components: List[List[Union[BloqInstance, DanglingT]]] = [[] for _ in components]
+    for binst in order:
+        ordered_components[component_of[binst]].append(binst)
+
+    for binsts in ordered_components:
+        for binst in binsts:
             pred_cxns, succ_cxns = _binst_to_cxns(binst, binst_graph=binst_graph)
 
             # Remove inbound connections from those that are 'in play'.
@@ -86,14 +140,26 @@ class QubitCount(CostKey[SymbolicInt]):
      - We do not consider "tetris-ing" subbloqs. In a decomposition, each subbloq is assumed
        to be using all of its qubits for the duration of its execution. This could potentially
        overestimate the total number of qubits.
+     - By default, the subbloqs of a decomposition are executed in an arbitrary topological
+       order, so ancilla qubits may be allocated long before they are used or freed long after.
+       With `lifetime_aware=True`, the subbloqs are executed in an order that allocates qubits
+       (e.g. with `Allocate` or `And`) only when they are needed and frees them (e.g. with
+       `Free` or `And†`) as soon as possible, so the lifetimes of ancillas in different parts of
+       the decomposition can overlap less. This gives a tighter estimate.
 
     This Min-Max style estimate can provide a good balance between accuracy and scalability
     of the accounting. To fully account for each qubit and manage space-vs-time trade-offs,
     you must comprehensively decompose your algorithm to a `cirq.Circuit` of basic gates and
     use a `cirq.QubitManager` to manage trade-offs. This may be computationally expensive for
     large algorithms.
+
+    Args:
+        lifetime_aware: Whether to order the subbloqs of each decomposition to minimize the
+            lifetimes of allocated qubits.
     """
 
+    lifetime_aware: bool = False
+
     def compute(
         self, bloq: 'Bloq', get_callee_cost: Callable[['Bloq'], SymbolicInt]
     ) -> SymbolicInt:
@@ -106,11 +172,15 @@ class QubitCount(CostKey[SymbolicInt]):
         # the `get_callee_cost` function so this can recurse into subbloqs.
         if isinstance(bloq, CompositeBloq):
             logger.info("Computing %s by the passed-in CompositeBloq", self)
-            return _cbloq_max_width(bloq._binst_graph, get_callee_cost)
+            return _cbloq_max_width(
+                bloq._compact_binst_graph, get_callee_cost, lifetime_aware=self.lifetime_aware
+            )
         try:
             cbloq = bloq.decompose_bloq()
             logger.info("Computing %s for %s from its decomposition", self, bloq)
-            return _cbloq_max_width(cbloq._binst_graph, get_callee_cost)
+            return _cbloq_max_width(
+                cbloq._compact_binst_graph, get_callee_cost, lifetime_aware=self.lifetime_aware
+            )
         except (DecomposeNotImplementedError, DecomposeTypeError):
             pass
         except Exception as e:
@@ -135,4 +205,6 @@ class QubitCount(CostKey[SymbolicInt]):
         return 0
 
     def __str__(self):
+        if self.lifetime_aware:
+            return 'qubit count (lifetime-aware)'
         return 'qubit count'
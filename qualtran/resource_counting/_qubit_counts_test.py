@@ -16,7 +16,7 @@ import pytest
 import sympy
 
 import qualtran.testing as qlt_testing
-from qualtran import QAny
+from qualtran import BloqBuilder, QAny
 from qualtran.bloqs.basic_gates import Swap, TwoBitSwap
 from qualtran.bloqs.bookkeeping import Allocate, Free
 from qualtran.bloqs.for_testing.interior_alloc import InteriorAlloc
@@ -81,6 +81,52 @@ def test_on_cbloq():
     assert n_qubits == 3 * n
 
 
+def _make_sequential_allocs(n):
+    bb = BloqBuilder()
+    x = bb.add_register('x', n)
+    for _ in range(3):
+        anc = bb.allocate(n)
+        x, anc = bb.add(Swap(n), x=x, y=anc)
+        bb.free(anc)
+    return bb.finalize(x=x)
+
+
+def _make_early_allocs(n):
+    bb = BloqBuilder()
+    x = bb.add_register('x', n)
+    ancs = [bb.allocate(n) for _ in range(3)]
+    for i in range(3):
+        x, ancs[i] = bb.add(Swap(n), x=x, y=ancs[i])
+    for anc in ancs:
+        bb.free(anc)
+    return bb.finalize(x=x)
+
+
+@pytest.mark.parametrize('make_cbloq', [_make_sequential_allocs, _make_early_allocs])
+def test_max_width_lifetime_aware(make_cbloq):
+    cbloq = make_cbloq(10)
+    default_width = _cbloq_max_width(cbloq._binst_graph)
+    lifetime_aware_width = _cbloq_max_width(cbloq._binst_graph, lifetime_aware=True)
+    # The default order keeps all three ancillas allocated at once; at most one is needed.
+    assert default_width == 40
+    assert lifetime_aware_width == 20
+    assert lifetime_aware_width < default_width
+
+
+def test_max_width_lifetime_aware_symb():
+    n = sympy.Symbol('n', positive=True, integer=True)
+    cbloq = _make_sequential_allocs(n)
+    assert _cbloq_max_width(cbloq._binst_graph, lifetime_aware=True) == 2 * n
+
+
+def test_qubit_count_lifetime_aware():
+    cbloq = _make_sequential_allocs(10)
+    assert get_cost_value(cbloq, QubitCount()) == 40
+    assert get_cost_value(cbloq, QubitCount(lifetime_aware=True)) == 20
+    assert get_cost_value(InteriorAlloc(n=10), QubitCount(lifetime_aware=True)) == 30
+    assert str(QubitCount(lifetime_aware=True)) == 'qubit count (lifetime-aware)'
+
+
 @pytest.mark.notebook
 def test_notebook():
     qlt_testing.execute_notebook("qubit_counts")
@@ -0,0 +1,141 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Fast numerical evaluation of symbolic costs over many parameter values."""
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import attrs
+import numpy as np
+import sympy
+
+from ._bloq_counts import GateCounts
+
+
+def _flatten_costs(costs: Any) -> Dict[str, sympy.Expr]:
+    """Flatten a cost value or a mapping of cost values into named sympy expressions."""
+    if isinstance(costs, GateCounts):
+        return {k: sympy.sympify(v) for k, v in attrs.asdict(costs).items()}
+
+    if isinstance(costs, Mapping):
+        flat: Dict[str, sympy.Expr] = {}
+        for k, v in costs.items():
+            sub_costs = (
+                _flatten_costs(v) if isinstance(v, GateCounts) else {str(k): sympy.sympify(v)}
+            )
+            for name, expr in sub_costs.items():
+                if name in flat:
+                    raise ValueError(f"Duplicate cost name {name!r} in {costs}.")
+                flat[name] = expr
+        return flat
+
+    return {'value': sympy.sympify(costs)}
+
+
+class CostsEvaluator:
+    """A vectorized, numerical evaluator of symbolic costs.
+
+    Use `lambdify_costs` to construct an evaluator. Calling it with arrays of parameter values
+    evaluates all the cost expressions with NumPy in one go, which is much faster than
+    substituting values into the sympy expressions one parameter point at a time.
+
+    >>> costs = query_costs(bloq, [QECGatesCost(), QubitCount()])[bloq]
+    >>> evaluator = lambdify_costs(costs)
+    >>> results = evaluator(N=np.arange(1, 1000), M=10)
+    >>> results['toffoli'], results['qubit count']
+
+    Parameter values are broadcast against each other with the usual NumPy rules, and each
+    output array has the broadcast shape. Outputs are floating point arrays.
+
+    Args:
+        params: The symbols that are parameters of the evaluator, in positional order.
+        exprs: A mapping from cost name to sympy expression.
+    """
+
+    def __init__(self, params: Sequence[sympy.Symbol], exprs: Mapping[str, sympy.Expr]):
+        self.params: Tuple[sympy.Symbol, ...] = tuple(params)
+        self.exprs: Dict[str, sympy.Expr] = dict(exprs)
+        missing = set().union(*(e.free_symbols for e in self.exprs.values())) - set(self.params)
+        if missing:
+            raise ValueError(f"Cost expressions depend on symbols not in `params`: {missing}")
+        self._func: Callable[..., List[Any]] = sympy.lambdify(
+            self.params, list(self.exprs.values()), modules='numpy', cse=True
+        )
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """The names of the costs returned by this evaluator."""
+        return tuple(self.exprs.keys())
+
+    def _param_values(self, args: Sequence[Any], kwargs: Mapping[str, Any]) -> List[Any]:
+        if len(args) > len(self.params):
+            raise TypeError(f"Expected at most {len(self.params)} positional arguments.")
+        values: Dict[str, Any] = {p.name: v for p, v in zip(self.params, args)}
+        for name, v in kwargs.items():
+            if name not in {p.name for p in self.params}:
+                raise TypeError(f"Unknown parameter {name!r}. Parameters are {self.params}.")
+            if name in values:
+                raise TypeError(f"Parameter {name!r} given more than once.")
+            values[name] = v
+        missing = [p.name for p in self.params if p.name not in values]
+        if missing:
+            raise TypeError(f"Missing values for parameters {missing}.")
+        return [np.asarray(values[p.name]) for p in self.params]
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Dict[str, np.ndarray]:
+        """Evaluate the costs on (arrays of) parameter values.
+
+        Parameter values can be given positionally, in the order of `self.params`, or by
+        symbol name as keyword arguments.
+
+        Returns:
+            A dictionary from cost name to an array of values.
+        """
+        param_values = self._param_values(args, kwargs)
+        shape = np.broadcast_shapes(*(v.shape for v in param_values))
+        results = self._func(*param_values)
+        return {
+            name: np.broadcast_to(np.asarray(val, dtype=np.float64), shape)
+            for name, val in zip(self.exprs.keys(), results)
+        }
+
+
+def lambdify_costs(
+    costs: Union[GateCounts, Mapping[Any, Any], sympy.Expr, int, float],
+    params: Optional[Sequence[Union[str, sympy.Symbol]]] = None,
+) -> CostsEvaluator:
+    """Compile symbolic costs into a vectorized numerical evaluator.
+
+    Args:
+        costs: The (possibly symbolic) costs. This can be a `GateCounts`, a single expression,
+            or a mapping from names or `CostKey`s to these; for example the per-bloq values
+            returned by `query_costs`. The fields of `GateCounts` values are named by their
+            field name (e.g. 't', 'toffoli', 'rotation'). Other values in a mapping are named
+            by `str(key)` (e.g. 'qubit count'). A lone expression is named 'value'.
+        params: The parameters of the evaluator, as symbols or their names. By default, these
+            are all the free symbols in the costs, sorted by name.
+
+    Returns:
+        A `CostsEvaluator` that maps arrays of parameter values to arrays of costs.
+    """
+    exprs = _flatten_costs(costs)
+    if params is None:
+        free_symbols = set().union(*(e.free_symbols for e in exprs.values()))
+        params = sorted(free_symbols, key=lambda s: s.name)
+    else:
+        params = [sympy.Symbol(p) if isinstance(p, str) else p for p in params]
+
+    # Parameters may be defined with assumptions (e.g. positive=True); match them by name.
+    by_name = {s.name: s for e in exprs.values() for s in e.free_symbols}
+    params = [by_name.get(p.name, p) for p in params]
+    return CostsEvaluator(params=params, exprs=exprs)
@@ -0,0 +1,69 @@
+#  Copyright 2024 Google LLC
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import numpy as np
+import pytest
+import sympy
+
+from qualtran.bloqs.data_loading.qrom import _qrom_symb
+from qualtran.resource_counting import (
+    GateCounts,
+    lambdify_costs,
+    QECGatesCost,
+    QubitCount,
+    query_costs,
+)
+from qualtran.symbolics import ceil, log2
+
+
+def test_lambdify_costs_qrom():
+    bloq = _qrom_symb.make()
+    costs = query_costs(bloq, [QECGatesCost(), QubitCount()])[bloq]
+    evaluator = lambdify_costs(costs)
+    assert [p.name for p in evaluator.params] == ['M', 'N', 'b1', 'b2', 'c']
+    assert 'and_bloq' in evaluator.names
+    assert 'qubit count' in evaluator.names
+
+    Ns = np.arange(2, 100)
+    results = evaluator(N=Ns, M=4, b1=3, b2=5, c=1)
+    assert results['and_bloq'].shape == Ns.shape
+    assert results['qubit count'].shape == Ns.shape
+
+    for i, N in enumerate(Ns[:5]):
+        subs = {'N': int(N), 'M': 4, 'b1': 3, 'b2': 5, 'c': 1}
+        gc = costs[QECGatesCost()]
+        assert results['and_bloq'][i] == int(gc.and_bloq.subs(subs))
+        assert results['clifford'][i] == int(gc.clifford.subs(subs))
+        assert results['t'][i] == 0
+        assert results['qubit count'][i] == int(costs[QubitCount()].subs(subs))
+
+
+def test_lambdify_costs_exact_log2():
+    n = sympy.Symbol('n', positive=True, integer=True)
+    evaluator = lambdify_costs(GateCounts(toffoli=ceil(log2(n))))
+    ks = np.arange(1, 60)
+    np.testing.assert_array_equal(evaluator(2.0**ks)['toffoli'], ks)
+
+
+def test_lambdify_costs_params():
+    a, b = sympy.symbols('a b')
+    evaluator = lambdify_costs(a * b + 1, params=['b', 'a'])
+    assert evaluator.names == ('value',)
+    np.testing.assert_array_equal(evaluator([1, 2], 3)['value'], [4, 7])
+    assert evaluator(a=[[1], [2]], b=[1, 2, 3])['value'].shape == (2, 3)
+
+    with pytest.raises(TypeError, match='Missing'):
+        evaluator(a=1)
+    with pytest.raises(ValueError, match='not in `params`'):
+        lambdify_costs(a * b, params=['a'])
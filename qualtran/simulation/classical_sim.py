@@ -43,6 +43,7 @@ from qualtran import (
     Signature,
     Soquet,
 )
+from qualtran._infra.binst_graph import as_binst_graph, BinstGraph
 from qualtran._infra.composite_bloq import _binst_to_cxns
 
 if TYPE_CHECKING:
@@ -136,12 +137,12 @@ class ClassicalSimState:
     def __init__(
         self,
         signature: 'Signature',
-        binst_graph: nx.DiGraph,
+        binst_graph: Union[BinstGraph, nx.DiGraph],
         vals: Mapping[str, Union[sympy.Symbol, ClassicalValT]],
     ):
         self._signature = signature
-        self._binst_graph = binst_graph
-        self._binst_iter = nx.topological_sort(self._binst_graph)
+        self._binst_graph = as_binst_graph(binst_graph)
+        self._binst_iter = self._binst_graph.topological_sort()
 
         # Keep track of each soquet's bit array. Initialize with LeftDangle
         self.soq_assign: Dict[Soquet, ClassicalValT] = {}
@@ -164,7 +165,7 @@ class ClassicalSimState:
             A new classical sim state.
 
         """
-        return cls(signature=cbloq.signature, binst_graph=cbloq._binst_graph, vals=vals)
+        return cls(signature=cbloq.signature, binst_graph=cbloq._compact_binst_graph, vals=vals)
 
     def _update_assign_from_vals(
         self,
@@ -326,7 +327,7 @@ class PhasedClassicalSimState(ClassicalSimState):
     def __init__(
         self,
         signature: 'Signature',
-        binst_graph: nx.DiGraph,
+        binst_graph: Union[BinstGraph, nx.DiGraph],
         vals: Mapping[str, Union[sympy.Symbol, ClassicalValT]],
         *,
         phase: complex = 1.0,
@@ -349,7 +350,7 @@ class PhasedClassicalSimState(ClassicalSimState):
         Returns:
             A new classical sim state.
         """
-        return cls(signature=cbloq.signature, binst_graph=cbloq._binst_graph, vals=vals)
+        return cls(signature=cbloq.signature, binst_graph=cbloq._compact_binst_graph, vals=vals)
 
     def _binst_basis_state_phase(self, binst, in_vals):
         """Call `basis_state_phase` on a given bloq instance.
@@ -370,7 +371,7 @@ class PhasedClassicalSimState(ClassicalSimState):
 def call_cbloq_classically(
     signature: Signature,
     vals: Mapping[str, Union[sympy.Symbol, ClassicalValT]],
-    binst_graph: nx.DiGraph,
+    binst_graph: Union[BinstGraph, nx.DiGraph],
 ) -> Tuple[Dict[str, ClassicalValT], Dict[Soquet, ClassicalValT]]:
     """Propagate `on_classical_vals` calls through a composite bloq's contents.
 
@@ -215,16 +215,36 @@ SymbolicT = TypeVar('SymbolicT', SymbolicInt, SymbolicFloat, SymbolicComplex)
 
 
 def prod(args: Iterable[SymbolicT]) -> SymbolicT:
+    """The product of `args`. See `ssum`."""
     ret: SymbolicT = 1
+    factors = []
     for arg in args:
-        ret = ret * arg
+        if isinstance(arg, sympy.Expr):
+            factors.append(arg)
+        else:
+            ret = ret * arg
+    if factors:
+        return sympy.Mul(ret, *factors)
     return ret
 
 
 def ssum(args: Iterable[SymbolicT]) -> SymbolicT:
+    """The sum of `args`.
+
+    Concrete values are added directly, and symbolic values are combined with a single
+    `sympy.Add`. This flattens and collects the terms once instead of building (and
+    canonicalizing) an intermediate expression for each partial sum, which takes time
+    quadratic in the number of terms.
+    """
     ret: SymbolicT = 0
+    terms = []
     for arg in args:
-        ret = ret + arg
+        if isinstance(arg, sympy.Expr):
+            terms.append(arg)
+        else:
+            ret = ret + arg
+    if terms:
+        return sympy.Add(ret, *terms)
     return ret
 
 
@@ -19,7 +19,20 @@ import sympy
 from sympy.codegen.cfunctions import log
 from sympy.codegen.cfunctions import log2 as sympy_log2
 
-from qualtran.symbolics import bit_length, ceil, is_zero, ln, log2, sarg, sexp, smax, smin, ssqrt
+from qualtran.symbolics import (
+    bit_length,
+    ceil,
+    is_zero,
+    ln,
+    log2,
+    prod,
+    sarg,
+    sexp,
+    smax,
+    smin,
+    ssqrt,
+    ssum,
+)
 
 
 def test_log2():
@@ -146,3 +159,17 @@ def test_is_zero():
 
     assert is_zero(sympy.sympify("0"))
     assert not is_zero(sympy.sympify("1"))
+
+
+def test_ssum_prod():
+    assert ssum([]) == 0
+    assert ssum([1, 2, 3.5]) == 6.5
+    assert prod([2, 3]) == 6
+    assert isinstance(ssum([1, 2]), int)
+
+    n, m = sympy.symbols('n m')
+    terms = [n, 2, m, 3 * n, sympy.Integer(4)]
+    assert ssum(terms) == 4 * n + m + 6
+    assert ssum(terms) == sum(terms)
+    assert prod(terms) == 24 * n**2 * m
+    assert prod([n, 0]) == 0